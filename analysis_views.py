@@ -0,0 +1,21 @@
+"""Frame analysis API for the worker role."""
+from flask import Blueprint, jsonify, request, session
+
+import interview_services as services
+from auth import login_required
+
+bp = Blueprint('analysis', __name__)
+
+
+@bp.route('/api/analyze-expression', methods=['POST'])
+@login_required
+def analyze_expression():
+    if 'frame' not in request.files:
+        return jsonify({'error': 'No frame provided'}), 400
+        
+    frame_file = request.files['frame']
+    frame_data = frame_file.read()
+
+    analyzer = services.get_interview_analyzer(session.get('interview_id') or ('user', session['user_id']))
+    result, status = services.analyze_frame(analyzer, frame_data, request.form)
+    return jsonify(result), status
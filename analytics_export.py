@@ -0,0 +1,207 @@
+"""Incremental columnar export of interview analytics for offline reporting.
+
+Each table is read in keyset-paginated chunks of plain rows (no ORM
+objects) and written as columns: one Parquet file per run with a row group
+per chunk, or one ``.npz`` file per chunk when pyarrow is not installed.
+A high-water mark per table is stored next to the output, so the next run
+only reads rows added (or, for interviews, completed) since the last one.
+Readers load a table by globbing its directory.
+"""
+import importlib.util
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import DateTime, Float, Integer, and_, or_, select
+
+from models import db, Interview, InterviewResponse, MetricSample
+
+WATERMARK_FILE = '_watermarks.json'
+
+# table name -> (model, columns, watermark column). Tables keyed on ``id`` are
+# append-only; interviews are exported once, when they complete (end_time).
+EXPORT_TABLES = {
+    'interviews': (Interview, [
+        'id', 'user_id', 'topic', 'difficulty', 'num_interviewers', 'start_time', 'end_time',
+        'score', 'status', 'confidence_score', 'technical_score', 'communication_score',
+        'stress_level', 'engagement_score', 'duration',
+    ], 'end_time'),
+    'responses': (InterviewResponse, [
+        'id', 'interview_id', 'question_id', 'confidence_score', 'technical_score',
+        'communication_score', 'emotional_state', 'response_time', 'timestamp',
+    ], 'id'),
+    'metric_samples': (MetricSample, [
+        'id', 'interview_id', 'timestamp', 'confidence_score', 'stress_level', 'engagement_score',
+    ], 'id'),
+}
+
+
+def parquet_available() -> bool:
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def load_watermarks(out_dir: str) -> Dict[str, dict]:
+    path = os.path.join(out_dir, WATERMARK_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_watermarks(out_dir: str, watermarks: Dict[str, dict]):
+    # Write then rename, so a crash never leaves a half-written mark behind
+    path = os.path.join(out_dir, WATERMARK_FILE)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(watermarks, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def encode_mark(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def decode_mark(value, column):
+    if value is not None and isinstance(column.type, DateTime):
+        return datetime.fromisoformat(value)
+    return value
+
+
+def to_numpy(values: list, column) -> np.ndarray:
+    """One column of a chunk as a typed array; NULLs become NaN / NaT / ''."""
+    if isinstance(column.type, DateTime):
+        return np.array([v if v is not None else np.datetime64('NaT') for v in values], dtype='datetime64[us]')
+    if isinstance(column.type, Float):
+        return np.array([v if v is not None else np.nan for v in values], dtype=np.float64)
+    if isinstance(column.type, Integer):
+        if any(v is None for v in values):
+            return np.array([v if v is not None else np.nan for v in values], dtype=np.float64)
+        return np.array(values, dtype=np.int64)
+    return np.array(['' if v is None else str(v) for v in values], dtype=str)
+
+
+class ParquetChunkWriter:
+    """All chunks of one run in a single Parquet file, one row group each."""
+    extension = 'parquet'
+
+    def __init__(self, path: str):
+        self.path = path
+        self.writer = None
+
+    def write(self, columns: Dict[str, np.ndarray]):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.table({name: pa.array(values, from_pandas=True) for name, values in columns.items()})
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.path + '.tmp', table.schema, compression='zstd')
+        self.writer.write_table(table)
+
+    def close(self, committed: bool):
+        if self.writer is None:
+            return
+        self.writer.close()
+        if committed:
+            os.replace(self.path + '.tmp', self.path)
+        else:
+            os.remove(self.path + '.tmp')
+
+
+class NpzChunkWriter:
+    """Fallback without pyarrow: one compressed .npz per chunk."""
+    extension = 'npz'
+
+    def __init__(self, path: str):
+        self.base = path[:-len('.npz')]
+        self.parts: List[str] = []
+
+    def write(self, columns: Dict[str, np.ndarray]):
+        part = f'{self.base}-{len(self.parts):04d}.npz'
+        np.savez_compressed(part + '.tmp.npz', **columns)
+        self.parts.append(part)
+
+    def close(self, committed: bool):
+        for part in self.parts:
+            if committed:
+                os.replace(part + '.tmp.npz', part)
+            else:
+                os.remove(part + '.tmp.npz')
+
+
+def export_table(name: str, out_dir: str, mark: Optional[dict], chunk_size: int = 5000,
+                 fmt: str = 'parquet', settle_seconds: float = 60) -> dict:
+    """Export rows past ``mark`` for one table; returns the new mark and a row count.
+
+    The mark only moves once every chunk is written, so a failed run is
+    simply repeated. For timestamp watermarks, rows newer than
+    ``settle_seconds`` are left for the next run, so a transaction that
+    commits late cannot slip in behind the mark.
+    """
+    model, column_names, watermark = EXPORT_TABLES[name]
+    columns = [getattr(model, c) for c in column_names]
+    wm_column, id_column = getattr(model, watermark), model.id
+    last_wm = decode_mark((mark or {}).get('watermark'), wm_column)
+    last_id = (mark or {}).get('id', 0)
+
+    table_dir = os.path.join(out_dir, name)
+    os.makedirs(table_dir, exist_ok=True)
+    # Runs never overwrite each other's files: named by time and starting id
+    stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+    writer_cls = ParquetChunkWriter if fmt == 'parquet' else NpzChunkWriter
+    writer = writer_cls(os.path.join(table_dir, f'part-{stamp}-{last_id}.{writer_cls.extension}'))
+
+    upper = None
+    if isinstance(wm_column.type, DateTime):
+        upper = datetime.utcnow() - timedelta(seconds=settle_seconds)
+
+    rows_written = 0
+    committed = False
+    try:
+        while True:
+            query = select(*columns, wm_column, id_column).where(wm_column.isnot(None))
+            if watermark == 'id':
+                query = query.where(id_column > last_id).order_by(id_column)
+            else:
+                # Keyset on (watermark, id) so ties on the timestamp are not lost
+                if last_wm is not None:
+                    query = query.where(or_(wm_column > last_wm, and_(wm_column == last_wm, id_column > last_id)))
+                query = query.where(wm_column < upper).order_by(wm_column, id_column)
+            rows = db.session.execute(query.limit(chunk_size)).all()
+            if not rows:
+                break
+
+            writer.write({c: to_numpy([row[i] for row in rows], columns[i])
+                          for i, c in enumerate(column_names)})
+            rows_written += len(rows)
+            last_wm, last_id = rows[-1][-2], rows[-1][-1]
+            if len(rows) < chunk_size:
+                break
+        committed = True
+    finally:
+        writer.close(committed)
+        # Don't hold a read transaction open between runs
+        db.session.rollback()
+
+    return {'mark': {'watermark': encode_mark(last_wm), 'id': last_id}, 'rows': rows_written}
+
+
+def export_all(out_dir: str, tables: Optional[List[str]] = None, chunk_size: int = 5000,
+               fmt: Optional[str] = None, settle_seconds: float = 60) -> Dict[str, int]:
+    """Run an incremental export of ``tables`` (default: all). Needs an app context."""
+    if fmt is None:
+        fmt = 'parquet' if parquet_available() else 'npz'
+    elif fmt == 'parquet' and not parquet_available():
+        raise RuntimeError('Parquet export needs pyarrow; install it or use the npz format')
+
+    os.makedirs(out_dir, exist_ok=True)
+    watermarks = load_watermarks(out_dir)
+    counts = {}
+    for name in tables or list(EXPORT_TABLES):
+        started = time.perf_counter()
+        result = export_table(name, out_dir, watermarks.get(name), chunk_size, fmt, settle_seconds)
+        watermarks[name] = result['mark']
+        save_watermarks(out_dir, watermarks)
+        counts[name] = result['rows']
+        print(f"Exported {result['rows']} {name} rows in {time.perf_counter() - started:.2f}s ({fmt})")
+    return counts
@@ -0,0 +1,390 @@
+"""ASGI deployment mode for the interview API.
+
+A thin ASGI layer in front of the Flask app. The hot interview endpoints run
+natively on the event loop: frame analysis, metric updates and streamed
+recording uploads, plus a WebSocket that carries frames for an open
+interview room. CPU work (decoding, detection) goes to a thread pool sized
+to the cores, and blocking I/O (disk, database) to a separate pool. Idle
+connections then cost a coroutine instead of a worker thread, so one process
+can hold thousands of open interview rooms. Every other route is passed
+through to Flask unchanged.
+
+Run with:
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+
+APP_ROLE=web or APP_ROLE=worker serves only that role's native endpoints
+(see factory.py).
+"""
+import asyncio
+import hmac
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from asgiref.wsgi import WsgiToAsgi
+from itsdangerous import BadData, BadSignature, SignatureExpired, URLSafeTimedSerializer
+from werkzeug.http import parse_cookie, parse_options_header
+from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData
+
+import interview_services as services
+import recording_ingest
+from factory import create_app, role_from_env
+
+# Frames are small; anything bigger is a misbehaving client
+MAX_FRAME_BYTES = 4 * 1024 * 1024
+MAX_JSON_BYTES = 64 * 1024
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class InterviewASGI:
+    def __init__(self, flask_app, cpu_workers: Optional[int] = None, io_workers: int = 32):
+        self.flask_app = flask_app
+        self.wsgi = WsgiToAsgi(flask_app)
+        # OpenCV releases the GIL while decoding/detecting, so threads scale with cores
+        self.cpu_workers = cpu_workers or os.cpu_count() or 4
+        self.cpu_pool = ThreadPoolExecutor(self.cpu_workers, thread_name_prefix='analysis')
+        self.io_pool = ThreadPoolExecutor(io_workers, thread_name_prefix='io')
+        self.serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+        self.routes: Dict[Tuple[str, str], Callable] = {}
+        role = flask_app.config.get('APP_ROLE', 'all')
+        self.serves_analysis = role in ('worker', 'all')
+        if self.serves_analysis:
+            self.routes[('POST', '/api/analyze-expression')] = self.analyze_expression
+        if role in ('web', 'all'):
+            self.routes[('POST', '/api/update-metrics')] = self.update_metrics
+            self.routes[('POST', '/save_recording')] = self.save_recording
+        self.open_sockets = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] == 'websocket':
+            if scope['path'] == '/ws/interview' and self.serves_analysis:
+                return await self.interview_socket(scope, receive, send)
+            await send({'type': 'websocket.close', 'code': 4404})
+            return
+
+        handler = self.routes.get((scope['method'], scope['path']))
+        if handler is None:
+            return await self.wsgi(scope, receive, send)
+        try:
+            await handler(scope, receive, send)
+        except HttpError as e:
+            await self.send_json(send, {'error': e.message}, e.status)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                if self.serves_analysis and self.flask_app.config.get('VISION_PREWARM'):
+                    # Detectors are per thread, so warm every analysis thread
+                    await asyncio.gather(*[self.run_cpu(self.in_app_context, services.prewarm_vision)
+                                           for _ in range(self.cpu_workers)])
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if services.metrics_buffer is not None:
+                    await self.run_io(services.metrics_buffer.close)
+                self.cpu_pool.shutdown(wait=False)
+                self.io_pool.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    # Executors -------------------------------------------------------------
+
+    async def run_cpu(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.cpu_pool, fn, *args)
+
+    async def run_io(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.io_pool, fn, *args)
+
+    def in_app_context(self, fn, *args):
+        with self.flask_app.app_context():
+            return fn(*args)
+
+    # Request helpers -------------------------------------------------------
+
+    def load_session(self, scope) -> dict:
+        """Read Flask's signed session cookie (read-only)."""
+        headers = dict(scope.get('headers') or [])
+        cookies = parse_cookie(headers.get(b'cookie', b'').decode('latin-1'))
+        value = cookies.get(self.flask_app.config['SESSION_COOKIE_NAME'])
+        if not value:
+            return {}
+        max_age = int(self.flask_app.permanent_session_lifetime.total_seconds())
+        try:
+            return self.serializer.loads(value, max_age=max_age)
+        except BadSignature:
+            return {}
+
+    def require_user(self, scope) -> dict:
+        session = self.load_session(scope)
+        if 'user_id' not in session:
+            raise HttpError(401, 'Please log in first.')
+        return session
+
+    def check_csrf(self, scope, session: dict, form: Optional[dict] = None):
+        """What CSRFProtect checks on the Flask routes (flask_wtf.csrf.validate_csrf).
+
+        The signed token comes from the ``csrf_token`` form field or the
+        ``X-CSRFToken`` header. It must be unexpired and match the raw token
+        kept in the session.
+        """
+        config = self.flask_app.config
+        if not config.get('WTF_CSRF_ENABLED', True) or not config.get('WTF_CSRF_CHECK_DEFAULT', True):
+            return
+        field_name = config.get('WTF_CSRF_FIELD_NAME', 'csrf_token')
+        token = (form or {}).get(field_name)
+        if not token:
+            headers = dict(scope.get('headers') or [])
+            for header in config.get('WTF_CSRF_HEADERS', ['X-CSRFToken', 'X-CSRF-Token']):
+                token = headers.get(header.lower().encode('latin-1'), b'').decode('latin-1')
+                if token:
+                    break
+        if not token:
+            raise HttpError(400, 'The CSRF token is missing.')
+        if field_name not in session:
+            raise HttpError(400, 'The CSRF session token is missing.')
+        serializer = URLSafeTimedSerializer(config.get('WTF_CSRF_SECRET_KEY') or self.flask_app.secret_key,
+                                            salt='wtf-csrf-token')
+        try:
+            raw = serializer.loads(token, max_age=config.get('WTF_CSRF_TIME_LIMIT', 3600))
+        except SignatureExpired:
+            raise HttpError(400, 'The CSRF token has expired.')
+        except BadData:
+            raise HttpError(400, 'The CSRF token is invalid.')
+        if not hmac.compare_digest(session[field_name], raw):
+            raise HttpError(400, 'The CSRF tokens do not match.')
+
+    def check_origin(self, scope, session: dict):
+        """Refuse cross-site WebSocket handshakes.
+
+        Browsers send the page's Origin with every handshake but, unlike a
+        POST, no CSRF token, so the Origin must be this host or one of
+        WEBSOCKET_ALLOWED_ORIGINS. Clients that send no Origin are not
+        browsers and must pass a CSRF token in the query string instead.
+        """
+        headers = dict(scope.get('headers') or [])
+        origin = headers.get(b'origin', b'').decode('latin-1').rstrip('/').lower()
+        if not origin:
+            self.check_csrf(scope, session, dict(parse_qsl(scope.get('query_string', b'').decode('latin-1'))))
+            return
+        host = headers.get(b'host', b'').decode('latin-1').lower()
+        if host and urlsplit(origin).netloc == host:
+            return
+        if origin in self.flask_app.config.get('WEBSOCKET_ALLOWED_ORIGINS', ()):
+            return
+        raise HttpError(403, 'Origin not allowed.')
+
+    async def read_body(self, receive, limit: int) -> bytes:
+        chunks, size = [], 0
+        while True:
+            message = await receive()
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > limit:
+                raise HttpError(413, 'Request body too large')
+            chunks.append(chunk)
+            if not message.get('more_body'):
+                return b''.join(chunks)
+
+    async def iter_multipart(self, scope, receive):
+        """Yield multipart events incrementally as the body streams in.
+
+        Yields ('field', name, value), ('file_start', name, filename),
+        ('file_data', name, bytes) and ('file_end', name, None).
+        """
+        headers = dict(scope.get('headers') or [])
+        mimetype, options = parse_options_header(headers.get(b'content-type', b'').decode('latin-1'))
+        if mimetype != 'multipart/form-data' or 'boundary' not in options:
+            raise HttpError(400, 'Expected multipart/form-data')
+
+        decoder = MultipartDecoder(options['boundary'].encode('latin-1'))
+        current, buffer = None, bytearray()
+        more_body = True
+        while True:
+            event = decoder.next_event()
+            if isinstance(event, NeedData):
+                if not more_body:
+                    raise HttpError(400, 'Truncated multipart body')
+                message = await receive()
+                more_body = message.get('more_body', False)
+                decoder.receive_data(message.get('body', b''))
+                if not more_body:
+                    decoder.receive_data(None)
+            elif isinstance(event, Epilogue):
+                return
+            elif isinstance(event, Field):
+                current, buffer = ('field', event.name), bytearray()
+            elif isinstance(event, File):
+                current = ('file', event.name)
+                yield ('file_start', event.name, event.filename)
+            elif isinstance(event, Data):
+                if current[0] == 'field':
+                    buffer.extend(event.data)
+                    if len(buffer) > MAX_JSON_BYTES:
+                        raise HttpError(413, 'Form field too large')
+                    if not event.more_data:
+                        yield ('field', current[1], buffer.decode('utf-8', 'replace'))
+                else:
+                    if event.data:
+                        yield ('file_data', current[1], event.data)
+                    if not event.more_data:
+                        yield ('file_end', current[1], None)
+
+    async def send_json(self, send, payload, status: int = 200):
+        body = json.dumps(payload).encode()
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+    # Endpoints -------------------------------------------------------------
+
+    async def analyze_expression(self, scope, receive, send):
+        session = self.require_user(scope)
+        form = dict(parse_qsl(scope.get('query_string', b'').decode()))
+        fields = {}
+        frame_data = bytearray()
+        async for kind, name, value in self.iter_multipart(scope, receive):
+            if kind == 'field':
+                fields[name] = value
+            elif kind == 'file_data' and name == 'frame':
+                frame_data.extend(value)
+                if len(frame_data) > MAX_FRAME_BYTES:
+                    raise HttpError(413, 'Frame too large')
+        # Like CSRFProtect, only the form body (not the query string) carries the token
+        self.check_csrf(scope, session, fields)
+        form.update(fields)
+        if not frame_data:
+            raise HttpError(400, 'No frame provided')
+
+        # A cache miss loads the interview from the database, so keep it off the loop
+        analyzer = await self.run_io(
+            self.in_app_context, services.get_interview_analyzer,
+            session.get('interview_id') or ('user', session['user_id'])
+        )
+        result, status = await self.run_cpu(services.analyze_frame, analyzer, bytes(frame_data), form)
+        await self.send_json(send, result, status)
+
+    async def update_metrics(self, scope, receive, send):
+        session = self.require_user(scope)
+        self.check_csrf(scope, session)
+        interview_id = session.get('interview_id')
+        if not interview_id:
+            raise HttpError(400, 'No active interview')
+        try:
+            data = json.loads(await self.read_body(receive, MAX_JSON_BYTES) or b'{}')
+        except ValueError:
+            raise HttpError(400, 'Invalid JSON')
+        state = await self.run_io(self.in_app_context, services.owned_interview_state, interview_id, session['user_id'])
+        if state is None:
+            raise HttpError(404, 'Interview not found')
+        # Buffered writes return immediately; unbuffered ones commit on the I/O pool
+        await self.run_io(self.in_app_context, services.queue_metrics, interview_id, data)
+        await self.send_json(send, {'status': 'success'})
+
+    async def save_recording(self, scope, receive, send):
+        session = self.require_user(scope)
+        interview_id = session.get('interview_id')
+        if not interview_id:
+            raise HttpError(400, 'No active interview')
+
+        content_length = dict(scope.get('headers') or ()).get(b'content-length')
+        form, writer, upload, filename = {}, None, None, None
+        try:
+            # Stream the upload to disk chunk by chunk, checking size, duration
+            # and quotas as it arrives (see recording_ingest.py)
+            async for kind, name, value in self.iter_multipart(scope, receive):
+                if kind == 'field':
+                    form[name] = value
+                elif name != 'video':
+                    continue
+                elif kind == 'file_start':
+                    # Before anything is written: the token comes from the
+                    # header or a form field sent ahead of the file
+                    self.check_csrf(scope, session, form)
+                    writer = await self.run_io(
+                        self.in_app_context, recording_ingest.open_writer, session['user_id'], interview_id,
+                        int(content_length) if content_length else None
+                    )
+                elif kind == 'file_data':
+                    await self.run_io(writer.write, value)
+                elif kind == 'file_end':
+                    filename, filepath = await self.run_io(self.in_app_context, services.new_recording_path, session['user_id'])
+                    upload = await self.run_io(writer.commit, filepath)
+                    writer = None
+        except recording_ingest.RecordingRejected as e:
+            raise HttpError(e.code, e.description)
+        finally:
+            if writer is not None:
+                writer.close()
+
+        if filename is None:
+            self.check_csrf(scope, session, form)
+            raise HttpError(400, 'No video file')
+        result, status = await self.run_io(
+            self.in_app_context, services.record_response,
+            session['user_id'], interview_id, form.get('question_id', '0'), filename, upload
+        )
+        await self.send_json(send, result, status)
+
+    async def interview_socket(self, scope, receive, send):
+        """Frames for an open interview room over one WebSocket.
+
+        Binary messages are frames, answered with the same JSON as
+        /api/analyze-expression. Text messages are JSON options (mode,
+        frame_format, roi, ...) applied to the frames that follow.
+        """
+        session = self.load_session(scope)
+        message = await receive()
+        if message['type'] != 'websocket.connect':
+            return
+        if 'user_id' not in session:
+            await send({'type': 'websocket.close', 'code': 4401})
+            return
+        try:
+            self.check_origin(scope, session)
+        except HttpError:
+            await send({'type': 'websocket.close', 'code': 4403})
+            return
+        await send({'type': 'websocket.accept'})
+
+        # A cache miss loads the interview from the database, so keep it off the loop
+        analyzer = await self.run_io(
+            self.in_app_context, services.get_interview_analyzer,
+            session.get('interview_id') or ('user', session['user_id'])
+        )
+        form = {}
+        self.open_sockets += 1
+        try:
+            while True:
+                message = await receive()
+                if message['type'] == 'websocket.disconnect':
+                    return
+                if message.get('text') is not None:
+                    try:
+                        form.update({k: str(v) for k, v in json.loads(message['text']).items()})
+                    except (ValueError, AttributeError):
+                        await send({'type': 'websocket.send', 'text': json.dumps({'error': 'Invalid options'})})
+                    continue
+                frame_data = message.get('bytes') or b''
+                if not frame_data or len(frame_data) > MAX_FRAME_BYTES:
+                    await send({'type': 'websocket.send', 'text': json.dumps({'error': 'Invalid frame'})})
+                    continue
+                result, _ = await self.run_cpu(services.analyze_frame, analyzer, frame_data, form)
+                await send({'type': 'websocket.send', 'text': json.dumps(result)})
+        finally:
+            self.open_sockets -= 1
+
+
+application = InterviewASGI(create_app(role_from_env()))
@@ -0,0 +1,26 @@
+from functools import wraps
+
+from flask import current_app, flash, jsonify, redirect, request, session, url_for
+
+
+def login_required(f):
+    """Redirect to the login page (or 401 for API calls) without a session user."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if 'user_id' not in session:
+            if request.path.startswith('/api/'):
+                return jsonify({'error': 'Please log in first.'}), 401
+            flash('Please log in first.', 'error')
+            return redirect(url_for('web.login'))
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def is_operator():
+    """Whether the session user is one of the OPERATOR_USERS."""
+    operators = current_app.config['OPERATOR_USERS']
+    if not operators or 'user_id' not in session:
+        return False
+    from models import db, User
+    user = db.session.get(User, session['user_id'])
+    return user is not None and user.username in operators
@@ -0,0 +1,121 @@
+"""Compare face detector backends on the same fixtures.
+
+Reports per-backend throughput and agreement with a reference backend: the
+fraction of frames where both agree on whether a face is present, and the
+mean IoU of the largest face when both find one.
+
+Usage:
+    python -m benchmarks.detector_bench --fixtures path/to/frames --backends haar,lbp,yunet
+"""
+import argparse
+import glob
+import os
+import time
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from face_detectors import Box, DETECTOR_BACKENDS, create_detector
+
+
+def load_fixtures(path: Optional[str], count: int = 20) -> List[np.ndarray]:
+    if path:
+        frames = []
+        for pattern in ('*.jpg', '*.jpeg', '*.png'):
+            for filename in sorted(glob.glob(os.path.join(path, pattern))):
+                frame = cv2.imread(filename, cv2.IMREAD_COLOR)
+                if frame is not None:
+                    frames.append(frame)
+        if not frames:
+            raise SystemExit(f'No images found in {path}')
+        return frames
+
+    # Synthetic fallback: the same face-like blob the load harness sends,
+    # shifted around the frame so boxes differ between fixtures
+    from benchmarks.load_test import make_frame
+    base = cv2.imdecode(np.frombuffer(make_frame(), np.uint8), cv2.IMREAD_COLOR)
+    rng = np.random.default_rng(0)
+    frames = []
+    for _ in range(count):
+        dx, dy = rng.integers(-120, 120), rng.integers(-80, 80)
+        shifted = np.roll(base, (int(dy), int(dx)), axis=(0, 1))
+        noise = rng.normal(0, 6, shifted.shape)
+        frames.append(np.clip(shifted + noise, 0, 255).astype(np.uint8))
+    return frames
+
+
+def largest(boxes: List[Box]) -> Optional[Box]:
+    return max(boxes, key=lambda b: b[2] * b[3]) if boxes else None
+
+
+def iou(a: Box, b: Box) -> float:
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union > 0 else 0.0
+
+
+def bench_backend(name: str, frames: List[np.ndarray], repeats: int) -> Dict[str, object]:
+    detector = create_detector(name)
+    detector.detect(frames[0])  # warm up lazy allocations
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        results = [detector.detect(frame) for frame in frames]
+    elapsed = time.perf_counter() - start
+
+    return {
+        'fps': len(frames) * repeats / elapsed,
+        'ms_per_frame': elapsed * 1000 / (len(frames) * repeats),
+        'faces': results,
+    }
+
+
+def agreement(reference: List[List[Box]], candidate: List[List[Box]]) -> Dict[str, float]:
+    same_presence = 0
+    ious = []
+    for ref_boxes, cand_boxes in zip(reference, candidate):
+        same_presence += bool(ref_boxes) == bool(cand_boxes)
+        if ref_boxes and cand_boxes:
+            ious.append(iou(largest(ref_boxes), largest(cand_boxes)))
+    return {
+        'presence_agreement': same_presence / len(reference) if reference else 0.0,
+        'mean_iou': sum(ious) / len(ious) if ious else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark face detector backends')
+    parser.add_argument('--fixtures', help='Directory of frames (jpg/png); synthetic frames if omitted')
+    parser.add_argument('--backends', default=','.join(DETECTOR_BACKENDS))
+    parser.add_argument('--reference', default='haar', help='Backend used as ground truth for agreement')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--threads', type=int, default=1, help='cv2.setNumThreads value')
+    options = parser.parse_args(argv)
+
+    cv2.setNumThreads(options.threads)
+    frames = load_fixtures(options.fixtures)
+
+    results = {}
+    for name in [b.strip() for b in options.backends.split(',') if b.strip()]:
+        try:
+            results[name] = bench_backend(name, frames, options.repeats)
+        except (FileNotFoundError, cv2.error, AttributeError) as e:
+            print(f'Skipping {name}: {e}')
+
+    reference = results.get(options.reference)
+    print(f"\n{len(frames)} fixtures x {options.repeats} repeats, reference backend: {options.reference}")
+    print(f"{'backend':<10}{'fps':>10}{'ms/frame':>10}{'presence':>10}{'mean IoU':>10}")
+    for name, r in results.items():
+        agree = agreement(reference['faces'], r['faces']) if reference else {}
+        print(f"{name:<10}{r['fps']:>10.1f}{r['ms_per_frame']:>10.2f}"
+              f"{agree.get('presence_agreement', float('nan')):>10.2f}{agree.get('mean_iou', float('nan')):>10.2f}")
+    return results
+
+
+if __name__ == '__main__':
+    main()
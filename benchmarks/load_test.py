@@ -0,0 +1,374 @@
+"""Load-generation harness for the interview HTTP API.
+
+Drives simulated candidates through the real interview flow (signup, start
+interview, interview room, a stream of expression frames with metric updates,
+next question, recording upload, end interview) and reports throughput, latency percentiles
+and error rates per endpoint for each concurrency level.
+
+Usage:
+    python -m benchmarks.load_test --concurrency 1,4,16
+    python -m benchmarks.load_test --url http://localhost:5000 --concurrency 8
+"""
+import argparse
+import http.cookiejar
+import io
+import json
+import os
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+# Minimal EBML header (WebM doctype) so uploads look like real MediaRecorder blobs
+WEBM_HEADER = bytes([
+    0x1A, 0x45, 0xDF, 0xA3, 0x9F, 0x42, 0x86, 0x81, 0x01, 0x42, 0xF7, 0x81,
+    0x01, 0x42, 0xF2, 0x81, 0x04, 0x42, 0xF3, 0x81, 0x08, 0x42, 0x82, 0x84,
+    0x77, 0x65, 0x62, 0x6D, 0x42, 0x87, 0x81, 0x04, 0x42, 0x85, 0x81, 0x02,
+])
+
+# Hidden form field or <meta name="csrf-token" content="..."> in any page
+CSRF_RE = re.compile(rb'name="csrf[_-]token"[^>]*(?:value|content)="([^"]+)"')
+INTERVIEW_ID_RE = re.compile(r'/interview-room/(\d+)')
+
+
+def make_frame(width: int = 640, height: int = 480, quality: int = 80) -> bytes:
+    """Encode a synthetic webcam frame with a face-like blob as JPEG."""
+    import cv2
+    import numpy as np
+
+    frame = np.full((height, width, 3), 90, dtype=np.uint8)
+    cx, cy = width // 2, height // 2
+    fw, fh = width // 6, height // 4
+    cv2.ellipse(frame, (cx, cy), (fw, fh), 0, 0, 360, (170, 190, 220), -1)
+    cv2.circle(frame, (cx - fw // 2, cy - fh // 4), fw // 6, (40, 40, 40), -1)
+    cv2.circle(frame, (cx + fw // 2, cy - fh // 4), fw // 6, (40, 40, 40), -1)
+    cv2.ellipse(frame, (cx, cy + fh // 2), (fw // 2, fh // 6), 0, 0, 180, (60, 60, 140), 3)
+    ok, buf = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise RuntimeError('Could not encode synthetic frame')
+    return buf.tobytes()
+
+
+def make_webm(size: int) -> bytes:
+    """Build a synthetic WebM blob of roughly ``size`` bytes."""
+    return WEBM_HEADER + os.urandom(max(0, size - len(WEBM_HEADER)))
+
+
+class Response:
+    def __init__(self, status: int, body: bytes, location: Optional[str] = None):
+        self.status = status
+        self.body = body
+        self.location = location
+
+    def json(self) -> dict:
+        try:
+            return json.loads(self.body or b'{}')
+        except ValueError:
+            return {}
+
+
+class InProcessClient:
+    """Drives the Flask app through its test client (no sockets involved)."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method: str, path: str, form: Optional[dict] = None,
+                files: Optional[Dict[str, Tuple[str, bytes, str]]] = None,
+                json_body: Optional[dict] = None) -> Response:
+        kwargs = {}
+        if files:
+            data = dict(form or {})
+            for field, (filename, payload, _mime) in files.items():
+                data[field] = (io.BytesIO(payload), filename)
+            kwargs['data'] = data
+            kwargs['content_type'] = 'multipart/form-data'
+        elif form is not None:
+            kwargs['data'] = form
+        elif json_body is not None:
+            kwargs['json'] = json_body
+        resp = self.client.open(path, method=method, **kwargs)
+        return Response(resp.status_code, resp.get_data(), resp.headers.get('Location'))
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpClient:
+    """Drives a running server over HTTP, keeping cookies and CSRF tokens."""
+
+    def __init__(self, base_url: str, timeout: float = 30.0):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.csrf_token = None
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()),
+            _NoRedirect(),
+        )
+
+    def _encode_multipart(self, form: dict, files: dict) -> Tuple[bytes, str]:
+        boundary = uuid.uuid4().hex
+        parts = []
+        for name, value in form.items():
+            parts.append(
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+            )
+        for name, (filename, payload, mime) in files.items():
+            parts.append(
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                f'Content-Type: {mime}\r\n\r\n'.encode() + payload + b'\r\n'
+            )
+        parts.append(f'--{boundary}--\r\n'.encode())
+        return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+    def request(self, method: str, path: str, form: Optional[dict] = None,
+                files: Optional[Dict[str, Tuple[str, bytes, str]]] = None,
+                json_body: Optional[dict] = None) -> Response:
+        headers = {}
+        body = None
+        if self.csrf_token:
+            headers['X-CSRFToken'] = self.csrf_token
+        if files:
+            body, headers['Content-Type'] = self._encode_multipart(form or {}, files)
+        elif form is not None:
+            if self.csrf_token:
+                form = dict(form, csrf_token=self.csrf_token)
+            body = urllib.parse.urlencode(form).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        elif json_body is not None:
+            body = json.dumps(json_body).encode()
+            headers['Content-Type'] = 'application/json'
+
+        req = urllib.request.Request(self.base_url + path, data=body, headers=headers, method=method)
+        try:
+            with self.opener.open(req, timeout=self.timeout) as resp:
+                payload = resp.read()
+                result = Response(resp.status, payload, resp.headers.get('Location'))
+        except urllib.error.HTTPError as e:
+            result = Response(e.code, e.read(), e.headers.get('Location'))
+
+        match = CSRF_RE.search(result.body)
+        if match:
+            self.csrf_token = match.group(1).decode()
+        return result
+
+
+class EndpointStats:
+    """Thread-safe latency/error accumulator keyed by endpoint name."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def record(self, endpoint: str, latency: float, ok: bool):
+        with self.lock:
+            self.latencies.setdefault(endpoint, []).append(latency)
+            if not ok:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def summary(self, wall_time: float) -> Dict[str, dict]:
+        result = {}
+        for endpoint, values in self.latencies.items():
+            values = sorted(values)
+            count = len(values)
+            result[endpoint] = {
+                'requests': count,
+                'throughput_rps': count / wall_time if wall_time > 0 else 0.0,
+                'p50_ms': percentile(values, 50) * 1000,
+                'p90_ms': percentile(values, 90) * 1000,
+                'p95_ms': percentile(values, 95) * 1000,
+                'p99_ms': percentile(values, 99) * 1000,
+                'max_ms': values[-1] * 1000,
+                'error_rate': self.errors.get(endpoint, 0) / count,
+            }
+        return result
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+class Candidate:
+    """One simulated candidate walking through a full interview."""
+
+    def __init__(self, client, stats: EndpointStats, options: argparse.Namespace,
+                 frame: bytes, recording: bytes):
+        self.client = client
+        self.stats = stats
+        self.options = options
+        self.frame = frame
+        self.recording = recording
+
+    def call(self, endpoint: str, method: str, path: str, ok_statuses=(200,), check=None, **kwargs) -> Response:
+        """Make a request and record it; ``check(resp)`` can fail a response with an OK status."""
+        start = time.perf_counter()
+        try:
+            resp = self.client.request(method, path, **kwargs)
+        except Exception:
+            self.stats.record(endpoint, time.perf_counter() - start, False)
+            raise
+        ok = resp.status in ok_statuses and (check is None or bool(check(resp)))
+        self.stats.record(endpoint, time.perf_counter() - start, ok)
+        return resp
+
+    def run(self):
+        username = f'load_{uuid.uuid4().hex[:12]}'
+        # Every POST needs a CSRF token; the HTTP client picks one up from the form
+        self.call('signup', 'GET', '/signup')
+        self.call('signup', 'POST', '/signup', ok_statuses=(200, 302), form={
+            'username': username,
+            'email': f'{username}@example.com',
+            'password': 'load-test',
+            'full_name': 'Load Test',
+        })
+
+        self.call('start_interview', 'GET', '/start-interview')
+        # Only a redirect to the new room counts; anything else (no questions for
+        # the topic, a rejected form) fails the candidate instead of quietly
+        # lowering the load
+        resp = self.call('start_interview', 'POST', '/start-interview', ok_statuses=(302,),
+                         check=lambda r: INTERVIEW_ID_RE.search(r.location or ''), form={
+            'topic': self.options.topic,
+            'difficulty': self.options.difficulty,
+            'num_interviewers': '1',
+        })
+        match = INTERVIEW_ID_RE.search(resp.location or '')
+        if not match:
+            raise RuntimeError(f'start_interview returned no interview '
+                               f'(status {resp.status}, location {resp.location or "none"})')
+        interview_id = int(match.group(1))
+
+        self.call('interview_room', 'GET', f'/interview-room/{interview_id}')
+
+        frame_interval = 1.0 / self.options.fps if self.options.fps > 0 else 0.0
+        for _ in range(self.options.questions):
+            resp = self.call('next_question', 'GET', f'/api/next-question/{interview_id}')
+            data = resp.json()
+            if data.get('completed') or 'id' not in data:
+                break
+            question_id = str(data['id'])
+
+            next_tick = time.perf_counter()
+            for _ in range(self.options.frames):
+                resp = self.call('analyze_expression', 'POST', '/api/analyze-expression',
+                                 files={'frame': ('frame.jpg', self.frame, 'image/jpeg')})
+                if self.options.metrics:
+                    metrics = resp.json().get('metrics', {})
+                    self.call('update_metrics', 'POST', '/api/update-metrics', json_body={
+                        'confidence': metrics.get('confidence', 0.5),
+                        'stress': metrics.get('stress_level', 0.5),
+                        'engagement': metrics.get('engagement', 0.5),
+                    })
+                next_tick += frame_interval
+                delay = next_tick - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+            self.call('save_recording', 'POST', '/save_recording',
+                      form={'question_id': question_id},
+                      files={'video': ('response.webm', self.recording, 'video/webm')})
+
+        self.call('end_interview', 'POST', '/api/end-interview', json_body={})
+
+
+def build_client_factory(options: argparse.Namespace):
+    if options.url:
+        return lambda: HttpClient(options.url)
+
+    from app import app
+    app.config['WTF_CSRF_ENABLED'] = False
+    return lambda: InProcessClient(app)
+
+
+def run_level(concurrency: int, options: argparse.Namespace, client_factory,
+              frame: bytes, recording: bytes) -> dict:
+    stats = EndpointStats()
+    failures = []
+
+    def worker():
+        for _ in range(options.interviews):
+            try:
+                Candidate(client_factory(), stats, options, frame, recording).run()
+            except Exception as e:
+                failures.append(str(e))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for f in [pool.submit(worker) for _ in range(concurrency)]:
+            f.result()
+    wall_time = time.perf_counter() - start
+
+    return {
+        'concurrency': concurrency,
+        'wall_time_s': wall_time,
+        'candidate_failures': len(failures),
+        'failure_reasons': {reason: failures.count(reason) for reason in sorted(set(failures))},
+        'endpoints': stats.summary(wall_time),
+    }
+
+
+def print_report(results: List[dict]):
+    header = f"{'endpoint':<20}{'reqs':>7}{'rps':>9}{'p50ms':>9}{'p90ms':>9}{'p95ms':>9}{'p99ms':>9}{'maxms':>9}{'err%':>7}"
+    for level in results:
+        print(f"\n== concurrency {level['concurrency']} "
+              f"({level['wall_time_s']:.1f}s, {level['candidate_failures']} failed candidates) ==")
+        for reason, count in level['failure_reasons'].items():
+            print(f"  {count} x {reason}")
+        print(header)
+        for endpoint, s in sorted(level['endpoints'].items()):
+            print(f"{endpoint:<20}{s['requests']:>7}{s['throughput_rps']:>9.1f}{s['p50_ms']:>9.1f}"
+                  f"{s['p90_ms']:>9.1f}{s['p95_ms']:>9.1f}{s['p99_ms']:>9.1f}{s['max_ms']:>9.1f}{s['error_rate'] * 100:>7.1f}")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Load test the interview HTTP API')
+    parser.add_argument('--url', help='Base URL of a running server; omit to drive the app in-process')
+    parser.add_argument('--concurrency', default='1,4,16',
+                        help='Comma separated list of concurrent candidate counts')
+    parser.add_argument('--interviews', type=int, default=1, help='Interviews per simulated candidate')
+    parser.add_argument('--questions', type=int, default=3, help='Questions answered per interview')
+    parser.add_argument('--frames', type=int, default=30, help='Expression frames sent per question')
+    parser.add_argument('--fps', type=float, default=5.0, help='Frame rate of analyze-expression calls')
+    parser.add_argument('--no-metrics', dest='metrics', action='store_false',
+                        help='Do not post update-metrics after every analyzed frame')
+    parser.add_argument('--frame-size', default='640x480', help='Synthetic frame resolution WxH')
+    parser.add_argument('--recording-kb', type=int, default=512, help='Size of each synthetic recording')
+    parser.add_argument('--topic', default='data_structures_algorithms')
+    parser.add_argument('--difficulty', default='easy')
+    parser.add_argument('--json', dest='json_path', help='Also write the results to this JSON file')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    width, height = (int(v) for v in options.frame_size.lower().split('x'))
+    frame = make_frame(width, height)
+    recording = make_webm(options.recording_kb * 1024)
+    client_factory = build_client_factory(options)
+
+    results = []
+    for concurrency in (int(c) for c in options.concurrency.split(',') if c.strip()):
+        results.append(run_level(concurrency, options, client_factory, frame, recording))
+    print_report(results)
+
+    if options.json_path:
+        with open(options.json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == '__main__':
+    main()
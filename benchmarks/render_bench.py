@@ -0,0 +1,114 @@
+"""Measure interview room render times with and without template caching.
+
+Reports:
+  * cold load: parsing + compiling the template in a fresh environment,
+    without and with the on-disk bytecode cache;
+  * warm render: ``render_template`` (context processors included) per
+    request, without and with ``{% cache %}`` fragments.
+
+Fixtures are plain objects, so the numbers cover templating only, not the
+queries in the view.
+
+Usage:
+    python -m benchmarks.render_bench --template interview_room.html --renders 500
+"""
+import argparse
+import shutil
+import tempfile
+import time
+from types import SimpleNamespace
+from typing import Dict
+
+from jinja2 import FileSystemBytecodeCache
+from flask import render_template
+
+
+def fixture_context(num_questions: int = 10) -> dict:
+    questions = [{
+        'id': i,
+        'content': f'Sample question {i}: explain the trade-offs of approach {i}.',
+        'video_path': f'videos/question_{i}.mp4',
+        'order': i,
+    } for i in range(1, num_questions + 1)]
+    interviewer = SimpleNamespace(
+        id=1, name='Dr. Alex Kumar', personality='analytical', avatar_type='technical',
+        specialization='python', model_path='interviewers/dsa_expert.jpg',
+        description='Algorithm Specialist with 10+ years at top tech companies'
+    )
+    interview = SimpleNamespace(
+        id=1, user_id=1, topic='python', difficulty='medium', current_question=0,
+        num_interviewers=1, confidence_score=0.0, stress_level=0.0, engagement_score=0.0,
+        questions=[SimpleNamespace(**q) for q in questions]
+    )
+    return {
+        'interview': interview,
+        'interviewer': interviewer,
+        'current_question': SimpleNamespace(**questions[0]),
+        'questions': questions,
+    }
+
+
+def cold_load(app, template: str, repeats: int, bytecode_dir: str = None) -> float:
+    """Mean ms to load ``template`` into a fresh environment."""
+    total = 0.0
+    for _ in range(repeats):
+        env = app.jinja_env.overlay(cache_size=0)
+        env.bytecode_cache = FileSystemBytecodeCache(bytecode_dir) if bytecode_dir else None
+        start = time.perf_counter()
+        env.get_template(template)
+        total += time.perf_counter() - start
+    return total * 1000 / repeats
+
+
+def warm_render(app, template: str, context: dict, renders: int, fragment_cache) -> float:
+    """Mean ms per ``render_template`` call with the given fragment cache."""
+    previous = app.jinja_env.fragment_cache
+    app.jinja_env.fragment_cache = fragment_cache
+    try:
+        with app.test_request_context('/'):
+            render_template(template, **context)  # compile and fill caches
+            start = time.perf_counter()
+            for _ in range(renders):
+                render_template(template, **context)
+            elapsed = time.perf_counter() - start
+    finally:
+        app.jinja_env.fragment_cache = previous
+    return elapsed * 1000 / renders
+
+
+def main(argv=None) -> Dict[str, float]:
+    parser = argparse.ArgumentParser(description='Benchmark interview room template rendering')
+    parser.add_argument('--template', default='interview_room.html')
+    parser.add_argument('--renders', type=int, default=500)
+    parser.add_argument('--cold-repeats', type=int, default=20)
+    parser.add_argument('--questions', type=int, default=10)
+    options = parser.parse_args(argv)
+
+    from app import app
+    from template_cache import FragmentCache
+
+    context = fixture_context(options.questions)
+    bytecode_dir = tempfile.mkdtemp(prefix='jinja_bench_')
+    try:
+        cold_load(app, options.template, 1, bytecode_dir)  # populate the disk cache
+        results = {
+            'cold_ms': cold_load(app, options.template, options.cold_repeats),
+            'cold_bytecode_ms': cold_load(app, options.template, options.cold_repeats, bytecode_dir),
+            'render_ms': warm_render(app, options.template, context, options.renders, None),
+            'render_fragments_ms': warm_render(app, options.template, context, options.renders, FragmentCache()),
+        }
+    finally:
+        shutil.rmtree(bytecode_dir, ignore_errors=True)
+
+    print(f"\n{options.template}: {options.cold_repeats} cold loads, {options.renders} renders")
+    print(f"{'':<28}{'before':>10}{'after':>10}{'speedup':>10}")
+    for label, before, after in (
+        ('cold load (ms)', results['cold_ms'], results['cold_bytecode_ms']),
+        ('render (ms)', results['render_ms'], results['render_fragments_ms']),
+    ):
+        print(f"{label:<28}{before:>10.3f}{after:>10.3f}{before / after if after else float('nan'):>9.1f}x")
+    return results
+
+
+if __name__ == '__main__':
+    main()
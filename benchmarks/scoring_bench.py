@@ -0,0 +1,64 @@
+"""Per-dict get_interview_metrics against the vectorized batch scoring.
+
+Scores the same random expression timeline both ways and reports rows per
+second and the largest difference between the two.
+
+Usage:
+    python -m benchmarks.scoring_bench --rows 1000000 --dtype float32
+"""
+import argparse
+import time
+
+import numpy as np
+
+from scoring import DEFAULT_MODEL, EXPRESSION_CHANNELS, METRIC_NAMES
+
+
+def legacy_metrics(expressions):
+    # The scalar arithmetic get_interview_metrics used before the weight matrix
+    confidence_score = expressions['confident'] * 0.6 + expressions['happy'] * 0.2 + (1 - expressions['stressed']) * 0.2
+    stress_level = expressions['stressed'] * 0.7 + expressions['confused'] * 0.3
+    engagement_score = (1 - expressions['neutral']) * 0.5 + expressions['confident'] * 0.3 + expressions['happy'] * 0.2
+    return {
+        'confidence': min(1.0, max(0.0, confidence_score)),
+        'stress_level': min(1.0, max(0.0, stress_level)),
+        'engagement': min(1.0, max(0.0, engagement_score))
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark scalar vs batch interview scoring')
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--scalar-rows', type=int, default=100000, help='Rows scored one dict at a time')
+    parser.add_argument('--dtype', choices=['float32', 'float64'], default='float64')
+    parser.add_argument('--repeat', type=int, default=5, help='Report the best of this many runs per path')
+    options = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    scores = rng.random((options.rows, len(EXPRESSION_CHANNELS))).astype(options.dtype)
+    dicts = [dict(zip(EXPRESSION_CHANNELS, map(float, row))) for row in scores[:options.scalar_rows]]
+
+    def best_of(run):
+        seconds = []
+        for _ in range(max(1, options.repeat)):
+            start = time.perf_counter()
+            result = run()
+            seconds.append(time.perf_counter() - start)
+        return result, min(seconds)
+
+    legacy, legacy_seconds = best_of(lambda: [legacy_metrics(d) for d in dicts])
+    scalar, scalar_seconds = best_of(lambda: [DEFAULT_MODEL.score(d) for d in dicts])
+    batch, batch_seconds = best_of(lambda: DEFAULT_MODEL.score_batch(scores))
+
+    n = len(dicts)
+    expected = np.array([[row[m] for m in METRIC_NAMES] for row in legacy])
+    scalar_diff = np.abs(np.array([[row[m] for m in METRIC_NAMES] for row in scalar]) - expected).max()
+    batch_diff = np.abs(batch[:n].astype(np.float64) - expected).max()
+    print(f"{'path':<12}{'rows':>10}{'rows/s':>14}{'max |diff|':>12}")
+    print(f"{'legacy':<12}{n:>10}{n / legacy_seconds:>14,.0f}{0.0:>12.1e}")
+    print(f"{'scalar':<12}{n:>10}{n / scalar_seconds:>14,.0f}{scalar_diff:>12.1e}")
+    print(f"{'batch':<12}{options.rows:>10}{options.rows / batch_seconds:>14,.0f}{batch_diff:>12.1e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""Report cold-start import time for the web app.
+
+Runs ``python -X importtime -c 'import <module>'`` (or builds the app for
+each ``--roles`` entry) in a fresh interpreter, parses the per-module report
+and prints the wall time, peak RSS, the slowest top-level imports and
+whether the vision stack (cv2, numpy) was loaded. ``--budget-ms`` turns it
+into a check that fails when startup regresses.
+
+Usage:
+    python -m benchmarks.startup_bench --module app --repeats 5 --budget-ms 1500
+    python -m benchmarks.startup_bench --roles web,worker,admin
+    python -m benchmarks.startup_bench --roles worker --prewarm
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+VISION_MODULES = ('cv2', 'numpy')
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, bool]]:
+    """(module, self_us, cumulative_us, top_level) per line of -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # header line
+        name = parts[2].rstrip()
+        # Nested imports are indented by two spaces per level
+        top_level = len(name) - len(name.lstrip()) <= 1
+        rows.append((name.strip(), int(parts[0]), int(parts[1]), top_level))
+    return rows
+
+
+def measure(code: str, prewarm: bool) -> Dict[str, object]:
+    """Run ``code`` under -X importtime in a fresh interpreter."""
+    # Peak RSS of the child, in KiB on Linux
+    code += '; import resource; print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)'
+    env = dict(os.environ, VISION_PREWARM='1' if prewarm else '0')
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                          capture_output=True, text=True, env=env)
+    wall_ms = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        raise SystemExit(f'{code} failed:\n{proc.stderr[-2000:]}')
+
+    rows = parse_importtime(proc.stderr)
+    loaded = {name for name, _, _, _ in rows}
+    return {
+        'wall_ms': wall_ms,
+        'import_ms': sum(cum for _, _, cum, top in rows if top) / 1000,
+        'rss_mb': int(proc.stdout.split()[-1]) / 1024,
+        'top': sorted(((name, cum) for name, _, cum, top in rows if top), key=lambda r: -r[1]),
+        'vision_loaded': [m for m in VISION_MODULES if m in loaded],
+    }
+
+
+def summarize(runs: List[Dict[str, object]]) -> Dict[str, object]:
+    return {
+        'wall_ms': statistics.median(r['wall_ms'] for r in runs),
+        'import_ms': statistics.median(r['import_ms'] for r in runs),
+        'rss_mb': statistics.median(r['rss_mb'] for r in runs),
+        'top': runs[-1]['top'],
+        'vision_loaded': runs[-1]['vision_loaded'],
+    }
+
+
+def main(argv=None) -> Dict[str, object]:
+    parser = argparse.ArgumentParser(description='Measure cold-start import time')
+    parser.add_argument('--module', default='app')
+    parser.add_argument('--roles', help='Comma-separated app roles to compare (web,worker,admin,all)')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--prewarm', action='store_true', help='Start with VISION_PREWARM=1')
+    parser.add_argument('--budget-ms', type=float, help='Exit non-zero if median wall time exceeds this')
+    options = parser.parse_args(argv)
+
+    if options.roles:
+        targets = {role: f"import factory; factory.create_app('{role}')"
+                   for role in options.roles.split(',') if role}
+    else:
+        targets = {options.module: f'import {options.module}'}
+    results = {name: summarize([measure(code, options.prewarm) for _ in range(options.repeats)])
+               for name, code in targets.items()}
+
+    print(f"\n{options.repeats} runs each{' with VISION_PREWARM=1' if options.prewarm else ''}")
+    print(f"{'target':<12}{'wall ms':>10}{'import ms':>11}{'peak RSS MB':>13}  vision stack")
+    for name, r in results.items():
+        print(f"{name:<12}{r['wall_ms']:>10.1f}{r['import_ms']:>11.1f}{r['rss_mb']:>13.1f}  "
+              f"{', '.join(r['vision_loaded']) or 'no'}")
+
+    if len(results) == 1:
+        print(f"\n{'top-level import':<40}{'cumulative ms':>14}")
+        for name, cum in next(iter(results.values()))['top'][:options.top]:
+            print(f"{name:<40}{cum / 1000:>14.1f}")
+
+    failed = [name for name, r in results.items()
+              if options.budget_ms is not None and r['wall_ms'] > options.budget_ms]
+    for name in failed:
+        print(f"\nFAIL: {name} took {results[name]['wall_ms']:.1f} ms, over the {options.budget_ms:.0f} ms budget")
+    if failed:
+        sys.exit(1)
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+import os
+
+
+def configure_app(app, overrides=None):
+    """Load settings from the environment, then apply ``overrides``."""
+    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your-secret-key-here')
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///interview.db')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['UPLOAD_FOLDER'] = os.environ.get('UPLOAD_FOLDER', 'recordings')
+    # Metric updates are coalesced and written every N ms (0 = commit per request)
+    app.config['METRICS_FLUSH_INTERVAL_MS'] = int(os.environ.get('METRICS_FLUSH_INTERVAL_MS', 250))
+    # Face detector backend: 'haar', 'lbp' or 'yunet' (see face_detectors.py)
+    app.config['FACE_DETECTOR'] = os.environ.get('FACE_DETECTOR', 'haar')
+    # Mean grey-level change below which a frame reuses the last analysis (0 disables gating)
+    app.config['FRAME_GATE_THRESHOLD'] = float(os.environ.get('FRAME_GATE_THRESHOLD', 4.0))
+    app.config['MAX_ACTIVE_ANALYZERS'] = 1000
+    # Optional SQLite file backing the in-process interview session cache, so worker
+    # processes on one host share it and it survives restarts (None = memory only)
+    app.config['SESSION_STORE_PATH'] = os.environ.get('SESSION_STORE_PATH')
+    # Full frames wider than twice this are JPEG-decoded at 1/2, 1/4 or 1/8 size (0 disables)
+    app.config['DETECTION_WIDTH'] = int(os.environ.get('DETECTION_WIDTH', 320))
+    # 'single' analyzes the largest face, 'multi' tracks every face (panel interviews)
+    app.config['ANALYSIS_MODE'] = os.environ.get('ANALYSIS_MODE', 'single')
+    # Client-side cropping: face width to scale crops to, how often a full frame is
+    # requested for re-detection, and the preferred crop format ('gray8' or 'jpeg-crop')
+    app.config['TRANSPORT_FACE_WIDTH'] = 128
+    app.config['TRANSPORT_FULL_FRAME_INTERVAL'] = 30
+    app.config['TRANSPORT_FORMAT'] = os.environ.get('TRANSPORT_FORMAT', 'gray8')
+    # Load OpenCV and the detector models at startup instead of on the first frame
+    app.config['VISION_PREWARM'] = os.environ.get('VISION_PREWARM', '0') == '1'
+    # Compiled Jinja templates are cached here so cold workers skip compilation ('' disables)
+    app.config['JINJA_BYTECODE_CACHE_DIR'] = os.environ.get(
+        'JINJA_BYTECODE_CACHE_DIR', os.path.join(app.instance_path, 'jinja_cache'))
+    # Seconds a {% cache %} fragment lives before it is re-rendered (0 disables fragment caching)
+    app.config['FRAGMENT_CACHE_TTL'] = int(os.environ.get('FRAGMENT_CACHE_TTL', 300))
+    # Question bank page size, and the TF-IDF cosine similarity at which add_question
+    # warns about a near-duplicate (0 disables the check)
+    app.config['QUESTIONS_PER_PAGE'] = 50
+    app.config['QUESTION_DUPLICATE_THRESHOLD'] = float(os.environ.get('QUESTION_DUPLICATE_THRESHOLD', 0.8))
+    # Background transcoding of interviewer videos into smaller renditions: parallel
+    # jobs per web process (0 leaves it to the transcode-videos command) and queue size
+    app.config['TRANSCODE_WORKERS'] = int(os.environ.get('TRANSCODE_WORKERS', 1))
+    app.config['TRANSCODE_MAX_PENDING'] = int(os.environ.get('TRANSCODE_MAX_PENDING', 16))
+    # Threads per web process reading the next question's media ahead (0 disables warming)
+    app.config['PREFETCH_WARM_WORKERS'] = int(os.environ.get('PREFETCH_WARM_WORKERS', 2))
+    # Recording uploads: per-file size and duration caps, and per-user / per-interview
+    # storage quotas, all enforced while the upload streams in (recording_ingest.py)
+    app.config['RECORDING_MAX_MB'] = int(os.environ.get('RECORDING_MAX_MB', 200))
+    app.config['RECORDING_MAX_SECONDS'] = float(os.environ.get('RECORDING_MAX_SECONDS', 900))
+    app.config['RECORDING_USER_QUOTA_MB'] = int(os.environ.get('RECORDING_USER_QUOTA_MB', 2048))
+    app.config['RECORDING_INTERVIEW_QUOTA_MB'] = int(os.environ.get('RECORDING_INTERVIEW_QUOTA_MB', 1024))
+    # Poster/sprite previews of saved recordings: background jobs per web process
+    # (0 leaves it to the build-previews command) and frames sampled per recording
+    app.config['PREVIEW_WORKERS'] = int(os.environ.get('PREVIEW_WORKERS', 1))
+    app.config['PREVIEW_FRAMES'] = int(os.environ.get('PREVIEW_FRAMES', 12))
+    # Recordings replayed with the metrics overlay: render jobs per web process (0 disables
+    # rendering), where the annotated videos are cached and how large that cache may grow
+    app.config['OVERLAY_WORKERS'] = int(os.environ.get('OVERLAY_WORKERS', 1))
+    app.config['OVERLAY_CACHE_DIR'] = os.environ.get('OVERLAY_CACHE_DIR', 'overlay_cache')
+    app.config['OVERLAY_CACHE_MB'] = int(os.environ.get('OVERLAY_CACHE_MB', 2048))
+    # Recording lifecycle (recording_lifecycle.py): delete recordings of interviews ended /
+    # abandoned this many days ago (0 keeps them), re-encode ended ones after N days at a
+    # lower bitrate, and reclaim unreferenced files older than the grace period. The web
+    # process sweeps every N minutes (0 leaves it to the sweep-recordings command)
+    app.config['RECORDING_RETENTION_DAYS'] = int(os.environ.get('RECORDING_RETENTION_DAYS', 365))
+    app.config['RECORDING_ABANDONED_DAYS'] = int(os.environ.get('RECORDING_ABANDONED_DAYS', 30))
+    app.config['RECORDING_COMPACT_AFTER_DAYS'] = int(os.environ.get('RECORDING_COMPACT_AFTER_DAYS', 30))
+    app.config['RECORDING_COMPACT_KBPS'] = int(os.environ.get('RECORDING_COMPACT_KBPS', 250))
+    app.config['RECORDING_MAX_COMPACTIONS_PER_SWEEP'] = int(os.environ.get('RECORDING_MAX_COMPACTIONS_PER_SWEEP', 20))
+    app.config['RECORDING_GC_GRACE_MINUTES'] = int(os.environ.get('RECORDING_GC_GRACE_MINUTES', 60))
+    app.config['RECORDING_SWEEP_INTERVAL_MINUTES'] = int(os.environ.get('RECORDING_SWEEP_INTERVAL_MINUTES', 60))
+    app.config['RECORDING_SWEEP_MAX_FILES_PER_SECOND'] = int(os.environ.get('RECORDING_SWEEP_MAX_FILES_PER_SECOND', 200))
+    # Usernames (comma separated) that may see site-wide operational data such as
+    # /api/recording-storage; everyone else only sees their own figures
+    app.config['OPERATOR_USERS'] = {name.strip() for name in os.environ.get('OPERATOR_USERS', '').split(',')
+                                    if name.strip()}
+    # Page origins (scheme://host[:port]) besides the serving host itself that may open
+    # /ws/interview, e.g. when the worker role runs on its own host name
+    app.config['WEBSOCKET_ALLOWED_ORIGINS'] = {
+        origin.strip().rstrip('/').lower()
+        for origin in os.environ.get('WEBSOCKET_ALLOWED_ORIGINS', '').split(',') if origin.strip()
+    }
+    # Hard cap on any request body; recording uploads get their own limits above
+    app.config['MAX_CONTENT_LENGTH'] = (app.config['RECORDING_MAX_MB'] + 1) * 1024 * 1024
+    if overrides:
+        app.config.update(overrides)
@@ -0,0 +1 @@
+# Keeps the repository root importable when pytest is run as plain ``pytest``
@@ -0,0 +1,184 @@
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+Box = Tuple[int, int, int, int]
+
+# Model files that are not shipped with opencv-python live here (see models/README.md)
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+
+# Where ``flask fetch-models`` downloads them from
+MODEL_SOURCES = {
+    'face_detection_yunet_2023mar.onnx':
+        'https://github.com/opencv/opencv_zoo/raw/main/models/face_detection_yunet/face_detection_yunet_2023mar.onnx',
+    'lbpcascade_frontalface_improved.xml':
+        'https://raw.githubusercontent.com/opencv/opencv/4.x/data/lbpcascades/lbpcascade_frontalface_improved.xml',
+    'lbfmodel.yaml': 'https://raw.githubusercontent.com/kurnianggoro/GSOC2017/master/data/lbfmodel.yaml',
+}
+
+
+def fetch_model(name: str, force: bool = False) -> Tuple[str, bool]:
+    """Download ``name`` from MODEL_SOURCES into MODELS_DIR. Returns (path, downloaded)."""
+    import shutil
+    import urllib.request
+
+    path = os.path.join(MODELS_DIR, name)
+    if os.path.exists(path) and not force:
+        return path, False
+    tmp = path + '.part'
+    try:
+        with urllib.request.urlopen(MODEL_SOURCES[name], timeout=60) as response, open(tmp, 'wb') as f:
+            shutil.copyfileobj(response, f)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return path, True
+
+
+def to_gray(frame: np.ndarray) -> np.ndarray:
+    if frame.ndim == 2:
+        return frame
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+
+def to_bgr(frame: np.ndarray) -> np.ndarray:
+    if frame.ndim == 3:
+        return frame
+    return cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+
+
+class FaceDetector:
+    """Base class for face detector backends.
+
+    ``detect`` takes a BGR or grayscale frame and returns every face as an
+    (x, y, w, h) box in frame coordinates.
+    """
+    name = 'base'
+    # Whether the backend needs BGR input; grayscale-only backends let the
+    # decoder skip colour conversion entirely
+    needs_color = False
+
+    def detect(self, frame: np.ndarray) -> List[Box]:
+        raise NotImplementedError
+
+
+class CascadeFaceDetector(FaceDetector):
+    """Shared implementation for OpenCV cascade classifiers (Haar and LBP)."""
+
+    def __init__(self, cascade_path: str, scale_factor: float = 1.1, min_neighbors: int = 5,
+                 min_size: Tuple[int, int] = (30, 30)):
+        self.cascade = cv2.CascadeClassifier(cascade_path)
+        if self.cascade.empty():
+            raise FileNotFoundError(f'Could not load cascade from {cascade_path}')
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_size = min_size
+
+    def detect(self, frame: np.ndarray) -> List[Box]:
+        faces = self.cascade.detectMultiScale(
+            to_gray(frame),
+            scaleFactor=self.scale_factor,
+            minNeighbors=self.min_neighbors,
+            minSize=self.min_size
+        )
+        return [tuple(int(v) for v in f) for f in faces]
+
+
+class HaarFaceDetector(CascadeFaceDetector):
+    name = 'haar'
+
+    def __init__(self, cascade_path: Optional[str] = None, **kwargs):
+        super().__init__(cascade_path or cv2.data.haarcascades + 'haarcascade_frontalface_default.xml', **kwargs)
+
+
+class LBPFaceDetector(CascadeFaceDetector):
+    """LBP cascade: integer features, several times faster than Haar at similar recall."""
+    name = 'lbp'
+
+    def __init__(self, cascade_path: Optional[str] = None, **kwargs):
+        kwargs.setdefault('min_neighbors', 4)
+        super().__init__(cascade_path or os.path.join(MODELS_DIR, 'lbpcascade_frontalface_improved.xml'), **kwargs)
+
+
+class YuNetFaceDetector(FaceDetector):
+    """CNN detector (YuNet ONNX) run on CPU through cv2.FaceDetectorYN.
+
+    Besides boxes, YuNet predicts five landmarks per face (eyes, nose tip,
+    mouth corners); the most recent ones are kept in ``last_landmarks``.
+    """
+    name = 'yunet'
+    needs_color = True
+
+    def __init__(self, model_path: Optional[str] = None, score_threshold: float = 0.7,
+                 nms_threshold: float = 0.3, top_k: int = 50):
+        model_path = model_path or os.path.join(MODELS_DIR, 'face_detection_yunet_2023mar.onnx')
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f'YuNet model not found at {model_path}')
+        self.detector = cv2.FaceDetectorYN.create(
+            model_path, '', (320, 320), score_threshold, nms_threshold, top_k,
+            cv2.dnn.DNN_BACKEND_OPENCV, cv2.dnn.DNN_TARGET_CPU
+        )
+        self.input_size = (320, 320)
+        self.last_landmarks: List[np.ndarray] = []
+
+    def detect(self, frame: np.ndarray) -> List[Box]:
+        frame = to_bgr(frame)
+        size = (frame.shape[1], frame.shape[0])
+        if size != self.input_size:
+            self.detector.setInputSize(size)
+            self.input_size = size
+
+        _, faces = self.detector.detect(frame)
+        if faces is None:
+            self.last_landmarks = []
+            return []
+
+        # Boxes and landmarks are kept together, so last_landmarks[i] is boxes[i]'s face
+        boxes, landmarks = [], []
+        for face in faces:
+            x, y, w, h = (int(round(v)) for v in face[:4])
+            # YuNet can return boxes partially outside the frame
+            x, y = max(0, x), max(0, y)
+            w, h = min(w, size[0] - x), min(h, size[1] - y)
+            if w > 0 and h > 0:
+                boxes.append((x, y, w, h))
+                landmarks.append(face[4:14].reshape(5, 2))
+        self.last_landmarks = landmarks
+        return boxes
+
+
+DETECTOR_BACKENDS = {
+    'haar': HaarFaceDetector,
+    'lbp': LBPFaceDetector,
+    'yunet': YuNetFaceDetector,
+}
+
+# The app passes current_app.config['FACE_DETECTOR']; this is only the
+# fallback for scripts that construct detectors without one
+DEFAULT_DETECTOR = 'haar'
+
+# Detectors hold model state (and YuNet a fixed input size), so each thread
+# gets its own instance; models are loaded once per thread, not per request.
+_local = threading.local()
+
+
+def create_detector(name: Optional[str] = None, **options) -> FaceDetector:
+    name = (name or DEFAULT_DETECTOR).lower()
+    if name not in DETECTOR_BACKENDS:
+        raise ValueError(f"Unknown face detector '{name}', expected one of {sorted(DETECTOR_BACKENDS)}")
+    return DETECTOR_BACKENDS[name](**options)
+
+
+def get_detector(name: Optional[str] = None) -> FaceDetector:
+    """Return this thread's cached detector for ``name``."""
+    name = (name or DEFAULT_DETECTOR).lower()
+    cache: Dict[str, FaceDetector] = getattr(_local, 'detectors', None)
+    if cache is None:
+        cache = _local.detectors = {}
+    if name not in cache:
+        cache[name] = create_detector(name)
+    return cache[name]
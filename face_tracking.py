@@ -0,0 +1,154 @@
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from facial_landmarks import BlinkTracker
+
+Box = Tuple[int, int, int, int]
+
+
+def box_iou(a: Box, b: Box) -> float:
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union > 0 else 0.0
+
+
+def center_distance(a: Box, b: Box) -> float:
+    """Distance between box centers, relative to the size of ``a``."""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    dx = (ax + aw / 2.0) - (bx + bw / 2.0)
+    dy = (ay + ah / 2.0) - (by + bh / 2.0)
+    return float(np.hypot(dx, dy) / max(aw, ah, 1))
+
+
+class FaceTrack:
+    """One person on camera: a stable id plus that person's own analysis state.
+
+    Carries the same per-face state FacialExpressionAnalyzer keeps for the
+    single-face path (eye positions, blinks, smoothing history), so the
+    scoring code can run against either.
+    """
+
+    def __init__(self, track_id: int, box: Box):
+        self.id = track_id
+        self.box = box
+        self.hits = 1
+        self.misses = 0
+        self.prev_eye_positions = []
+        self.blink_tracker = BlinkTracker()
+        self.blink_count = 0
+        self.last_blink_time = 0
+        self.blink_rate = 0.0
+        self.expression_history = []
+        self.last_expressions: Dict[str, float] = {}
+
+
+class FaceTracker:
+    """Assigns stable identities to face boxes across frames.
+
+    Detections are matched to existing tracks greedily by IoU, falling back
+    to center distance for fast head movement between sparse frames. Tracks
+    unseen for ``max_misses`` analyzed frames are dropped.
+    """
+
+    def __init__(self, iou_threshold: float = 0.3, max_center_distance: float = 0.6,
+                 max_misses: int = 10, max_tracks: int = 8):
+        self.iou_threshold = iou_threshold
+        self.max_center_distance = max_center_distance
+        self.max_misses = max_misses
+        self.max_tracks = max_tracks
+        self.tracks: Dict[int, FaceTrack] = {}
+        self.next_id = 1
+
+    def update(self, boxes: List[Box]) -> List[FaceTrack]:
+        """Match this frame's boxes to tracks; returns the tracks seen this frame."""
+        candidates = []
+        for track in self.tracks.values():
+            for i, box in enumerate(boxes):
+                overlap = box_iou(track.box, box)
+                if overlap >= self.iou_threshold:
+                    candidates.append((1.0 + overlap, track.id, i))
+                else:
+                    distance = center_distance(track.box, box)
+                    if distance <= self.max_center_distance:
+                        candidates.append((1.0 - distance, track.id, i))
+
+        matched_tracks = set()
+        matched_boxes = {}
+        for _, track_id, i in sorted(candidates, reverse=True):
+            if track_id in matched_tracks or i in matched_boxes:
+                continue
+            matched_tracks.add(track_id)
+            matched_boxes[i] = track_id
+
+        seen = []
+        for i, box in enumerate(boxes):
+            track_id = matched_boxes.get(i)
+            if track_id is None:
+                if len(self.tracks) >= self.max_tracks:
+                    continue
+                track = FaceTrack(self.next_id, box)
+                self.tracks[track.id] = track
+                self.next_id += 1
+            else:
+                track = self.tracks[track_id]
+                track.box = box
+                track.hits += 1
+                track.misses = 0
+            seen.append(track)
+
+        seen_ids = {t.id for t in seen}
+        for track_id in list(self.tracks):
+            if track_id not in seen_ids:
+                self.tracks[track_id].misses += 1
+                if self.tracks[track_id].misses > self.max_misses:
+                    del self.tracks[track_id]
+
+        return sorted(seen, key=lambda t: t.id)
+
+
+def batch_cascade(cascade, gray: np.ndarray, rois: List[Box], tile_size: int = 128,
+                  region: Optional[Tuple[float, float]] = None, **params) -> List[list]:
+    """Run one cascade pass over every ROI at once.
+
+    Each ROI (optionally only its vertical ``region`` slice, as fractions of
+    its height) is resized to a ``tile_size`` square and laid out on a padded
+    mosaic, so a single detectMultiScale call covers all faces at a fixed
+    per-face cost. Returns the hits per ROI as (x, y, w, h) in frame
+    coordinates.
+    """
+    if not rois:
+        return []
+    pad = tile_size // 4
+    cols = int(np.ceil(np.sqrt(len(rois))))
+    rows = int(np.ceil(len(rois) / cols))
+    step = tile_size + pad
+    mosaic = np.zeros((rows * step + pad, cols * step + pad), dtype=np.uint8)
+
+    origins = []
+    for i, (x, y, w, h) in enumerate(rois):
+        top, bottom = (y, y + h) if region is None else (y + int(h * region[0]), y + int(h * region[1]))
+        crop = gray[top:bottom, x:x+w]
+        ox, oy = pad + (i % cols) * step, pad + (i // cols) * step
+        if crop.size:
+            mosaic[oy:oy+tile_size, ox:ox+tile_size] = cv2.resize(crop, (tile_size, tile_size), interpolation=cv2.INTER_AREA)
+        origins.append((ox, oy, x, top, w / tile_size, (bottom - top) / tile_size))
+
+    hits = cascade.detectMultiScale(mosaic, **params)
+    results = [[] for _ in rois]
+    for hx, hy, hw, hh in hits:
+        cx, cy = hx + hw / 2.0, hy + hh / 2.0
+        for i, (ox, oy, fx, fy, sx, sy) in enumerate(origins):
+            if ox <= cx < ox + tile_size and oy <= cy < oy + tile_size:
+                results[i].append((
+                    int(fx + (hx - ox) * sx), int(fy + (hy - oy) * sy),
+                    int(hw * sx), int(hh * sy)
+                ))
+                break
+    return results
@@ -1,17 +1,48 @@
+import threading
+
 import cv2
 import numpy as np
-from typing import Dict, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, Union
+from face_detectors import FaceDetector, get_detector, to_gray
+from face_tracking import FaceTracker, batch_cascade
+from facial_landmarks import BlinkTracker, FaceLandmarks, eye_aspect_ratio, get_landmark_detector
+from frame_gate import MotionGate
+from scoring import DEFAULT_MODEL, ScoringModel
+
+NO_FACE_EXPRESSIONS = {
+    'happy': 0.0,
+    'surprised': 0.0,
+    'confused': 0.0,
+    'neutral': 1.0,
+    'stressed': 0.0,
+    'confident': 0.0
+}
 
 class FacialExpressionAnalyzer:
-    def __init__(self):
-        # Load pre-trained models
-        self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-        self.eye_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_eye.xml')
-        self.smile_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_smile.xml')
+    def __init__(self, detector: Union[str, FaceDetector, None] = None, use_landmarks: bool = True,
+                 frame_gate: Optional[MotionGate] = None, detection_width: Optional[int] = None,
+                 scoring: Optional[ScoringModel] = None):
+        # Face detector backend: a name from face_detectors.DETECTOR_BACKENDS
+        # (configured per deployment) or a ready detector instance. Named
+        # backends are resolved per thread, so one analyzer can serve requests
+        # handled by different worker threads.
+        self.detector_instance = detector if isinstance(detector, FaceDetector) else None
+        self.detector_name = None if isinstance(detector, FaceDetector) else detector
+        if self.detector_instance is None:
+            # Load the model up front so a bad FACE_DETECTOR fails at startup
+            get_detector(self.detector_name)
+
+        # Landmarks give eyes and mouth from one pass over the face; the eye and
+        # smile cascades are only loaded when the landmark model is unavailable
+        self.use_landmarks = use_landmarks and get_landmark_detector() is not None
+        self.eye_cascade = None
+        self.smile_cascade = None
+        if not self.use_landmarks:
+            self.load_cascades()
         
         # Expression thresholds and parameters
         self.expression_params = {
-            'happy': {'smile_threshold': 1.2, 'eye_aspect_ratio': 0.25},
+            'happy': {'smile_threshold': 1.2, 'eye_aspect_ratio': 0.25, 'mouth_width': 0.42},
             'surprised': {'eye_aspect_ratio': 0.35},
             'confused': {'eyebrow_height': 0.2, 'asymmetry': 0.15},
             'neutral': {'smile_threshold': 0.8, 'eye_aspect_ratio': 0.22},
@@ -21,28 +52,61 @@ class FacialExpressionAnalyzer:
         
         # Initialize state variables
         self.prev_eye_positions = []
+        self.blink_tracker = BlinkTracker()
         self.blink_count = 0
         self.last_blink_time = 0
+        self.blink_rate = 0.0  # blinks per minute
         self.expression_history = []
         self.confidence_baseline = 0.5
 
+        # Weight matrix turning expressions into interview metrics (scoring.py)
+        self.scoring = scoring or DEFAULT_MODEL
+
+        # Smallest frame width detection needs; full frames larger than this can
+        # be decoded at reduced resolution (see frame_transport.decode_full_frame)
+        self.detection_width = detection_width
+
+        # Optional change-detection gate: frames that barely differ from the
+        # last analyzed one reuse its detector outputs
+        self.frame_gate = frame_gate
+        self.last_face_roi = None
+        self.last_expressions = None
+        self.last_frame_skipped = False
+        self.frame_geometry = None
+
+        # Identity tracking for multi-face (panel) analysis
+        self.face_tracker = FaceTracker()
+        self.last_tracks = []
+
+        # Frames of one interview may arrive on several threads; the smoothing,
+        # blink and tracking state above is updated under this lock
+        self.lock = threading.Lock()
+
+    @property
+    def detector(self) -> FaceDetector:
+        return self.detector_instance or get_detector(self.detector_name)
+
+    @property
+    def landmark_detector(self):
+        return get_landmark_detector() if self.use_landmarks else None
+
     def detect_face(self, frame: np.ndarray) -> Optional[Tuple[int, int, int, int]]:
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = self.face_cascade.detectMultiScale(
-            gray, 
-            scaleFactor=1.1,
-            minNeighbors=5,
-            minSize=(30, 30)
-        )
-        
+        faces = self.detector.detect(frame)
+
         if len(faces) > 0:
             # Return the largest face
             return max(faces, key=lambda f: f[2] * f[3])
         return None
 
+    def load_cascades(self):
+        self.eye_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_eye.xml')
+        self.smile_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_smile.xml')
+
     def detect_eyes(self, frame: np.ndarray, face_roi: Tuple[int, int, int, int]) -> list:
+        if self.eye_cascade is None:
+            self.load_cascades()
         x, y, w, h = face_roi
-        roi_gray = cv2.cvtColor(frame[y:y+h, x:x+w], cv2.COLOR_BGR2GRAY)
+        roi_gray = to_gray(frame[y:y+h, x:x+w])
         
         eyes = self.eye_cascade.detectMultiScale(
             roi_gray,
@@ -54,8 +118,10 @@ class FacialExpressionAnalyzer:
         return [(ex+x, ey+y, ew, eh) for ex, ey, ew, eh in eyes]
 
     def detect_smile(self, frame: np.ndarray, face_roi: Tuple[int, int, int, int]) -> Optional[float]:
+        if self.smile_cascade is None:
+            self.load_cascades()
         x, y, w, h = face_roi
-        roi_gray = cv2.cvtColor(frame[y:y+h, x:x+w], cv2.COLOR_BGR2GRAY)
+        roi_gray = to_gray(frame[y:y+h, x:x+w])
         
         smiles = self.smile_cascade.detectMultiScale(
             roi_gray,
@@ -71,35 +137,93 @@ class FacialExpressionAnalyzer:
             return smile_ratio
         return 0.0
 
-    def calculate_eye_aspect_ratio(self, eye_roi: Tuple[int, int, int, int]) -> float:
-        # Simplified EAR calculation
+    def detect_landmarks(self, frame: np.ndarray, face_roi: Tuple[int, int, int, int]) -> Optional[FaceLandmarks]:
+        if self.landmark_detector is None:
+            return None
+        return self.landmark_detector.fit(frame, [face_roi])[0]
+
+    def calculate_eye_aspect_ratio(self, eye_roi: Union[Tuple[int, int, int, int], np.ndarray]) -> float:
+        # Real EAR from the six eye keypoints when landmarks are available
+        if isinstance(eye_roi, np.ndarray) and eye_roi.shape == (6, 2):
+            return eye_aspect_ratio(eye_roi)
+        # Simplified EAR calculation from an eye cascade box
         _, _, w, h = eye_roi
         return h / w if w > 0 else 0
 
-    def detect_expression(self, frame: np.ndarray) -> Dict[str, float]:
-        face_roi = self.detect_face(frame)
-        if face_roi is None:
-            return {
-                'happy': 0.0,
-                'surprised': 0.0,
-                'confused': 0.0,
-                'neutral': 1.0,
-                'stressed': 0.0,
-                'confident': 0.0
-            }
-
-        eyes = self.detect_eyes(frame, face_roi)
-        smile_ratio = self.detect_smile(frame, face_roi)
+    def update_blinks(self, ear: float, state=None):
+        state = state or self
+        state.blink_tracker.update(ear)
+        self.sync_blinks(state)
+
+    @staticmethod
+    def sync_blinks(state):
+        state.blink_count = state.blink_tracker.blink_count
+        state.last_blink_time = state.blink_tracker.last_blink_time
+        state.blink_rate = state.blink_tracker.blinks_per_minute()
+
+    def detect_expression(self, frame: np.ndarray, geometry=None) -> Dict[str, float]:
+        # ``geometry`` (frame_transport.CropGeometry) is set when the frame is a
+        # client-side crop rather than the full webcam frame
+        self.frame_geometry = geometry
+        ticket = None
+        if self.frame_gate is not None:
+            ticket = self.frame_gate.should_analyze(frame, self.last_face_roi)
+
+        if self.frame_gate is not None and ticket is None:
+            # Nothing changed meaningfully: reuse the last detector outputs
+            # and only advance the smoothing state
+            self.last_frame_skipped = True
+            expressions = dict(self.last_expressions)
+        else:
+            self.last_frame_skipped = False
+            face_roi = self.detect_face(frame)
+            self.last_face_roi = face_roi
+            expressions = self.score_expressions(frame, face_roi) if face_roi is not None else {}
+            self.last_expressions = expressions
+            if ticket is not None:
+                self.frame_gate.mark_analyzed(ticket, face_roi)
+
+        if not expressions:
+            return dict(NO_FACE_EXPRESSIONS)
+        return self.smooth_expressions(expressions)
+
+    def score_expressions(self, frame: np.ndarray, face_roi: Tuple[int, int, int, int], state=None,
+                          landmarks: Optional[FaceLandmarks] = None, eyes: Optional[list] = None,
+                          smile_ratio: Optional[float] = None) -> Dict[str, float]:
+        # ``state`` holds the per-face history (eye positions, blinks); the
+        # analyzer itself for the single-face path, a FaceTrack for panels.
+        # Landmarks or eye/smile hits may be passed in when they were computed
+        # in a batch over several faces.
+        state = state or self
+        if landmarks is None and eyes is None:
+            landmarks = self.detect_landmarks(frame, face_roi)
         
         # Calculate expression probabilities
         expressions = {}
         
-        # Happy expression
-        expressions['happy'] = min(1.0, smile_ratio * 2.0) if smile_ratio > self.expression_params['happy']['smile_threshold'] else 0.0
+        if landmarks is not None:
+            eyes = landmarks.eye_boxes()
+            eye_ratios = [landmarks.left_ear, landmarks.right_ear]
+            self.update_blinks(landmarks.ear, state)
+
+            # Happy expression (mouth corners pulled wide relative to the face)
+            mouth_width = landmarks.mouth_width_ratio
+            threshold = self.expression_params['happy']['mouth_width']
+            expressions['happy'] = min(1.0, (mouth_width - threshold) * 10.0) if mouth_width > threshold else 0.0
+        else:
+            if eyes is None:
+                eyes = self.detect_eyes(frame, face_roi)
+            eye_ratios = [self.calculate_eye_aspect_ratio(eye) for eye in eyes]
+            state.blink_tracker.update_eyes_visible(len(eyes) >= 2)
+            self.sync_blinks(state)
+            if smile_ratio is None:
+                smile_ratio = self.detect_smile(frame, face_roi)
+
+            # Happy expression
+            expressions['happy'] = min(1.0, smile_ratio * 2.0) if smile_ratio > self.expression_params['happy']['smile_threshold'] else 0.0
         
         # Surprised expression
         if len(eyes) >= 2:
-            eye_ratios = [self.calculate_eye_aspect_ratio(eye) for eye in eyes]
             avg_eye_ratio = sum(eye_ratios) / len(eye_ratios)
             expressions['surprised'] = min(1.0, avg_eye_ratio * 3.0) if avg_eye_ratio > self.expression_params['surprised']['eye_aspect_ratio'] else 0.0
         else:
@@ -115,51 +239,121 @@ class FacialExpressionAnalyzer:
             expressions['confused'] = 0.0
         
         # Stressed expression (based on eye movement and blink rate)
-        if len(self.prev_eye_positions) > 0 and len(eyes) >= 2:
-            eye_movement = sum(abs(curr - prev) for curr, prev in zip(eyes[0], self.prev_eye_positions[0])) / face_roi[2]
+        if len(state.prev_eye_positions) > 0 and len(eyes) >= 2:
+            eye_movement = sum(abs(curr - prev) for curr, prev in zip(eyes[0], state.prev_eye_positions[0])) / face_roi[2]
             expressions['stressed'] = min(1.0, eye_movement * 2.0) if eye_movement > self.expression_params['stressed']['eye_movement'] else 0.0
         else:
             expressions['stressed'] = 0.0
+
+        # Elevated blink rate (normalised so 60 blinks/min = 1.0; resting is ~15-20)
+        blink_rate = state.blink_rate / 60.0
+        if blink_rate > self.expression_params['stressed']['blink_rate']:
+            expressions['stressed'] = max(expressions['stressed'], min(1.0, blink_rate * 2.0))
         
         # Update eye positions for next frame
         if len(eyes) >= 2:
-            self.prev_eye_positions = eyes[:2]
+            state.prev_eye_positions = eyes[:2]
         
         # Confident expression (based on face position and eye contact)
-        face_center_y = face_roi[1] + face_roi[3] // 2
-        frame_center_y = frame.shape[0] // 2
-        posture_score = 1.0 - abs(face_center_y - frame_center_y) / (frame.shape[0] // 4)
+        if self.frame_geometry is not None:
+            # Cropped upload: judge posture against the full webcam frame
+            face_center_y = self.frame_geometry.full_center_y(face_roi)
+            frame_height = self.frame_geometry.full_size[1]
+        else:
+            face_center_y = face_roi[1] + face_roi[3] // 2
+            frame_height = frame.shape[0]
+        frame_center_y = frame_height // 2
+        posture_score = 1.0 - abs(face_center_y - frame_center_y) / (frame_height // 4)
         expressions['confident'] = max(0.0, min(1.0, posture_score))
         
         # Neutral expression (inverse of other expressions)
         other_expressions = sum(v for k, v in expressions.items() if k != 'neutral')
         expressions['neutral'] = max(0.0, 1.0 - other_expressions)
-        
+
+        return expressions
+
+    def smooth_expressions(self, expressions: Dict[str, float], state=None) -> Dict[str, float]:
+        state = state or self
         # Smooth expressions using history
-        self.expression_history.append(expressions)
-        if len(self.expression_history) > 10:
-            self.expression_history.pop(0)
+        state.expression_history.append(expressions)
+        if len(state.expression_history) > 10:
+            state.expression_history.pop(0)
         
         smoothed_expressions = {}
         for expr in expressions.keys():
-            values = [h[expr] for h in self.expression_history]
+            values = [h[expr] for h in state.expression_history]
             smoothed_expressions[expr] = sum(values) / len(values)
         
         return smoothed_expressions
 
+    def detect_expressions_multi(self, frame: np.ndarray, geometry=None) -> List[Dict]:
+        """Analyze every face in the frame, keeping a stable id per person.
+
+        Returns one entry per face seen in the last analyzed frame with its id,
+        box, smoothed expressions and interview metrics. Landmarks (or the eye
+        and smile cascades) run once over all face boxes together.
+        """
+        self.frame_geometry = geometry
+        ticket = None
+        if self.frame_gate is not None:
+            ticket = self.frame_gate.should_analyze(frame, self.last_face_roi)
+        analyze = self.frame_gate is None or ticket is not None
+
+        if analyze:
+            boxes = self.detector.detect(frame)
+            tracks = self.face_tracker.update(boxes)
+            boxes = [t.box for t in tracks]
+
+            landmarks = [None] * len(tracks)
+            eyes = [None] * len(tracks)
+            smiles = [None] * len(tracks)
+            if self.landmark_detector is not None:
+                landmarks = self.landmark_detector.fit(frame, boxes)
+            else:
+                if self.eye_cascade is None:
+                    self.load_cascades()
+                gray = to_gray(frame)
+                eyes = batch_cascade(self.eye_cascade, gray, boxes,
+                                     scaleFactor=1.1, minNeighbors=5, minSize=(12, 12))
+                smile_hits = batch_cascade(self.smile_cascade, gray, boxes,
+                                           scaleFactor=1.7, minNeighbors=22, minSize=(16, 16))
+                smiles = [max((sw * sh) / (w * h) for _, _, sw, sh in hits) if hits else 0.0
+                          for hits, (_, _, w, h) in zip(smile_hits, boxes)]
+
+            for i, track in enumerate(tracks):
+                track.last_expressions = self.score_expressions(
+                    frame, track.box, state=track, landmarks=landmarks[i],
+                    eyes=eyes[i] if landmarks[i] is None else None, smile_ratio=smiles[i]
+                )
+            self.last_tracks = tracks
+            self.last_face_roi = max(boxes, key=lambda b: b[2] * b[3]) if boxes else None
+            if ticket is not None:
+                self.frame_gate.mark_analyzed(ticket, self.last_face_roi)
+        self.last_frame_skipped = not analyze
+
+        results = []
+        for track in self.last_tracks:
+            expressions = self.smooth_expressions(dict(track.last_expressions), state=track)
+            box = geometry.to_full(track.box) if geometry is not None else track.box
+            results.append({
+                'id': track.id,
+                'box': [int(v) for v in box],
+                'expressions': expressions,
+                'metrics': self.get_interview_metrics(expressions),
+                'blink_rate': track.blink_rate
+            })
+        return results
+
     def get_interview_metrics(self, expressions: Dict[str, float]) -> Dict[str, float]:
         # Calculate derived metrics for the interview
-        confidence_score = expressions['confident'] * 0.6 + expressions['happy'] * 0.2 + (1 - expressions['stressed']) * 0.2
-        stress_level = expressions['stressed'] * 0.7 + expressions['confused'] * 0.3
-        engagement_score = (1 - expressions['neutral']) * 0.5 + expressions['confident'] * 0.3 + expressions['happy'] * 0.2
-        
-        return {
-            'confidence': min(1.0, max(0.0, confidence_score)),
-            'stress_level': min(1.0, max(0.0, stress_level)),
-            'engagement': min(1.0, max(0.0, engagement_score))
-        }
+        return self.scoring.score(expressions)
+
+    def get_interview_metrics_batch(self, scores: np.ndarray) -> Dict[str, np.ndarray]:
+        # Same metrics for an (N x channels) array of expression scores, in one pass
+        return self.scoring.score_columns(scores)
 
-    def draw_debug_info(self, frame: np.ndarray, face_roi: Optional[Tuple[int, int, int, int]], expressions: Dict[str, float]) -> np.ndarray:
+    @staticmethod
+    def draw_debug_info(frame: np.ndarray, face_roi: Optional[Tuple[int, int, int, int]], expressions: Dict[str, float]) -> np.ndarray:
         # Draw face rectangle
         if face_roi is not None:
             x, y, w, h = face_roi
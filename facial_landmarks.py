@@ -0,0 +1,175 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from face_detectors import MODELS_DIR, to_gray
+
+# 68-point (iBUG 300-W) layout produced by the LBF facemark model
+LEFT_EYE = slice(36, 42)
+RIGHT_EYE = slice(42, 48)
+MOUTH_OUTER = slice(48, 60)
+MOUTH_INNER = slice(60, 68)
+MOUTH_LEFT_CORNER = 48
+MOUTH_RIGHT_CORNER = 54
+
+# Longest run of frames without both eyes that still counts as a blink when
+# only the eye cascade is available (a blink lasts ~0.1-0.4s)
+CASCADE_BLINK_MAX_FRAMES = 2
+
+
+def eye_aspect_ratio(eye: np.ndarray) -> float:
+    """Soukupova & Cech EAR over the six eye keypoints p1..p6.
+
+    EAR = (|p2 - p6| + |p3 - p5|) / (2 |p1 - p4|); about 0.3 for an open eye,
+    dropping towards 0 during a blink.
+    """
+    vertical = np.linalg.norm(eye[1] - eye[5]) + np.linalg.norm(eye[2] - eye[4])
+    horizontal = np.linalg.norm(eye[0] - eye[3])
+    return float(vertical / (2.0 * horizontal)) if horizontal > 0 else 0.0
+
+
+def mouth_aspect_ratio(mouth_inner: np.ndarray) -> float:
+    """Opening of the inner lip contour relative to its width."""
+    vertical = (np.linalg.norm(mouth_inner[1] - mouth_inner[7]) +
+                np.linalg.norm(mouth_inner[2] - mouth_inner[6]) +
+                np.linalg.norm(mouth_inner[3] - mouth_inner[5]))
+    horizontal = np.linalg.norm(mouth_inner[0] - mouth_inner[4])
+    return float(vertical / (3.0 * horizontal)) if horizontal > 0 else 0.0
+
+
+def keypoint_box(points: np.ndarray) -> Tuple[int, int, int, int]:
+    x, y, w, h = cv2.boundingRect(points.astype(np.float32))
+    return (int(x), int(y), int(w), int(h))
+
+
+class FaceLandmarks:
+    """Eye and mouth keypoints for one face, plus the derived ratios."""
+
+    def __init__(self, points: np.ndarray, face_roi: Tuple[int, int, int, int]):
+        self.points = points
+        self.face_roi = face_roi
+        self.left_eye = points[LEFT_EYE]
+        self.right_eye = points[RIGHT_EYE]
+        self.mouth = points[MOUTH_OUTER]
+        self.left_ear = eye_aspect_ratio(self.left_eye)
+        self.right_ear = eye_aspect_ratio(self.right_eye)
+        self.ear = (self.left_ear + self.right_ear) / 2.0
+        self.mar = mouth_aspect_ratio(points[MOUTH_INNER])
+        mouth_width = np.linalg.norm(points[MOUTH_LEFT_CORNER] - points[MOUTH_RIGHT_CORNER])
+        self.mouth_width_ratio = float(mouth_width / face_roi[2]) if face_roi[2] > 0 else 0.0
+
+    def eye_boxes(self) -> List[Tuple[int, int, int, int]]:
+        """Eye boxes in the same (x, y, w, h) form the eye cascade returns."""
+        return [keypoint_box(self.left_eye), keypoint_box(self.right_eye)]
+
+
+class LandmarkDetector:
+    """68-point facial landmarks from OpenCV's LBF facemark (opencv-contrib).
+
+    A single fit over the detected face boxes yields eyes and mouth for every
+    face, replacing the extra eye and smile cascade passes.
+    """
+
+    def __init__(self, model_path: Optional[str] = None):
+        if not hasattr(cv2, 'face'):
+            raise RuntimeError('cv2.face is not available; install opencv-contrib-python')
+        model_path = model_path or os.path.join(MODELS_DIR, 'lbfmodel.yaml')
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f'LBF landmark model not found at {model_path}')
+        self.facemark = cv2.face.createFacemarkLBF()
+        self.facemark.loadModel(model_path)
+
+    def fit(self, frame: np.ndarray, faces: List[Tuple[int, int, int, int]]) -> List[Optional[FaceLandmarks]]:
+        if not faces:
+            return []
+        rects = np.array(faces, dtype=np.int32)
+        ok, landmarks = self.facemark.fit(to_gray(frame), rects)
+        if not ok:
+            return [None] * len(faces)
+        return [FaceLandmarks(points.reshape(-1, 2), face) for points, face in zip(landmarks, faces)]
+
+
+class BlinkTracker:
+    """Counts blinks from a per-frame EAR signal and reports blinks per minute.
+
+    A blink is an EAR dip below ``ear_threshold`` lasting at least
+    ``min_frames`` frames, counted when the eye reopens.
+    """
+
+    def __init__(self, ear_threshold: float = 0.21, min_frames: int = 1, window_seconds: float = 60.0):
+        self.ear_threshold = ear_threshold
+        self.min_frames = min_frames
+        self.window_seconds = window_seconds
+        self.closed_frames = 0
+        self.blink_count = 0
+        self.last_blink_time = 0.0
+        self.blink_times = deque()
+        self.started_at = None
+
+    def update(self, ear: float, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        if self.started_at is None:
+            self.started_at = now
+
+        blinked = False
+        if ear < self.ear_threshold:
+            self.closed_frames += 1
+        else:
+            if self.closed_frames >= self.min_frames:
+                blinked = True
+                self.blink_count += 1
+                self.last_blink_time = now
+                self.blink_times.append(now)
+            self.closed_frames = 0
+
+        while self.blink_times and now - self.blink_times[0] > self.window_seconds:
+            self.blink_times.popleft()
+        return blinked
+
+    def update_eyes_visible(self, visible: bool, now: Optional[float] = None,
+                            max_closed_frames: int = CASCADE_BLINK_MAX_FRAMES) -> bool:
+        """Blink signal for when there are no landmarks: whether the eye cascade
+        found both eyes in a detected face.
+
+        The cascade rarely finds closed eyes, so a short run of frames without
+        them followed by both eyes again counts as a blink. Longer runs are
+        looking away or cascade misses, not blinks.
+        """
+        if not visible and self.closed_frames >= max_closed_frames:
+            # Too long for a blink; wait for the eyes to come back
+            self.closed_frames = max_closed_frames + 1
+            return False
+        if visible and self.closed_frames > max_closed_frames:
+            self.closed_frames = 0
+        return self.update(1.0 if visible else 0.0, now)
+
+    def blinks_per_minute(self, now: Optional[float] = None) -> float:
+        now = time.time() if now is None else now
+        if self.started_at is None:
+            return 0.0
+        # Until a full window has elapsed, extrapolate from the time observed so far
+        # (with a 10s floor so one early blink doesn't read as a huge rate)
+        window = min(self.window_seconds, max(now - self.started_at, 10.0))
+        return len(self.blink_times) * 60.0 / window
+
+
+_local = threading.local()
+
+
+def get_landmark_detector(model_path: Optional[str] = None) -> Optional[LandmarkDetector]:
+    """This thread's landmark detector, or None when the model is unavailable."""
+    cache: Dict[Optional[str], Optional[LandmarkDetector]] = getattr(_local, 'detectors', None)
+    if cache is None:
+        cache = _local.detectors = {}
+    if model_path not in cache:
+        try:
+            cache[model_path] = LandmarkDetector(model_path)
+        except (RuntimeError, FileNotFoundError, cv2.error) as e:
+            print(f"Facial landmarks disabled: {str(e)}")
+            cache[model_path] = None
+    return cache[model_path]
@@ -0,0 +1,302 @@
+"""Application factory.
+
+Each process loads only what its role needs:
+
+* ``web``: pages, interview APIs and question management (templates,
+  forms, CSRF, session store, metrics write buffer). No OpenCV.
+* ``worker``: the frame analysis API only (session store and the vision
+  stack, optionally pre-warmed). No templates, forms or write buffer.
+* ``admin``: database access plus the maintenance commands (``init-db``,
+  ``seed-db``, ``import-questions``, ``export-questions``,
+  ``transcode-videos``, ``rebuild-score-stats``, ``export-analytics``,
+  ``sweep-recordings``, ``build-previews``, ``add-scoring-version``,
+  ``rescore``).
+  No routes.
+* ``all``: web, worker and the commands in one process (development, small
+  deployments).
+"""
+import os
+
+import click
+from flask import Flask, url_for
+
+from config import configure_app
+from models import db
+from storage import configure_storage
+
+ROLES = ('web', 'worker', 'admin', 'all')
+
+
+def create_app(role='all', config=None):
+    if role not in ROLES:
+        raise ValueError(f"Unknown role '{role}', expected one of {ROLES}")
+
+    app = Flask(__name__)
+    configure_app(app, config)
+    app.config['APP_ROLE'] = role
+    # WAL mode, busy timeout and a thread-safe connection pool for SQLite
+    configure_storage(app)
+    db.init_app(app)
+
+    if role == 'admin':
+        register_commands(app)
+        return app
+
+    from flask_wtf.csrf import CSRFProtect
+
+    import interview_services as services
+    CSRFProtect(app)
+    services.init_session_store(app)
+
+    if role in ('web', 'all'):
+        register_web(app)
+    if role in ('worker', 'all'):
+        register_worker(app)
+    if role == 'all':
+        register_commands(app)
+
+    with app.app_context():
+        db.create_all()
+        if role in ('web', 'all'):
+            import question_search
+            question_search.setup_search(db.engine)
+        if role in ('worker', 'all') and app.config['VISION_PREWARM']:
+            services.prewarm_vision()
+    return app
+
+
+def register_web(app):
+    import interview_services as services
+    import media_prefetch
+    import overlay_render
+    import question_views
+    import recording_ingest
+    import recording_lifecycle
+    import recording_previews
+    import video_renditions
+    import web_views
+    from models import Question
+    from template_cache import FragmentCache, configure_templates, invalidate_on_change
+
+    app.register_blueprint(web_views.bp)
+    app.register_blueprint(question_views.bp)
+    services.init_metrics_buffer(app)
+    # Recording uploads are size/duration/quota-checked while they stream in
+    recording_ingest.configure_ingest(app)
+    video_renditions.init_transcode_queue(app)
+    media_prefetch.init_media_warmer(app)
+    recording_previews.init_preview_queue(app)
+    overlay_render.init_overlay_renderer(app)
+    # Deferred deletes and the periodic retention/compaction/GC sweep
+    recording_lifecycle.init_lifecycle(app)
+
+    # Bytecode cache plus {% cache %} fragments (avatar card, question list, layout)
+    ttl = app.config['FRAGMENT_CACHE_TTL']
+    fragment_cache = FragmentCache(ttl_seconds=ttl) if ttl > 0 else None
+    configure_templates(app, fragment_cache, app.config['JINJA_BYTECODE_CACHE_DIR'])
+    if fragment_cache is not None:
+        # Question list fragments are keyed by the question bank version
+        invalidate_on_change(fragment_cache, 'questions', Question)
+
+    # Templates written against the single-module app use bare endpoint
+    # names (url_for('login')); resolve them to the blueprint that has one
+    def resolve_bare_endpoint(error, endpoint, values):
+        if '.' not in endpoint:
+            for name in app.blueprints:
+                if f'{name}.{endpoint}' in app.view_functions:
+                    return url_for(f'{name}.{endpoint}', **values)
+        raise error
+    app.url_build_error_handlers.append(resolve_bare_endpoint)
+
+
+def register_worker(app):
+    import analysis_views
+
+    app.register_blueprint(analysis_views.bp)
+
+
+def register_commands(app):
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Drop and recreate all tables, then seed the defaults."""
+        from init_db import init_db
+        init_db(app)
+
+    @app.cli.command('seed-db')
+    def seed_db_command():
+        """Replace avatars and questions with the defaults, keeping other data."""
+        import question_search
+        from init_db import seed_db
+        db.create_all()
+        question_search.setup_search(db.engine)
+        seed_db()
+        click.echo('Seeded.')
+
+    @app.cli.command('fetch-models')
+    @click.argument('names', nargs=-1)
+    @click.option('--force', is_flag=True, help='Download again even if the file exists')
+    def fetch_models_command(names, force):
+        """Download the landmark and detector models into models/ (default: all)."""
+        from face_detectors import MODEL_SOURCES, fetch_model
+        unknown = set(names) - set(MODEL_SOURCES)
+        if unknown:
+            raise click.BadParameter(f"unknown model(s) {', '.join(sorted(unknown))}; "
+                                     f"expected {', '.join(MODEL_SOURCES)}")
+        for name in names or MODEL_SOURCES:
+            path, downloaded = fetch_model(name, force)
+            click.echo(f"{'Downloaded' if downloaded else 'Already present'}: {path}")
+
+    @app.cli.command('import-questions')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--format', 'fmt', type=click.Choice(['jsonl', 'csv']), help='Defaults to the file extension')
+    @click.option('--batch-size', default=5000, show_default=True, help='Questions per transaction')
+    @click.option('--video-root', help='Directory that relative interviewer_video paths are read from')
+    @click.option('--workers', default=8, show_default=True, help='Parallel video copies')
+    @click.option('--dry-run', is_flag=True, help='Only validate the pack')
+    def import_questions_command(path, fmt, batch_size, video_root, workers, dry_run):
+        """Upsert a JSONL/CSV question pack, matching existing questions by content hash."""
+        import question_search
+        from question_io import import_questions
+        db.create_all()
+        question_search.setup_search(db.engine)
+        stats = import_questions(path, fmt, batch_size, video_root, workers=workers, dry_run=dry_run)
+        for line_no, message in stats['errors']:
+            click.echo(f'{path}:{line_no}: {message}', err=True)
+        click.echo(f"Read {stats['read']} records in {stats['seconds']:.2f}s: {stats['inserted']} inserted, "
+                   f"{stats['updated']} updated, {stats['invalid']} invalid, {stats['videos']} videos attached.")
+
+    @app.cli.command('export-questions')
+    @click.option('--out', 'out_file', type=click.File('w', encoding='utf-8'), default='-',
+                  help='Output file (default: stdout)')
+    @click.option('--format', 'fmt', type=click.Choice(['jsonl', 'csv']), default='jsonl', show_default=True)
+    @click.option('--topic')
+    @click.option('--difficulty')
+    def export_questions_command(out_file, fmt, topic, difficulty):
+        """Stream the question bank as a pack that import-questions reads back."""
+        from question_io import export_questions
+        export_questions(out_file, fmt, topic, difficulty)
+
+    @app.cli.command('transcode-videos')
+    @click.option('--force', is_flag=True, help='Rebuild renditions that already exist')
+    @click.option('--workers', default=2, show_default=True, help='Videos transcoded in parallel')
+    def transcode_videos_command(force, workers):
+        """Build the rendition ladder for interviewer videos that don't have one."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        import video_renditions
+        from models import Question
+        paths = {path for (path,) in db.session.query(Question.interviewer_video_path)
+                 .filter(Question.interviewer_video_path.isnot(None))}
+        todo = sorted(p for p in paths if force or video_renditions.load_manifest(p) is None)
+
+        def run(path):
+            try:
+                manifest = video_renditions.transcode(path)
+                return f"{path}: {len(manifest['renditions']) - 1} renditions ({manifest['kind']})"
+            except Exception as e:
+                return f'{path}: failed: {str(e)}'
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for line in pool.map(run, todo):
+                click.echo(line)
+        click.echo(f'Transcoded {len(todo)} of {len(paths)} videos.')
+
+    @app.cli.command('rebuild-score-stats')
+    def rebuild_score_stats_command():
+        """Recompute the per-topic/difficulty score percentiles from all interviews."""
+        import score_stats
+        db.create_all()
+        click.echo(f'Counted {score_stats.rebuild()} completed interviews.')
+
+    @app.cli.command('export-analytics')
+    @click.option('--out', 'out_dir', default='exports', show_default=True, help='Output directory')
+    @click.option('--format', 'fmt', type=click.Choice(['parquet', 'npz']),
+                  help='Defaults to parquet when pyarrow is installed, else npz')
+    @click.option('--table', 'tables', multiple=True, help='Only export these tables (repeatable)')
+    @click.option('--chunk-size', default=5000, show_default=True)
+    @click.option('--settle-seconds', default=60.0, show_default=True,
+                  help='Leave interviews completed more recently than this for the next run')
+    def export_analytics_command(out_dir, fmt, tables, chunk_size, settle_seconds):
+        """Append new interviews, responses and metric timelines to columnar files."""
+        from analytics_export import export_all
+        export_all(out_dir, list(tables) or None, chunk_size, fmt, settle_seconds)
+
+    @app.cli.command('sweep-recordings')
+    @click.option('--dry-run', is_flag=True, help='Report what would be deleted without deleting')
+    def sweep_recordings_command(dry_run):
+        """Apply recording retention, compact old recordings and delete orphaned files."""
+        import recording_lifecycle
+        lifecycle = recording_lifecycle.init_lifecycle(app, start=False)
+        result = lifecycle.sweep(dry_run)
+        if result is None:
+            click.echo('Another sweep is running.')
+            return
+        mb = 1024 * 1024
+        retention, compaction, gc = result['retention'], result['compaction'], result['gc']
+        click.echo(f"Retention: {retention['files']} recordings, {retention['bytes'] / mb:.1f} MB")
+        click.echo(f"Compaction: {compaction['files']} recordings, {compaction['bytes_saved'] / mb:.1f} MB saved"
+                   + (f" (skipped: {compaction['skipped']})" if compaction['skipped'] else ''))
+        click.echo(f"Orphans: {gc['files']} files, {gc['bytes'] / mb:.1f} MB")
+        click.echo(f"Kept: {gc['scanned'] - gc['files']} files, {gc['total_bytes'] / mb:.1f} MB"
+                   + (' (dry run)' if dry_run else ''))
+
+    @app.cli.command('build-previews')
+    @click.option('--force', is_flag=True, help='Rebuild previews that already exist')
+    @click.option('--workers', default=2, show_default=True, help='Recordings processed in parallel')
+    def build_previews_command(force, workers):
+        """Build poster and sprite previews for recordings that don't have them."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        import recording_previews
+        from models import InterviewResponse
+        root = app.config['UPLOAD_FOLDER']
+        paths = [path for (path,) in db.session.query(InterviewResponse.video_path)
+                 .filter(InterviewResponse.video_path.isnot(None)).order_by(InterviewResponse.id)]
+        todo = [p for p in paths if os.path.exists(os.path.join(root, p))
+                and (force or recording_previews.load_index(p, root) is None)]
+
+        def run(path):
+            try:
+                index = recording_previews.generate(path, root, app.config['PREVIEW_FRAMES'])
+                return f"{path}: {len(index['frames'])} frames, {sum(index['bytes'].values()) // 1024} KB"
+            except Exception as e:
+                return f'{path}: failed: {str(e)}'
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for line in pool.map(run, todo):
+                click.echo(line)
+        click.echo(f'Built previews for {len(todo)} of {len(paths)} recordings.')
+
+    @app.cli.command('add-scoring-version')
+    @click.argument('model_file', type=click.File('r', encoding='utf-8'))
+    @click.option('--activate', is_flag=True, help='Use it for new analysis right away, without re-scoring')
+    def add_scoring_version_command(model_file, activate):
+        """Store a scoring model (JSON: version, weights, bias, optional expression_params)."""
+        import json
+
+        import scoring_versions
+        try:
+            config = scoring_versions.add_version(json.load(model_file), activate)
+        except (ValueError, KeyError) as e:
+            raise click.ClickException(str(e))
+        click.echo(f"Added scoring version '{config.version}'" + (' (active)' if activate else ''))
+
+    @app.cli.command('rescore')
+    @click.argument('version')
+    @click.option('--workers', default=4, show_default=True, help='Chunks read and scored in parallel')
+    @click.option('--chunk-size', default=500, show_default=True, help='Interviews per chunk')
+    @click.option('--dry-run', is_flag=True, help='Score and count, but swap nothing in')
+    def rescore_command(version, workers, chunk_size, dry_run):
+        """Re-score stored expression timelines with a scoring version and swap it in."""
+        import scoring_versions
+        try:
+            stats = scoring_versions.rescore(version, workers, chunk_size, dry_run)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        click.echo(f"Scored {stats['samples']} samples: {stats['interviews']} interviews, "
+                   f"{stats['responses']} responses in {stats['seconds']}s"
+                   + (' (dry run)' if dry_run else f"; '{version}' is now active"))
+
+
+def role_from_env():
+    return os.environ.get('APP_ROLE', 'all')
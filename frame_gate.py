@@ -0,0 +1,113 @@
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from face_detectors import to_gray
+
+
+class MotionGate:
+    """Cheap change detector that decides whether a frame needs full analysis.
+
+    Each frame is reduced to a tiny grayscale thumbnail and compared with the
+    thumbnail of the last analyzed frame by mean absolute difference. The face
+    region gets its own, finer thumbnail so small facial motion (blinks, mouth
+    movement) is not averaged away by a static background. A frame is analyzed
+    when either difference exceeds ``threshold`` grey levels, or when
+    ``max_skip`` frames in a row have been skipped.
+
+    Frames of one interview can be analyzed on several threads at once, so
+    ``should_analyze`` hands each analyzed frame its own ticket instead of
+    keeping it on the gate; a ticket older than the last marked one is ignored.
+    """
+
+    def __init__(self, threshold: float = 4.0, face_threshold: Optional[float] = None,
+                 thumb_size: Tuple[int, int] = (32, 24), face_thumb_size: Tuple[int, int] = (32, 32),
+                 max_skip: int = 15):
+        self.threshold = threshold
+        self.face_threshold = threshold if face_threshold is None else face_threshold
+        self.thumb_size = thumb_size
+        self.face_thumb_size = face_thumb_size
+        self.max_skip = max_skip
+        self.reset()
+
+    def reset(self):
+        self.last_thumb = None
+        self.last_face_thumb = None
+        self.last_shape = None
+        self.consecutive_skips = 0
+        self.frames_seen = 0
+        self.frames_skipped = 0
+        self.last_difference = 0.0
+        self._issued = 0
+        self._marked = 0
+
+    def _thumb(self, gray: np.ndarray, size: Tuple[int, int]) -> np.ndarray:
+        return cv2.resize(gray, size, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def _face_thumb(self, gray: np.ndarray, face_roi) -> Optional[np.ndarray]:
+        if face_roi is None:
+            return None
+        x, y, w, h = face_roi
+        crop = gray[y:y+h, x:x+w]
+        if crop.size == 0:
+            return None
+        return self._thumb(crop, self.face_thumb_size)
+
+    def should_analyze(self, frame: np.ndarray, face_roi=None) -> Optional[tuple]:
+        """A ticket when the frame differs enough from the last analyzed one, else None.
+
+        ``face_roi`` is the face box from the last analysis, if any. With a
+        ticket the caller must run its detectors and then call
+        ``mark_analyzed`` with the ticket and the new face box.
+        """
+        self.frames_seen += 1
+        gray = to_gray(frame)
+        thumb = self._thumb(gray, self.thumb_size)
+
+        changed = (
+            self.last_thumb is None
+            or gray.shape != self.last_shape
+            or self.consecutive_skips >= self.max_skip
+        )
+        if not changed:
+            self.last_difference = float(np.mean(np.abs(thumb - self.last_thumb)))
+            changed = self.last_difference > self.threshold
+        if not changed and self.last_face_thumb is not None:
+            face_thumb = self._face_thumb(gray, face_roi)
+            if face_thumb is not None:
+                face_difference = float(np.mean(np.abs(face_thumb - self.last_face_thumb)))
+                self.last_difference = max(self.last_difference, face_difference)
+                changed = face_difference > self.face_threshold
+
+        if changed:
+            self._issued += 1
+            return self._issued, gray, thumb
+
+        self.consecutive_skips += 1
+        self.frames_skipped += 1
+        return None
+
+    def mark_analyzed(self, ticket: tuple, face_roi=None):
+        sequence, gray, thumb = ticket
+        if sequence < self._marked:
+            # A newer frame finished first; keep its reference
+            return
+        self._marked = sequence
+        self.last_thumb = thumb
+        self.last_shape = gray.shape
+        self.last_face_thumb = self._face_thumb(gray, face_roi)
+        self.consecutive_skips = 0
+
+    @property
+    def skip_ratio(self) -> float:
+        return self.frames_skipped / self.frames_seen if self.frames_seen else 0.0
+
+    def stats(self) -> dict:
+        return {
+            'frames_seen': self.frames_seen,
+            'frames_skipped': self.frames_skipped,
+            'skip_ratio': self.skip_ratio,
+            'last_difference': self.last_difference,
+            'threshold': self.threshold,
+        }
@@ -0,0 +1,246 @@
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+Box = Tuple[int, int, int, int]
+
+# Wire formats for /api/analyze-expression frames
+FULL_JPEG = 'jpeg'        # full webcam frame, decoded in full
+CROP_GRAY8 = 'gray8'      # raw 8-bit grayscale crop, row-major, no decode at all
+CROP_JPEG = 'jpeg-crop'   # low-quality JPEG of the grayscale crop
+CROP_FORMATS = (CROP_GRAY8, CROP_JPEG)
+
+
+# Start-of-frame markers carry the image size; C4 (DHT), C8 (JPG) and CC (DAC) don't
+SOF_MARKERS = {m for m in range(0xC0, 0xD0) if m not in (0xC4, 0xC8, 0xCC)}
+
+# IMREAD_REDUCED_* flags let libjpeg skip most of the IDCT work by decoding
+# straight to 1/2, 1/4 or 1/8 size
+REDUCED_FLAGS = {
+    (2, False): cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    (4, False): cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    (8, False): cv2.IMREAD_REDUCED_GRAYSCALE_8,
+    (2, True): cv2.IMREAD_REDUCED_COLOR_2,
+    (4, True): cv2.IMREAD_REDUCED_COLOR_4,
+    (8, True): cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+
+class FrameError(ValueError):
+    """Raised when an uploaded frame does not match its declared format."""
+
+
+def jpeg_dimensions(data: bytes) -> Optional[Tuple[int, int]]:
+    """(width, height) from a JPEG's SOF segment, without decoding; None if not found."""
+    if data[:2] != b'\xff\xd8':
+        return None
+    i, n = 2, len(data)
+    while i + 4 <= n:
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            # Fill byte before a marker
+            i += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            # Standalone markers have no length field
+            i += 2
+            continue
+        if marker in SOF_MARKERS:
+            if i + 9 > n:
+                return None
+            height = int.from_bytes(data[i + 5:i + 7], 'big')
+            width = int.from_bytes(data[i + 7:i + 9], 'big')
+            return (width, height) if width and height else None
+        if marker in (0xD9, 0xDA):
+            # End of image / start of scan before any SOF
+            return None
+        i += 2 + int.from_bytes(data[i + 2:i + 4], 'big')
+    return None
+
+
+def reduction_factor(width: int, detection_width: Optional[int]) -> int:
+    """Largest of 1/2/4/8 that keeps the decoded width at or above detection_width."""
+    if not detection_width:
+        return 1
+    factor = 1
+    while factor < 8 and width // (factor * 2) >= detection_width:
+        factor *= 2
+    return factor
+
+
+def decode_full_frame(data: bytes, detection_width: Optional[int] = None,
+                      color: bool = True) -> Tuple[Optional[np.ndarray], Optional['CropGeometry']]:
+    """Decode a full-frame JPEG at the smallest size the detectors need.
+
+    Returns the image and, when it was decoded at reduced size, a geometry
+    mapping its coordinates back to the original frame.
+    """
+    buf = np.frombuffer(data, np.uint8)
+    size = jpeg_dimensions(data)
+    factor = reduction_factor(size[0], detection_width) if size else 1
+    if factor == 1:
+        return cv2.imdecode(buf, cv2.IMREAD_COLOR if color else cv2.IMREAD_GRAYSCALE), None
+
+    image = cv2.imdecode(buf, REDUCED_FLAGS[(factor, color)])
+    if image is None:
+        return None, None
+    return image, CropGeometry((0, 0, size[0], size[1]), (image.shape[1], image.shape[0]), size)
+
+
+class CropGeometry:
+    """Maps coordinates in a client-side crop back to the full webcam frame.
+
+    The client cut ``roi`` (full-frame x, y, w, h) out of a frame of
+    ``full_size`` and scaled it to the crop image it sent.
+    """
+
+    def __init__(self, roi: Box, crop_size: Tuple[int, int], full_size: Tuple[int, int]):
+        self.roi = roi
+        self.full_size = full_size
+        self.scale_x = crop_size[0] / roi[2] if roi[2] else 1.0
+        self.scale_y = crop_size[1] / roi[3] if roi[3] else 1.0
+
+    @property
+    def full_frame(self) -> bool:
+        """True for a whole (possibly downscaled) frame rather than a crop."""
+        return self.roi == (0, 0, self.full_size[0], self.full_size[1])
+
+    def to_full(self, box: Box) -> Box:
+        x, y, w, h = box
+        return (
+            int(round(self.roi[0] + x / self.scale_x)),
+            int(round(self.roi[1] + y / self.scale_y)),
+            int(round(w / self.scale_x)),
+            int(round(h / self.scale_y)),
+        )
+
+    def full_center_y(self, box: Box) -> float:
+        return self.roi[1] + (box[1] + box[3] / 2.0) / self.scale_y
+
+
+def parse_box(value: Optional[str]) -> Optional[Box]:
+    if not value:
+        return None
+    try:
+        parts = [int(float(v)) for v in value.split(',')]
+    except ValueError:
+        raise FrameError(f'Invalid box: {value}')
+    if len(parts) != 4 or parts[2] <= 0 or parts[3] <= 0:
+        raise FrameError(f'Invalid box: {value}')
+    return tuple(parts)
+
+
+def decode_crop(data: bytes, form) -> Tuple[np.ndarray, CropGeometry]:
+    """Turn a negotiated crop upload into a grayscale image and its geometry."""
+    frame_format = form.get('frame_format')
+    roi = parse_box(form.get('roi'))
+    if roi is None:
+        raise FrameError('Cropped frames need a roi')
+    try:
+        full_size = (int(form['frame_width']), int(form['frame_height']))
+    except (KeyError, ValueError):
+        raise FrameError('Cropped frames need frame_width and frame_height')
+
+    if frame_format == CROP_GRAY8:
+        try:
+            width, height = int(form['width']), int(form['height'])
+        except (KeyError, ValueError):
+            raise FrameError('gray8 frames need width and height')
+        if width <= 0 or height <= 0 or len(data) != width * height:
+            raise FrameError(f'Expected {width}x{height} bytes, got {len(data)}')
+        # A read-only view over the request body: no decode, no copy
+        image = np.frombuffer(data, np.uint8).reshape(height, width)
+    elif frame_format == CROP_JPEG:
+        image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            raise FrameError('Could not decode JPEG crop')
+    else:
+        raise FrameError(f'Unknown frame format: {frame_format}')
+
+    return image, CropGeometry(roi, (image.shape[1], image.shape[0]), full_size)
+
+
+class FrameTransport:
+    """Per-interview negotiation of the client-side crop.
+
+    After each analyzed frame the server offers the face region (with a
+    margin) and a target size that brings the face down to about
+    ``target_face_width`` pixels. Clients that support it send just that
+    region, grayscale, as raw bytes or a small JPEG. Every
+    ``full_frame_interval`` frames, or whenever the face is lost, the offer
+    asks for a full frame so detection can re-acquire the face.
+    """
+
+    def __init__(self, target_face_width: int = 128, margin: float = 0.4,
+                 full_frame_interval: int = 30, preferred_format: str = CROP_GRAY8,
+                 jpeg_quality: int = 60):
+        self.target_face_width = target_face_width
+        self.margin = margin
+        self.full_frame_interval = full_frame_interval
+        self.preferred_format = preferred_format
+        self.jpeg_quality = jpeg_quality
+        self.full_size = None
+        self.roi = None
+        self.target_size = None
+        self.frames_since_full = 0
+        self.bytes_received = 0
+        self.frames_received = 0
+
+    def expand(self, box: Box) -> Box:
+        x, y, w, h = box
+        full_w, full_h = self.full_size
+        mx, my = int(w * self.margin), int(h * self.margin)
+        x0, y0 = max(0, x - mx), max(0, y - my)
+        x1, y1 = min(full_w, x + w + mx), min(full_h, y + h + my)
+        return (x0, y0, x1 - x0, y1 - y0)
+
+    def update(self, face_roi: Optional[Box], geometry: Optional[CropGeometry],
+               frame_shape: Tuple[int, ...], frame_bytes: int = 0) -> dict:
+        """Record the latest analysis and return the offer for the next frame."""
+        self.frames_received += 1
+        self.bytes_received += frame_bytes
+        if geometry is None:
+            self.full_size = (frame_shape[1], frame_shape[0])
+            self.frames_since_full = 0
+            full_box = face_roi
+        else:
+            if geometry.full_frame:
+                self.frames_since_full = 0
+            else:
+                self.frames_since_full += 1
+            self.full_size = geometry.full_size
+            full_box = geometry.to_full(face_roi) if face_roi is not None else None
+
+        if full_box is None or self.full_size is None:
+            self.roi = None
+            self.target_size = None
+        else:
+            self.roi = self.expand(full_box)
+            # Never upscale: small faces are sent at native resolution
+            scale = min(1.0, self.target_face_width / max(full_box[2], 1))
+            self.target_size = (max(1, int(round(self.roi[2] * scale))),
+                                max(1, int(round(self.roi[3] * scale))))
+        return self.offer()
+
+    def offer(self) -> dict:
+        if self.roi is None or self.frames_since_full >= self.full_frame_interval:
+            return {'mode': 'full'}
+        return {
+            'mode': 'crop',
+            'roi': list(self.roi),
+            'target_size': list(self.target_size),
+            'frame_size': list(self.full_size),
+            'formats': list(CROP_FORMATS),
+            'preferred_format': self.preferred_format,
+            'jpeg_quality': self.jpeg_quality,
+            'full_frame_in': self.full_frame_interval - self.frames_since_full,
+        }
+
+    def stats(self) -> dict:
+        return {
+            'frames_received': self.frames_received,
+            'avg_frame_bytes': self.bytes_received / self.frames_received if self.frames_received else 0.0,
+        }
@@ -0,0 +1,293 @@
+"""Interview state, frame analysis and recording helpers shared by the views.
+
+Nothing here touches the request, so the Flask views (web_views.py,
+analysis_views.py) and the ASGI layer (asgi.py) call the same functions.
+Functions that read settings or the database need an app context.
+"""
+import os
+from datetime import datetime
+
+from flask import current_app
+
+import recording_previews
+import scoring_versions
+from models import db, Interview, InterviewResponse, MetricSample, Question
+from scoring_names import EXPRESSION_CHANNELS
+from session_store import InterviewSessionStore, InterviewState
+from storage import MetricsWriteBuffer
+
+# Set up by the app factory for the roles that need them
+session_store = None
+metrics_buffer = None
+
+
+def init_session_store(app):
+    """Server-side cache of active interviews (user, topic, difficulty, question
+    pointer and analyzer), so hot API calls only touch the database to write."""
+    global session_store
+    session_store = InterviewSessionStore(
+        max_entries=app.config['MAX_ACTIVE_ANALYZERS'],
+        backing_path=app.config['SESSION_STORE_PATH']
+    )
+    return session_store
+
+
+def init_metrics_buffer(app):
+    """Batches high-frequency metric writes (and their timeline samples) into one
+    transaction per flush interval."""
+    global metrics_buffer
+    metrics_buffer = MetricsWriteBuffer(app, db, Interview, app.config['METRICS_FLUSH_INTERVAL_MS'],
+                                        sample_model=MetricSample)
+    return metrics_buffer
+
+
+# Interview state ------------------------------------------------------------
+
+def build_interview_state(interview):
+    questions = Question.query.filter_by(
+        topic=interview.topic,
+        difficulty=interview.difficulty
+    ).order_by(Question.question_order).all()
+    user = interview.user
+    return InterviewState(
+        interview.id,
+        user_id=interview.user_id,
+        user={'id': user.id, 'username': user.username, 'full_name': user.full_name} if user else None,
+        topic=interview.topic,
+        difficulty=interview.difficulty,
+        current_question=interview.current_question or 0,
+        questions=[{
+            'id': q.id,
+            'content': q.content,
+            'video_path': q.video_path,
+            'interviewer_video_path': q.interviewer_video_path,
+            'order': q.question_order
+        } for q in questions if q.question_order is not None]
+    )
+
+
+def load_interview_state(interview_id):
+    interview = Interview.query.get(interview_id)
+    return build_interview_state(interview) if interview else None
+
+
+def interview_state(interview_id):
+    return session_store.get(interview_id, load_interview_state)
+
+
+def owned_interview_state(interview_id, user_id):
+    """The interview's state if it exists and belongs to ``user_id``, else None."""
+    state = interview_state(interview_id)
+    return state if state is not None and state.user_id == user_id else None
+
+
+# Frame analysis -------------------------------------------------------------
+# The vision stack (OpenCV, NumPy and the analyzer modules) is imported on
+# first use, so processes that never analyze a frame skip it
+
+def prewarm_vision():
+    """Import the vision stack and load this thread's detector models now.
+
+    Call from analysis workers (post-fork hook, ASGI startup) so the first
+    frame doesn't pay for the OpenCV import and model loading.
+    """
+    import numpy as np
+    from facial_analysis import FacialExpressionAnalyzer
+    analyzer = FacialExpressionAnalyzer(detector=current_app.config['FACE_DETECTOR'])
+    analyzer.detector.detect(np.zeros((240, 320), dtype=np.uint8))
+    return analyzer.detector_name
+
+
+def create_analyzer():
+    from facial_analysis import FacialExpressionAnalyzer
+    from frame_gate import MotionGate
+    from frame_transport import FrameTransport
+
+    config = current_app.config
+    threshold = config['FRAME_GATE_THRESHOLD']
+    # Weights and thresholds of the active scoring version (scoring_versions.py)
+    scoring, expression_params = scoring_versions.active_config()
+    analyzer = FacialExpressionAnalyzer(
+        detector=config['FACE_DETECTOR'],
+        frame_gate=MotionGate(threshold=threshold) if threshold > 0 else None,
+        detection_width=config['DETECTION_WIDTH'],
+        scoring=scoring
+    )
+    for expression, params in (expression_params or {}).items():
+        analyzer.expression_params.setdefault(expression, {}).update(params)
+    # Crop negotiation state travels with the analyzer for the interview
+    analyzer.transport = FrameTransport(
+        target_face_width=config['TRANSPORT_FACE_WIDTH'],
+        full_frame_interval=config['TRANSPORT_FULL_FRAME_INTERVAL'],
+        preferred_format=config['TRANSPORT_FORMAT']
+    )
+    analyzer.default_mode = config['ANALYSIS_MODE']
+    return analyzer
+
+
+def get_interview_analyzer(key):
+    """The analyzer for an interview id, or for a ('user', id) scratch key.
+
+    One analyzer per active interview so smoothing, blink and frame-gate
+    state carry over between frames. Needs an app context on a cache miss.
+    """
+    state = session_store.get(key, load_interview_state if isinstance(key, int) else None)
+    if state is None:
+        # Analysis outside a stored interview, e.g. a camera check
+        state = session_store.put(InterviewState(key, user_id=key[1] if isinstance(key, tuple) else None))
+    with state.lock:
+        if state.analyzer is None:
+            state.analyzer = create_analyzer()
+    return state.analyzer
+
+
+def release_interview_analyzer(key):
+    session_store.discard(key)
+
+
+def analyze_frame(analyzer, frame_data, form):
+    """Decode and analyze one uploaded frame. Returns (result, status).
+
+    Does not touch the request, the database or the app context, so it can
+    run on any thread.
+    """
+    from facial_analysis import NO_FACE_EXPRESSIONS
+    from frame_transport import CROP_FORMATS, FrameError, decode_crop, decode_full_frame
+
+    # Negotiated clients send only the face region (see frame_transport.py)
+    geometry = None
+    if form.get('frame_format') in CROP_FORMATS:
+        try:
+            frame, geometry = decode_crop(frame_data, form)
+        except FrameError as e:
+            return {'error': str(e), 'transport': {'mode': 'full'}}, 400
+    else:
+        # Decode at 1/2, 1/4 or 1/8 size when the frame is larger than detection needs
+        frame, geometry = decode_full_frame(frame_data, analyzer.detection_width,
+                                            color=analyzer.detector.needs_color)
+        if frame is None:
+            return {'error': 'Could not decode frame'}, 400
+    mode = form.get('mode', analyzer.default_mode)
+
+    # Concurrent frames of one interview would interleave the analyzer's state
+    with analyzer.lock:
+        faces = None
+        if mode == 'multi':
+            # Per-person results; the largest face stays the headline result
+            faces = analyzer.detect_expressions_multi(frame, geometry)
+            if faces:
+                primary = max(faces, key=lambda f: f['box'][2] * f['box'][3])
+                expressions = primary['expressions']
+            else:
+                expressions = dict(NO_FACE_EXPRESSIONS)
+        else:
+            expressions = analyzer.detect_expression(frame, geometry)
+        metrics = analyzer.get_interview_metrics(expressions)
+
+        # Offer the face region and size the client should send next
+        transport = analyzer.transport.update(analyzer.last_face_roi, geometry, frame.shape, len(frame_data))
+
+        # Report how often the motion gate reused the previous analysis
+        skip_ratio = analyzer.frame_gate.skip_ratio if analyzer.frame_gate else 0.0
+        metrics['frame_skip_ratio'] = skip_ratio
+
+        result = {
+            'expressions': expressions,
+            'metrics': metrics,
+            'score_version': analyzer.scoring.version,
+            'frame_skipped': analyzer.last_frame_skipped,
+            'frame_skip_ratio': skip_ratio,
+            'transport': transport
+        }
+    if faces is not None:
+        result['faces'] = faces
+    return result, 200
+
+
+# Metrics and recordings -----------------------------------------------------
+
+def queue_metrics(interview_id, data):
+    """Hand client-reported metrics to the write buffer.
+
+    Clients forward the ``expressions`` and ``score_version`` of the analysis
+    the metrics came from; the raw expressions go on the timeline sample so
+    the interview can be re-scored later.
+    """
+    # Only overwrite the metrics the client actually sent
+    fields = {'confidence': 'confidence_score', 'stress': 'stress_level', 'engagement': 'engagement_score'}
+    values = {column: data[key] for key, column in fields.items() if key in data}
+    expressions = data.get('expressions')
+    raw = {}
+    if isinstance(expressions, dict):
+        raw = {channel: float(expressions[channel]) for channel in EXPRESSION_CHANNELS
+               if isinstance(expressions.get(channel), (int, float))}
+    if values:
+        values['score_version'] = str(data.get('score_version') or scoring_versions.active_version())[:32]
+        metrics_buffer.submit(interview_id, values, sample_values=raw)
+
+
+def allowed_video_file(filename):
+    ALLOWED_EXTENSIONS = {'mp4', 'webm', 'mov'}
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+
+def new_recording_path(user_id):
+    """Pick a file name for a new response recording; returns (filename, filepath)."""
+    # Create recordings directory if it doesn't exist
+    recordings_dir = os.path.join(current_app.config['UPLOAD_FOLDER'], str(user_id))
+    os.makedirs(recordings_dir, exist_ok=True)
+
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    filename = f'response_{timestamp}.webm'
+    return filename, os.path.join(recordings_dir, filename)
+
+
+def record_response(user_id, interview_id, question_id, filename, upload=None):
+    """Store the InterviewResponse for a saved recording. Returns (result, status).
+
+    ``upload`` is what recording_ingest measured: bytes and, for WebM, duration.
+    """
+    upload = upload or {}
+    try:
+        # Create interview response
+        response = InterviewResponse(
+            interview_id=interview_id,
+            question_id=question_id,
+            video_path=os.path.join(str(user_id), filename),
+            confidence_score=0.8,
+            technical_score=0.75,
+            communication_score=0.85,
+            emotional_state='neutral',
+            response_time=upload.get('duration') or 30,
+            video_bytes=upload.get('bytes'),
+            score_version=scoring_versions.active_version()
+        )
+        db.session.add(response)
+
+        # Update interview metrics
+        interview = Interview.query.get(interview_id)
+        if interview:
+            # Update average scores
+            responses = interview.responses
+            if responses:
+                interview.confidence_score = sum(r.confidence_score for r in responses) / len(responses)
+                interview.engagement_score = sum(r.technical_score + r.communication_score for r in responses) / (2 * len(responses))
+
+            db.session.commit()
+
+        # Poster and sprite for the history page, built in the background
+        recording_previews.queue_previews(response.video_path)
+
+        return {
+            'success': True,
+            'filename': filename,
+            'analysis': {
+                'technical_score': response.technical_score,
+                'communication_score': response.communication_score,
+                'confidence': response.confidence_score,
+                'stress_level': 0.3
+            }
+        }, 200
+    except Exception as e:
+        db.session.rollback()
+        return {'error': str(e)}, 500
@@ -0,0 +1,156 @@
+"""Prefetch manifests and server-side warming of question media.
+
+While question N is on screen the client is told which files question N+1
+will need (interviewer video rendition and question audio, with sizes and
+content hashes), so it can fetch them during the answer. On the server the
+same files are read ahead on a small thread pool: the reads pull them into
+the OS page cache (with ``posix_fadvise(WILLNEED)`` where available) and
+compute their SHA-256, kept in an LRU keyed by path, mtime and size.
+
+Media URLs carry ``?v=<hash prefix>``, so a prefetched response is reused
+for the real request and never goes stale when a file is replaced.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from flask import url_for
+
+import video_renditions
+
+STATIC_DIR = 'static'
+CHUNK_SIZE = 1024 * 1024
+# Per-question narration if present, else the shared clip synthesize_speech returns
+AUDIO_PATHS = ('audio/question_{id}.mp3', 'audio/question.mp3')
+
+
+class MediaWarmer:
+    """Content hashes of static media files, filled in by background read-ahead."""
+
+    def __init__(self, static_dir: str = STATIC_DIR, workers: int = 2, max_entries: int = 4096):
+        self.static_dir = static_dir
+        self.max_entries = max_entries
+        self.entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        self.warming = set()
+        self.lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='media-warm') if workers > 0 else None
+        self.files_warmed = 0
+        self.bytes_warmed = 0
+
+    def _stat(self, path: str):
+        try:
+            st = os.stat(os.path.join(self.static_dir, path))
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def describe(self, path: str) -> Optional[dict]:
+        """Size and (once warmed) SHA-256 of a static-relative file; None if missing."""
+        stat = self._stat(path)
+        if stat is None:
+            return None
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is not None and entry[:2] == stat:
+                self.entries.move_to_end(path)
+                return {'size': stat[1], 'sha256': entry[2]}
+        return {'size': stat[1], 'sha256': None}
+
+    def warm(self, paths: List[str]):
+        """Read ``paths`` ahead on the pool, skipping files already warm."""
+        if self.pool is None:
+            return
+        for path in paths:
+            stat = self._stat(path)
+            if stat is None:
+                continue
+            with self.lock:
+                entry = self.entries.get(path)
+                if path in self.warming or (entry is not None and entry[:2] == stat):
+                    continue
+                self.warming.add(path)
+            self.pool.submit(self._warm, path)
+
+    def _warm(self, path: str):
+        try:
+            digest = hashlib.sha256()
+            with open(os.path.join(self.static_dir, path), 'rb') as f:
+                st = os.fstat(f.fileno())
+                if hasattr(os, 'posix_fadvise'):
+                    os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+                while True:
+                    chunk = f.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+            with self.lock:
+                self.entries[path] = (st.st_mtime_ns, st.st_size, digest.hexdigest())
+                self.entries.move_to_end(path)
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+                self.files_warmed += 1
+                self.bytes_warmed += st.st_size
+        except Exception as e:
+            print(f"Error warming {path}: {str(e)}")
+        finally:
+            with self.lock:
+                self.warming.discard(path)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {'entries': len(self.entries), 'warming': len(self.warming),
+                    'files_warmed': self.files_warmed, 'bytes_warmed': self.bytes_warmed}
+
+
+# Set up by the app factory for the web role
+media_warmer: Optional[MediaWarmer] = None
+
+
+def init_media_warmer(app):
+    global media_warmer
+    media_warmer = MediaWarmer(workers=app.config['PREFETCH_WARM_WORKERS'])
+    return media_warmer
+
+
+def question_media(question: dict, bandwidth_kbps: Optional[float] = None) -> List[tuple]:
+    """(kind, static-relative path) of the files a question plays."""
+    media = []
+    video = question.get('interviewer_video_path')
+    if video:
+        manifest = video_renditions.load_manifest(video)
+        if manifest is not None:
+            video = video_renditions.choose_rendition(manifest, bandwidth_kbps)['path']
+        media.append(('video', video))
+    for pattern in AUDIO_PATHS:
+        audio = pattern.format(id=question['id'])
+        if os.path.exists(os.path.join(media_warmer.static_dir, audio)):
+            media.append(('audio', audio))
+            break
+    return media
+
+
+def warm_questions(questions: List[Optional[dict]], bandwidth_kbps: Optional[float] = None):
+    media_warmer.warm([path for question in questions if question
+                       for kind, path in question_media(question, bandwidth_kbps)])
+
+
+def prefetch_manifest(question: Optional[dict], bandwidth_kbps: Optional[float] = None) -> Optional[dict]:
+    """What the client should fetch for ``question`` ahead of time. Needs a request context."""
+    if question is None:
+        return None
+    media = []
+    for kind, path in question_media(question, bandwidth_kbps):
+        info = media_warmer.describe(path)
+        if info is None:
+            continue
+        version = {'v': info['sha256'][:16]} if info['sha256'] else {}
+        media.append({
+            'kind': kind,
+            'url': url_for('static', filename=path, **version),
+            'size': info['size'],
+            'sha256': info['sha256']
+        })
+    return {'question_id': question['id'], 'order': question['order'], 'media': media}
@@ -1,6 +1,8 @@
+import hashlib
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from datetime import datetime
+from sqlalchemy import event, inspect, select
 
 db = SQLAlchemy()
 
@@ -31,20 +33,49 @@ class Interview(db.Model):
     communication_score = db.Column(db.Float, default=0.0)
     stress_level = db.Column(db.Float, default=0.0)
     engagement_score = db.Column(db.Float, default=0.0)
+    score_version = db.Column(db.String(32))  # ScoringConfig version of the scores above
     duration = db.Column(db.Float, default=0.0)
     status = db.Column(db.String(20), default='pending')
     questions = db.relationship('Question', secondary='interview_questions')
     responses = db.relationship('InterviewResponse', backref='interview', lazy=True)
 
+def question_hash(topic, difficulty, content):
+    """Identity of a question for imports: topic, difficulty and whitespace/case-normalised content."""
+    normalized = ' '.join((content or '').lower().split())
+    return hashlib.sha256(f'{topic}\x1f{difficulty}\x1f{normalized}'.encode('utf-8')).hexdigest()
+
 class Question(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     topic = db.Column(db.String(50))
     difficulty = db.Column(db.String(20))
     content = db.Column(db.Text)
     category = db.Column(db.String(20))
+    keywords = db.Column(db.String(200))
     video_path = db.Column(db.String(200))  # For candidate's recorded response
     interviewer_video_path = db.Column(db.String(200))  # For interviewer's question video
     question_order = db.Column(db.Integer)  # Order in which question appears in interview
+    content_hash = db.Column(db.String(64), unique=True)  # Upsert key for bulk imports; NULL on duplicates
+
+@event.listens_for(Question, 'before_insert')
+def _hash_new_question(mapper, connection, target):
+    # Not a column default: that would also replace an explicit None, which
+    # is how a deliberately kept duplicate is stored
+    if not inspect(target).attrs.content_hash.history.added:
+        target.content_hash = question_hash(target.topic, target.difficulty, target.content)
+
+@event.listens_for(Question, 'before_update')
+def _rehash_question(mapper, connection, target):
+    # Only edits to what the hash covers; updating e.g. question_order must not
+    # touch legacy duplicates that keep a NULL hash
+    state = inspect(target)
+    if not any(state.attrs[name].history.has_changes() for name in ('topic', 'difficulty', 'content')):
+        return
+    content_hash = question_hash(target.topic, target.difficulty, target.content)
+    taken = connection.scalar(
+        select(Question.id).where(Question.content_hash == content_hash, Question.id != target.id).limit(1)
+    )
+    # Edited into a copy of another question: a NULL hash, like other duplicates
+    target.content_hash = None if taken else content_hash
 
 class InterviewerAvatar(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -54,6 +85,7 @@ class InterviewerAvatar(db.Model):
     avatar_type = db.Column(db.String(50))
     specialization = db.Column(db.String(50))
     description = db.Column(db.Text)
+    voice_id = db.Column(db.String(50))
 
 class InterviewResponse(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -63,9 +95,74 @@ class InterviewResponse(db.Model):
     confidence_score = db.Column(db.Float)
     technical_score = db.Column(db.Float)
     communication_score = db.Column(db.Float)
+    emotional_state = db.Column(db.String(20))
+    response_time = db.Column(db.Float)  # seconds
+    video_bytes = db.Column(db.Integer)  # counted against the recording quotas
+    compacted_at = db.Column(db.DateTime)  # re-encoded at a lower bitrate by recording_lifecycle
+    score_version = db.Column(db.String(32))  # ScoringConfig version of confidence_score
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     question = db.relationship('Question', backref='responses')
 
+class MetricSample(db.Model):
+    """One client-reported metrics update: the per-frame timeline of an interview."""
+    id = db.Column(db.Integer, primary_key=True)
+    interview_id = db.Column(db.Integer, db.ForeignKey('interview.id'), nullable=False, index=True)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    confidence_score = db.Column(db.Float)
+    stress_level = db.Column(db.Float)
+    engagement_score = db.Column(db.Float)
+    score_version = db.Column(db.String(32))
+    # Raw expression scores the metrics were computed from, so they can be re-scored
+    happy = db.Column(db.Float)
+    surprised = db.Column(db.Float)
+    confused = db.Column(db.Float)
+    neutral = db.Column(db.Float)
+    stressed = db.Column(db.Float)
+    confident = db.Column(db.Float)
+
+class ScoringConfig(db.Model):
+    """A version of the scoring model: metric weights plus expression thresholds.
+
+    ``model`` is ScoringModel.to_dict() as JSON; at most one row is active.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.String(32), unique=True, nullable=False)
+    model = db.Column(db.Text, nullable=False)
+    expression_params = db.Column(db.Text)  # JSON overrides for FacialExpressionAnalyzer.expression_params
+    active = db.Column(db.Boolean, default=False, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class ScoreStaging(db.Model):
+    """Re-scored values waiting to be swapped into Interview/InterviewResponse."""
+    __table_args__ = (db.Index('ix_score_staging_lookup', 'version', 'target', 'row_id'),)
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.String(32), nullable=False)
+    target = db.Column(db.String(10), nullable=False)  # 'interview' or 'response'
+    row_id = db.Column(db.Integer, nullable=False)
+    confidence_score = db.Column(db.Float)
+    stress_level = db.Column(db.Float)
+    engagement_score = db.Column(db.Float)
+
+class ScoreBin(db.Model):
+    """Count of completed interviews per score bin, per topic/difficulty and metric.
+
+    Maintained by score_stats.py so percentile ranks never scan Interview.
+    """
+    __table_args__ = (db.UniqueConstraint('topic', 'difficulty', 'metric', 'bin'),)
+    id = db.Column(db.Integer, primary_key=True)
+    topic = db.Column(db.String(50), nullable=False)
+    difficulty = db.Column(db.String(20), nullable=False)
+    metric = db.Column(db.String(30), nullable=False)
+    bin = db.Column(db.Integer, nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+class InterviewVideo(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    question_id = db.Column(db.Integer, db.ForeignKey('question.id'), nullable=False)
+    video_url = db.Column(db.String(200))
+    uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
+
 # Association table for Interview-Question relationship
 interview_questions = db.Table('interview_questions',
     db.Column('interview_id', db.Integer, db.ForeignKey('interview.id'), primary_key=True),
@@ -0,0 +1,260 @@
+"""Recordings replayed with the analysis overlay, rendered on demand and cached.
+
+A render streams the recording frame by frame through OpenCV. The overlay is
+drawn from the interview's stored MetricSample timeline; nothing is
+re-detected. Each frame gets the values current at its timestamp (drawn with
+``FacialExpressionAnalyzer.draw_debug_info``) and a strip along the bottom
+with the whole answer's timeline and a playhead. The annotated video is VP8
+WebM. With ffmpeg on the PATH the recording's audio is muxed back in.
+
+Artifacts live in ``OVERLAY_CACHE_DIR`` as ``<key>.webm``. The key hashes
+the recording's content, ``OVERLAY_VERSION`` and the samples drawn, so a
+re-encoded recording, a changed overlay or late metrics render afresh. The
+oldest artifacts are pruned past ``OVERLAY_CACHE_MB``. Job state is kept per
+process; the artifact on disk is what every process agrees on.
+"""
+import hashlib
+import os
+import shutil
+import subprocess
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import select
+
+from models import db, MetricSample
+
+# Bump when the drawing changes so cached renders are replaced
+OVERLAY_VERSION = 1
+METRICS = ('confidence_score', 'stress_level', 'engagement_score')
+METRIC_COLOURS = {'confidence_score': (80, 200, 80), 'stress_level': (60, 60, 230), 'engagement_score': (230, 160, 40)}
+STRIP_HEIGHT = 48
+# Metrics arrive while the candidate answers; allow for client/server clock skew
+SAMPLE_SLACK = timedelta(seconds=5)
+
+
+def file_digest(path: str, _memo: 'OrderedDict[tuple, str]' = OrderedDict(), _lock=threading.Lock()) -> str:
+    """SHA-256 of a file, remembered by path, mtime and size."""
+    st = os.stat(path)
+    memo_key = (path, st.st_mtime_ns, st.st_size)
+    with _lock:
+        if memo_key in _memo:
+            _memo.move_to_end(memo_key)
+            return _memo[memo_key]
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    with _lock:
+        _memo[memo_key] = digest.hexdigest()
+        while len(_memo) > 1024:
+            _memo.popitem(last=False)
+    return _memo[memo_key]
+
+
+def response_timeline(response) -> dict:
+    """The MetricSample values recorded during a response, against seconds into it.
+
+    The recording ends when the response is stored and lasts ``response_time``.
+    """
+    # NumPy (like OpenCV) is imported on use, so web processes don't load it at startup
+    import numpy as np
+    end = response.timestamp
+    start = end - timedelta(seconds=response.response_time or 0)
+    rows = db.session.execute(
+        select(MetricSample.id, MetricSample.timestamp, *(getattr(MetricSample, m) for m in METRICS))
+        .where(MetricSample.interview_id == response.interview_id,
+               MetricSample.timestamp >= start - SAMPLE_SLACK, MetricSample.timestamp <= end)
+        .order_by(MetricSample.timestamp, MetricSample.id)
+    ).all()
+    timeline = {'ids': np.array([row[0] for row in rows], dtype=np.int64),
+                't': np.array([(row[1] - start).total_seconds() for row in rows], dtype=np.float64),
+                'duration': float(response.response_time or 0)}
+    for i, metric in enumerate(METRICS, start=2):
+        timeline[metric] = np.array([np.nan if row[i] is None else row[i] for row in rows], dtype=np.float64)
+    return timeline
+
+
+def overlay_key(recording: str, timeline: dict) -> str:
+    digest = hashlib.sha256(f'{file_digest(recording)}:{OVERLAY_VERSION}:'.encode())
+    digest.update(timeline['ids'].tobytes())
+    return digest.hexdigest()[:24]
+
+
+def _timeline_strip(timeline: dict, width: int, duration: float):
+    """The whole answer's metrics as polylines on a dark band, drawn once per render."""
+    import cv2
+    import numpy as np
+    strip = np.full((STRIP_HEIGHT, width, 3), 24, dtype=np.uint8)
+    if len(timeline['t']) == 0 or duration <= 0:
+        return strip
+    xs = np.clip(timeline['t'] / duration * (width - 1), 0, width - 1)
+    for metric in METRICS:
+        values = timeline[metric]
+        keep = ~np.isnan(values)
+        if keep.sum() < 2:
+            continue
+        ys = (STRIP_HEIGHT - 4) - np.clip(values[keep], 0, 1) * (STRIP_HEIGHT - 8)
+        points = np.stack([xs[keep], ys], axis=1).round().astype(np.int32)
+        cv2.polylines(strip, [points], False, METRIC_COLOURS[metric], 1, cv2.LINE_AA)
+    return strip
+
+
+def render(recording: str, target: str, timeline: dict, progress=None):
+    """Write ``recording`` with the overlay to ``target`` (WebM). ``progress(fraction)`` is optional."""
+    import cv2
+    import numpy as np
+    from facial_analysis import FacialExpressionAnalyzer
+
+    capture = cv2.VideoCapture(recording)
+    if not capture.isOpened():
+        raise ValueError('Could not open recording')
+    fps = capture.get(cv2.CAP_PROP_FPS)
+    if not 1 <= fps <= 120:
+        # MediaRecorder WebM often reports a timebase here, not a frame rate
+        fps = 30.0
+    width, height = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)), int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    total = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+    duration = timeline['duration'] or (total / fps if total > 0 else 0)
+    if total <= 0:
+        total = int(duration * fps)
+    strip = _timeline_strip(timeline, width, duration)
+    band = slice(height - STRIP_HEIGHT, height)
+
+    video_only = target + '.video.webm'
+    writer = cv2.VideoWriter(video_only, cv2.VideoWriter_fourcc(*'VP80'), fps, (width, height))
+    try:
+        if not writer.isOpened():
+            raise RuntimeError('OpenCV cannot write VP8 WebM')
+        frames = 0
+        while True:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            t = capture.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+            i = int(np.searchsorted(timeline['t'], t, side='right')) - 1
+            values = {metric.split('_')[0]: timeline[metric][i] for metric in METRICS
+                      if i >= 0 and not np.isnan(timeline[metric][i])}
+            FacialExpressionAnalyzer.draw_debug_info(frame, None, values)
+            if height > STRIP_HEIGHT:
+                frame[band] = cv2.addWeighted(frame[band], 0.35, strip, 0.65, 0)
+                x = int(min(t / duration, 1.0) * (width - 1)) if duration else 0
+                cv2.line(frame, (x, height - STRIP_HEIGHT), (x, height - 1), (255, 255, 255), 1)
+            writer.write(frame)
+            frames += 1
+            if progress is not None and frames % 30 == 0 and total:
+                progress(min(frames / total, 0.99))
+    finally:
+        capture.release()
+        writer.release()
+
+    try:
+        if frames == 0:
+            raise ValueError('No frames decoded')
+        if shutil.which('ffmpeg'):
+            # Put the candidate's audio back; the video stream is copied as is
+            subprocess.run(['ffmpeg', '-y', '-v', 'error', '-i', video_only, '-i', recording,
+                            '-map', '0:v', '-map', '1:a?', '-c:v', 'copy', '-c:a', 'libopus', '-shortest',
+                            target + '.tmp.webm'], check=True, capture_output=True)
+            os.replace(target + '.tmp.webm', target)
+        else:
+            os.replace(video_only, target)
+    finally:
+        for leftover in (video_only, target + '.tmp.webm'):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+
+class OverlayRenderer:
+    """Render jobs keyed by artifact key, at most ``workers`` at a time."""
+
+    def __init__(self, root: str, workers: int = 1, cache_dir: str = 'overlay_cache', cache_mb: int = 2048):
+        self.root = root
+        self.cache_dir = cache_dir
+        self.cache_bytes = cache_mb * 1024 * 1024
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='overlay')
+        self.lock = threading.Lock()
+        self.jobs: Dict[str, dict] = {}
+
+    def artifact(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f'{key}.webm')
+
+    def prepare(self, response) -> dict:
+        """Key and sample timeline for a response. Needs an app context."""
+        recording = os.path.join(self.root, response.video_path)
+        timeline = response_timeline(response)
+        return {'recording': recording, 'timeline': timeline, 'key': overlay_key(recording, timeline)}
+
+    def status(self, key: str) -> dict:
+        """State of the job for ``key``; 'missing' if it was never started here."""
+        if os.path.exists(self.artifact(key)):
+            return {'key': key, 'status': 'done', 'progress': 1.0, 'error': None}
+        with self.lock:
+            job = self.jobs.get(key)
+            return dict(job) if job else {'key': key, 'status': 'missing', 'progress': 0.0, 'error': None}
+
+    def submit(self, prepared: dict) -> dict:
+        """Start rendering a prepared response unless it is cached or running."""
+        key = prepared['key']
+        with self.lock:
+            if os.path.exists(self.artifact(key)):
+                # Freshen it so pruning drops renders nobody asks for first
+                os.utime(self.artifact(key))
+                return {'key': key, 'status': 'done', 'progress': 1.0, 'error': None}
+            job = self.jobs.get(key)
+            if job is not None and job['status'] in ('queued', 'running'):
+                return dict(job)
+            job = self.jobs[key] = {'key': key, 'status': 'queued', 'progress': 0.0, 'error': None}
+        self.pool.submit(self._run, prepared)
+        return dict(job)
+
+    def _update(self, key: str, **values):
+        with self.lock:
+            self.jobs[key].update(values)
+
+    def _run(self, prepared: dict):
+        key = prepared['key']
+        self._update(key, status='running')
+        target = self.artifact(key)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            render(prepared['recording'], target + '.part', prepared['timeline'],
+                   progress=lambda fraction: self._update(key, progress=round(fraction, 3)))
+            os.replace(target + '.part', target)
+            self._update(key, status='done', progress=1.0)
+            self.prune()
+        except Exception as e:
+            print(f"Error rendering overlay {key}: {str(e)}")
+            self._update(key, status='failed', error=str(e))
+            if os.path.exists(target + '.part'):
+                os.remove(target + '.part')
+
+    def prune(self):
+        """Drop the least recently requested artifacts beyond the cache size."""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            # Skip renders still being written (<key>.webm.part...)
+            if entry.name.endswith('.webm') and '.part' not in entry.name and entry.is_file():
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.cache_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+
+# Set up by the app factory for the web role (OVERLAY_WORKERS > 0)
+overlay_renderer: Optional[OverlayRenderer] = None
+
+
+def init_overlay_renderer(app):
+    global overlay_renderer
+    workers = app.config['OVERLAY_WORKERS']
+    overlay_renderer = OverlayRenderer(app.config['UPLOAD_FOLDER'], workers, app.config['OVERLAY_CACHE_DIR'],
+                                       app.config['OVERLAY_CACHE_MB']) if workers > 0 else None
+    return overlay_renderer
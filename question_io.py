@@ -0,0 +1,253 @@
+"""Bulk import and export of question packs (JSONL or CSV).
+
+Import reads the pack once, validating each record as it streams past.
+Valid records are upserted in batches, one transaction per batch, keyed on
+``Question.content_hash``: one SELECT for the hashes that already exist,
+then one bulk INSERT and one bulk UPDATE. Interviewer videos named in the
+pack are copied into the static folder by a thread pool while the batch is
+prepared. A failed run can simply be repeated; committed batches are
+matched by hash and updated rather than duplicated.
+
+Export streams the bank in id order in the same record format, so an
+exported pack imports back unchanged.
+"""
+import csv
+import io
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert, select, update
+
+from models import db, Question, question_hash
+
+FIELDS = ('topic', 'difficulty', 'content', 'category', 'keywords', 'question_order', 'interviewer_video')
+REQUIRED_FIELDS = ('topic', 'difficulty', 'content')
+MAX_LENGTHS = {'topic': 50, 'difficulty': 20, 'category': 20, 'keywords': 200}
+VIDEO_EXTENSIONS = {'mp4', 'webm', 'mov'}
+INTERVIEWER_VIDEO_DIR = os.path.join('static', 'interviewer_videos')
+
+
+class PackError(ValueError):
+    """A record in a question pack that cannot be imported."""
+
+
+def detect_format(path: str, fmt: Optional[str] = None) -> str:
+    if fmt:
+        return fmt
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+
+def read_records(stream, fmt: str) -> Iterator[Tuple[int, object]]:
+    """(line number, raw record) pairs; JSONL lines are parsed during validation."""
+    if fmt == 'csv':
+        # Line 1 is the header
+        for line_no, row in enumerate(csv.DictReader(stream), start=2):
+            yield line_no, row
+    else:
+        for line_no, line in enumerate(stream, start=1):
+            if line.strip():
+                yield line_no, line
+
+
+def validate_record(raw) -> dict:
+    """Normalise one raw record to Question columns; raises PackError."""
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except json.JSONDecodeError as e:
+            raise PackError(f'Invalid JSON: {e.msg}')
+    if not isinstance(raw, dict):
+        raise PackError('Record is not an object')
+
+    record = {}
+    for field in FIELDS:
+        value = raw.get(field)
+        if isinstance(value, str):
+            value = value.strip()
+        if value in (None, ''):
+            if field in REQUIRED_FIELDS:
+                raise PackError(f"Missing '{field}'")
+            continue
+        if field == 'keywords' and isinstance(value, list):
+            value = ', '.join(str(k).strip() for k in value)
+        if field == 'question_order':
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                raise PackError(f"'question_order' must be an integer, got {value!r}")
+        elif not isinstance(value, str):
+            raise PackError(f"'{field}' must be a string")
+        if field in MAX_LENGTHS and len(value) > MAX_LENGTHS[field]:
+            raise PackError(f"'{field}' is longer than {MAX_LENGTHS[field]} characters")
+        if field == 'interviewer_video' and value.rsplit('.', 1)[-1].lower() not in VIDEO_EXTENSIONS:
+            raise PackError(f"Unsupported video format: {value}")
+        record[field] = value
+
+    record['content_hash'] = question_hash(record['topic'], record['difficulty'], record['content'])
+    return record
+
+
+def attach_video(source: str, content_hash: str, video_root: Optional[str], video_dir: str) -> str:
+    """Copy a pack video into ``video_dir``; returns the path stored on the question.
+
+    Files are named by question hash, so re-importing a pack skips videos
+    that are already in place.
+    """
+    path = source if os.path.isabs(source) or not video_root else os.path.join(video_root, source)
+    filename = f"interviewer_{content_hash[:16]}.{path.rsplit('.', 1)[-1].lower()}"
+    target = os.path.join(video_dir, filename)
+    if not (os.path.exists(target) and os.path.getsize(target) == os.path.getsize(path)):
+        shutil.copyfile(path, target + '.tmp')
+        os.replace(target + '.tmp', target)
+    return os.path.join(os.path.basename(video_dir), filename)
+
+
+def backfill_content_hashes() -> int:
+    """Hash questions stored before content_hash existed; returns the rows updated.
+
+    Rows duplicating an already hashed question keep a NULL hash (the unique
+    index allows several), so they are never matched by imports.
+    """
+    seen = set(db.session.scalars(select(Question.content_hash).where(Question.content_hash.isnot(None))))
+    rows = []
+    for id_, topic, difficulty, content in db.session.execute(
+        select(Question.id, Question.topic, Question.difficulty, Question.content).where(Question.content_hash.is_(None))
+    ):
+        content_hash = question_hash(topic, difficulty, content)
+        if content_hash not in seen:
+            seen.add(content_hash)
+            rows.append({'id': id_, 'content_hash': content_hash})
+    if rows:
+        db.session.execute(update(Question), rows)
+    db.session.commit()
+    return len(rows)
+
+
+def _write_batch(batch: List[Tuple[int, dict]], pool, video_root, video_dir, stats):
+    # Later records for the same question win, as they would one at a time
+    records = {record['content_hash']: (line_no, record) for line_no, record in batch}
+    videos = {
+        content_hash: pool.submit(attach_video, record['interviewer_video'], content_hash, video_root, video_dir)
+        for content_hash, (line_no, record) in records.items() if 'interviewer_video' in record
+    }
+    existing = dict(db.session.execute(
+        select(Question.content_hash, Question.id).where(Question.content_hash.in_(list(records)))
+    ).all())
+
+    new_rows, changed_rows = [], []
+    for content_hash, (line_no, record) in records.items():
+        values = {k: v for k, v in record.items() if k != 'interviewer_video'}
+        if content_hash in videos:
+            try:
+                values['interviewer_video_path'] = videos[content_hash].result()
+                stats['videos'] += 1
+            except OSError as e:
+                # Import the question anyway; the video can be attached later
+                stats['errors'].append((line_no, f'Video not attached: {str(e)}'))
+        if content_hash in existing:
+            values['id'] = existing[content_hash]
+            changed_rows.append(values)
+        else:
+            new_rows.append(values)
+
+    try:
+        if new_rows:
+            db.session.execute(insert(Question), new_rows)
+        if changed_rows:
+            db.session.execute(update(Question), changed_rows)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    stats['inserted'] += len(new_rows)
+    stats['updated'] += len(changed_rows)
+
+
+def import_questions(path: str, fmt: Optional[str] = None, batch_size: int = 5000,
+                     video_root: Optional[str] = None, video_dir: str = INTERVIEWER_VIDEO_DIR,
+                     workers: int = 8, dry_run: bool = False, max_errors: int = 100) -> dict:
+    """Validate and upsert a question pack. Needs an app context.
+
+    Returns counts plus the first ``max_errors`` (line, message) problems.
+    With ``dry_run`` the pack is only validated.
+    """
+    fmt = detect_format(path, fmt)
+    stats = {'read': 0, 'inserted': 0, 'updated': 0, 'invalid': 0, 'videos': 0, 'errors': []}
+    started = time.perf_counter()
+    if not dry_run:
+        backfill_content_hashes()
+        os.makedirs(video_dir, exist_ok=True)
+
+    with open(path, newline='' if fmt == 'csv' else None, encoding='utf-8') as stream, \
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix='question-import') as pool:
+        batch = []
+        for line_no, raw in read_records(stream, fmt):
+            stats['read'] += 1
+            try:
+                batch.append((line_no, validate_record(raw)))
+            except PackError as e:
+                stats['invalid'] += 1
+                if len(stats['errors']) < max_errors:
+                    stats['errors'].append((line_no, str(e)))
+                continue
+            if len(batch) >= batch_size:
+                if not dry_run:
+                    _write_batch(batch, pool, video_root, video_dir, stats)
+                batch = []
+        if batch and not dry_run:
+            _write_batch(batch, pool, video_root, video_dir, stats)
+
+    # Bulk statements bypass the ORM change tracking the near-duplicate index listens to
+    import question_search
+    question_search.similarity_index.mark_stale()
+    stats['seconds'] = time.perf_counter() - started
+    return stats
+
+
+def iter_export(fmt: str = 'jsonl', topic: Optional[str] = None, difficulty: Optional[str] = None,
+                chunk_size: int = 1000) -> Iterator[str]:
+    """The question bank as JSONL or CSV text, one chunk of rows at a time."""
+    columns = (Question.topic, Question.difficulty, Question.content, Question.category,
+               Question.keywords, Question.question_order, Question.interviewer_video_path)
+    filters = [Question.topic == topic] if topic else []
+    if difficulty:
+        filters.append(Question.difficulty == difficulty)
+
+    if fmt == 'csv':
+        header = io.StringIO()
+        csv.writer(header).writerow(FIELDS)
+        yield header.getvalue()
+
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            select(Question.id, *columns).where(Question.id > last_id, *filters).order_by(Question.id).limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        buffer = io.StringIO()
+        if fmt == 'csv':
+            writer = csv.writer(buffer)
+            for row in rows:
+                writer.writerow(['' if v is None else v for v in row[1:]])
+        else:
+            for row in rows:
+                record = {field: value for field, value in zip(FIELDS, row[1:]) if value is not None}
+                buffer.write(json.dumps(record, ensure_ascii=False) + '\n')
+        yield buffer.getvalue()
+        if len(rows) < chunk_size:
+            break
+
+
+def export_questions(out, fmt: str = 'jsonl', topic: Optional[str] = None, difficulty: Optional[str] = None) -> int:
+    """Write the bank to the open text stream ``out``; returns the characters written."""
+    written = 0
+    for chunk in iter_export(fmt, topic, difficulty):
+        out.write(chunk)
+        written += len(chunk)
+    return written
@@ -0,0 +1,228 @@
+"""Question bank search: SQLite FTS5 with topic/difficulty facets, plus a
+TF-IDF similarity index for spotting near-duplicate questions.
+
+``question_fts`` is an external-content FTS5 table over ``question.content``
+and ``question.keywords``, kept in sync by triggers, so searches never scan
+the question table. Databases without FTS5 fall back to LIKE matching.
+"""
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event, or_, text
+from sqlalchemy.orm import Session
+
+from models import db, Question
+
+FTS_TABLE = 'question_fts'
+FTS_SETUP = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        content, keywords, content='question', content_rowid='id', tokenize='porter unicode61')""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON question BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, content, keywords) VALUES (new.id, new.content, new.keywords);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON question BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content, keywords)
+        VALUES ('delete', old.id, old.content, old.keywords);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF content, keywords ON question BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content, keywords)
+        VALUES ('delete', old.id, old.content, old.keywords);
+        INSERT INTO {FTS_TABLE}(rowid, content, keywords) VALUES (new.id, new.content, new.keywords);
+    END""",
+]
+
+_fts_engines = set()
+
+
+def setup_search(engine) -> bool:
+    """Create the FTS5 table and sync triggers if missing. Returns False without FTS5.
+
+    The index is rebuilt when the triggers are new, e.g. after ``drop_all``
+    recreated the question table underneath an existing FTS table.
+    """
+    if engine.dialect.name != 'sqlite':
+        return False
+    try:
+        with engine.begin() as conn:
+            existing = conn.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = :name"
+            ), {'name': f'{FTS_TABLE}_ai'}).first()
+            for statement in FTS_SETUP:
+                conn.execute(text(statement))
+            if existing is None:
+                conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+    except Exception as e:
+        # SQLite builds without FTS5 keep working with the LIKE fallback
+        print(f"Error setting up question search: {str(e)}")
+        return False
+    _fts_engines.add(engine.url)
+    return True
+
+
+def tokenize(query: str) -> List[str]:
+    return re.findall(r'\w+', query.lower())
+
+
+def match_expression(terms: List[str]) -> str:
+    # Every term must match, each as a prefix; quoting keeps FTS syntax out of user input
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def _facets(rows, topic: Optional[str], difficulty: Optional[str]) -> Dict[str, Dict[str, int]]:
+    """Counts per topic (within the difficulty filter) and per difficulty (within the topic filter)."""
+    facets = {'topic': {}, 'difficulty': {}}
+    for row_topic, row_difficulty, count in rows:
+        if difficulty is None or row_difficulty == difficulty:
+            facets['topic'][row_topic] = facets['topic'].get(row_topic, 0) + count
+        if topic is None or row_topic == topic:
+            facets['difficulty'][row_difficulty] = facets['difficulty'].get(row_difficulty, 0) + count
+    return facets
+
+
+def search(query: str, topic: Optional[str] = None, difficulty: Optional[str] = None,
+           limit: int = 50, offset: int = 0) -> Tuple[List[Question], int, Dict[str, Dict[str, int]]]:
+    """Questions matching ``query``, best first. Returns (questions, total, facets)."""
+    terms = tokenize(query or '')
+    filters = {'topic': topic, 'difficulty': difficulty}
+    filter_sql = ''.join(f' AND q.{name} = :{name}' for name, value in filters.items() if value)
+
+    if not terms:
+        base = Question.query
+        if topic:
+            base = base.filter(Question.topic == topic)
+        if difficulty:
+            base = base.filter(Question.difficulty == difficulty)
+        total = base.count()
+        questions = base.order_by(Question.topic, Question.difficulty, Question.question_order) \
+            .limit(limit).offset(offset).all()
+        facet_rows = db.session.query(Question.topic, Question.difficulty, db.func.count()) \
+            .group_by(Question.topic, Question.difficulty).all()
+        return questions, total, _facets(facet_rows, topic, difficulty)
+
+    if db.engine.url in _fts_engines:
+        params = dict(filters, match=match_expression(terms))
+        joined = f'FROM {FTS_TABLE} JOIN question q ON q.id = {FTS_TABLE}.rowid WHERE {FTS_TABLE} MATCH :match'
+        ids = [row[0] for row in db.session.execute(text(
+            f'SELECT q.id {joined}{filter_sql} ORDER BY bm25({FTS_TABLE}) LIMIT :limit OFFSET :offset'
+        ), dict(params, limit=limit, offset=offset))]
+        facet_rows = db.session.execute(text(
+            f'SELECT q.topic, q.difficulty, count(*) {joined} GROUP BY q.topic, q.difficulty'
+        ), params).all()
+    else:
+        matches = [or_(Question.content.ilike(f'%{term}%'), Question.keywords.ilike(f'%{term}%')) for term in terms]
+        ids = [row[0] for row in db.session.query(Question.id).filter(*matches).filter(
+            *[getattr(Question, name) == value for name, value in filters.items() if value]
+        ).order_by(Question.id).limit(limit).offset(offset)]
+        facet_rows = db.session.query(Question.topic, Question.difficulty, db.func.count()) \
+            .filter(*matches).group_by(Question.topic, Question.difficulty).all()
+
+    by_id = {q.id: q for q in Question.query.filter(Question.id.in_(ids))} if ids else {}
+    facets = _facets(facet_rows, topic, difficulty)
+    total = sum(count for row_topic, row_difficulty, count in facet_rows
+                if (not topic or row_topic == topic) and (not difficulty or row_difficulty == difficulty))
+    return [by_id[i] for i in ids if i in by_id], total, facets
+
+
+class SimilarityIndex:
+    """TF-IDF vectors of every question, for cosine top-k near-duplicate lookups.
+
+    Vectors are L2-normalised and kept as a CSR matrix in plain NumPy arrays,
+    so memory grows with the number of words rather than questions x vocabulary.
+    Built lazily, rebuilt after the question bank changes (in this process)
+    or after ``ttl_seconds`` (for changes made by other processes).
+    """
+
+    def __init__(self, ttl_seconds: float = 300):
+        self.ttl_seconds = ttl_seconds
+        self.lock = threading.Lock()
+        self.built_at = None
+        self.stale = True
+
+    def mark_stale(self):
+        self.stale = True
+
+    def _build(self):
+        import numpy as np
+
+        rows = db.session.query(Question.id, Question.topic, Question.difficulty, Question.content).all()
+        vocabulary: Dict[str, int] = {}
+        documents = []
+        for row in rows:
+            counts: Dict[int, int] = {}
+            for term in tokenize(row.content or ''):
+                index = vocabulary.setdefault(term, len(vocabulary))
+                counts[index] = counts.get(index, 0) + 1
+            documents.append(counts)
+
+        df = np.zeros(len(vocabulary), dtype=np.float32)
+        for counts in documents:
+            df[list(counts)] += 1
+        # Smoothed IDF, as in scikit-learn
+        idf = np.log((1 + len(documents)) / (1 + df)) + 1
+
+        indptr = np.zeros(len(documents) + 1, dtype=np.int64)
+        indices, data = [], []
+        for i, counts in enumerate(documents):
+            terms = np.fromiter(counts, dtype=np.int64, count=len(counts))
+            weights = np.fromiter(counts.values(), dtype=np.float32, count=len(counts)) * idf[terms]
+            norm = np.linalg.norm(weights)
+            indices.append(terms)
+            data.append(weights / norm if norm else weights)
+            indptr[i + 1] = indptr[i] + len(counts)
+
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.indptr = indptr
+        self.indices = np.concatenate(indices) if indices else np.zeros(0, dtype=np.int64)
+        self.data = np.concatenate(data) if data else np.zeros(0, dtype=np.float32)
+        self.questions = [(row.id, row.topic, row.difficulty, row.content) for row in rows]
+        self.built_at = time.time()
+        self.stale = False
+
+    def similar(self, content: str, top_k: int = 5, min_score: float = 0.0) -> List[dict]:
+        """The ``top_k`` most similar questions with cosine similarity >= ``min_score``."""
+        import numpy as np
+
+        with self.lock:
+            if self.stale or self.built_at is None or time.time() - self.built_at > self.ttl_seconds:
+                self._build()
+            vocabulary, idf, questions = self.vocabulary, self.idf, self.questions
+            indptr, indices, data = self.indptr, self.indices, self.data
+
+        query = np.zeros(len(vocabulary), dtype=np.float32)
+        for term in tokenize(content or ''):
+            if term in vocabulary:
+                query[vocabulary[term]] += 1
+        query *= idf
+        norm = np.linalg.norm(query)
+        if not questions or norm == 0:
+            return []
+        query /= norm
+
+        # Row-wise sparse dot products; empty rows have no entries and score 0
+        products = data * query[indices]
+        scores = np.zeros(len(questions), dtype=np.float32)
+        nonempty = np.flatnonzero(np.diff(indptr))
+        if len(nonempty):
+            scores[nonempty] = np.add.reduceat(products, indptr[nonempty])
+        top = np.argsort(-scores)[:top_k]
+        return [{
+            'id': questions[i][0],
+            'topic': questions[i][1],
+            'difficulty': questions[i][2],
+            'content': questions[i][3],
+            'similarity': round(float(scores[i]), 4)
+        } for i in top if scores[i] >= min_score and scores[i] > 0]
+
+
+similarity_index = SimilarityIndex()
+
+
+@event.listens_for(Session, 'after_flush')
+def _mark_similarity_stale(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Question):
+            similarity_index.mark_stale()
+            return
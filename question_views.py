@@ -0,0 +1,185 @@
+"""Question bank management pages."""
+import os
+from datetime import datetime
+
+from flask import (Blueprint, Response, current_app, flash, jsonify, redirect, render_template, request,
+                   stream_with_context, url_for)
+from werkzeug.utils import secure_filename
+
+import question_io
+import question_search
+import video_renditions
+from auth import login_required
+from models import db, Question, question_hash
+
+bp = Blueprint('questions', __name__)
+
+@bp.route('/manage-questions')
+@login_required
+def manage_questions():
+    # Search and facet filters instead of one long list of the whole bank
+    query = request.args.get('q', '')
+    topic = request.args.get('topic') or None
+    difficulty = request.args.get('difficulty') or None
+    page = max(1, request.args.get('page', 1, type=int))
+    per_page = current_app.config['QUESTIONS_PER_PAGE']
+    questions, total, facets = question_search.search(query, topic, difficulty,
+                                                      limit=per_page, offset=(page - 1) * per_page)
+    return render_template('manage_questions.html', questions=questions, query=query, topic=topic,
+                           difficulty=difficulty, facets=facets, total=total, page=page, per_page=per_page)
+
+@bp.route('/api/questions/search')
+@login_required
+def search_questions():
+    questions, total, facets = question_search.search(
+        request.args.get('q', ''),
+        request.args.get('topic') or None,
+        request.args.get('difficulty') or None,
+        limit=min(request.args.get('limit', 20, type=int), 100),
+        offset=max(0, request.args.get('offset', 0, type=int))
+    )
+    return jsonify({
+        'total': total,
+        'facets': facets,
+        'questions': [{
+            'id': q.id,
+            'topic': q.topic,
+            'difficulty': q.difficulty,
+            'category': q.category,
+            'content': q.content
+        } for q in questions]
+    })
+
+@bp.route('/api/questions/similar', methods=['POST'])
+@login_required
+def similar_questions():
+    """Near-duplicates of a draft question, for checking while it is typed."""
+    data = request.get_json(silent=True) or {}
+    if not data.get('content'):
+        return jsonify({'error': 'No content provided'}), 400
+    return jsonify({'similar': question_search.similarity_index.similar(data['content'], top_k=5)})
+
+@bp.route('/export-questions')
+@login_required
+def export_questions():
+    """Download the (filtered) bank as a JSONL or CSV pack, streamed in chunks."""
+    fmt = 'csv' if request.args.get('format') == 'csv' else 'jsonl'
+    chunks = question_io.iter_export(fmt, request.args.get('topic') or None, request.args.get('difficulty') or None)
+    return Response(stream_with_context(chunks),
+                    mimetype='text/csv' if fmt == 'csv' else 'application/x-ndjson',
+                    headers={'Content-Disposition': f'attachment; filename=questions.{fmt}'})
+
+@bp.route('/add-question', methods=['GET', 'POST'])
+@login_required
+def add_question():
+    if request.method == 'POST':
+        topic = request.form.get('topic')
+        difficulty = request.form.get('difficulty')
+        content = request.form.get('content')
+        category = request.form.get('category')
+        video = request.files.get('video')
+        
+        if not all([topic, difficulty, content, category, video]):
+            flash('All fields are required', 'error')
+            return redirect(url_for('questions.add_question'))
+
+        # Ask before adding a question the bank (nearly) already has
+        allow_duplicate = bool(request.form.get('allow_duplicate'))
+        content_hash = question_hash(topic, difficulty, content)
+        exact = Question.query.filter_by(content_hash=content_hash).first()
+        if not allow_duplicate:
+            threshold = current_app.config['QUESTION_DUPLICATE_THRESHOLD']
+            duplicates = question_search.similarity_index.similar(content, top_k=3, min_score=threshold) \
+                if threshold > 0 else []
+            if exact is not None and exact.id not in {d['id'] for d in duplicates}:
+                duplicates.insert(0, {'id': exact.id, 'topic': exact.topic, 'difficulty': exact.difficulty,
+                                      'content': exact.content, 'similarity': 1.0})
+            if duplicates:
+                flash('Similar questions already exist. Submit again with "add anyway" to keep it.', 'warning')
+                return render_template('add_question.html', duplicates=duplicates, form=request.form)
+        
+        if video and video.filename:
+            # Check if filename is secure
+            if not secure_filename(video.filename):
+                flash('Invalid video filename', 'error')
+                return redirect(url_for('questions.add_question'))
+            
+            # Create directory if it doesn't exist
+            interviewer_videos_dir = os.path.join('static', 'interviewer_videos')
+            os.makedirs(interviewer_videos_dir, exist_ok=True)
+            
+            # Generate unique filename
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            filename = f'interviewer_{timestamp}_{secure_filename(video.filename)}'
+            video_path = os.path.join(interviewer_videos_dir, filename)
+            
+            try:
+                # Save the video file
+                video.save(video_path)
+                
+                # Create question with video path
+                question = Question(
+                    topic=topic,
+                    difficulty=difficulty,
+                    content=content,
+                    category=category,
+                    interviewer_video_path=os.path.join('interviewer_videos', filename),
+                    # A kept copy has no hash (like backfilled duplicates), so
+                    # imports keep matching the original
+                    content_hash=None if exact is not None else content_hash
+                )
+                
+                db.session.add(question)
+                db.session.commit()
+                # Smaller renditions for slow links, built in the background
+                video_renditions.queue_renditions(question.interviewer_video_path)
+                
+                flash('Question added successfully with video', 'success')
+                return redirect(url_for('questions.manage_questions'))
+                
+            except Exception as e:
+                # Clean up video file if it was saved
+                if os.path.exists(video_path):
+                    os.remove(video_path)
+                flash(f'Error saving video: {str(e)}', 'error')
+                return redirect(url_for('questions.add_question'))
+        else:
+            flash('Please upload a video file', 'error')
+            return redirect(url_for('questions.add_question'))
+    
+    return render_template('add_question.html')
+
+@bp.route('/upload-interviewer-video/<int:question_id>', methods=['POST'])
+@login_required
+def upload_interviewer_video(question_id):
+    question = Question.query.get_or_404(question_id)
+
+    if 'video' not in request.files:
+        flash('No video file uploaded', 'error')
+        return redirect(url_for('questions.manage_questions'))
+
+    video = request.files['video']
+    if video.filename == '':
+        flash('No selected file', 'error')
+        return redirect(url_for('questions.manage_questions'))
+
+    if video:
+        # Create upload directory if it doesn't exist
+        interviewer_videos_dir = os.path.join('static', 'interviewer_videos')
+        os.makedirs(interviewer_videos_dir, exist_ok=True)
+
+        # Save video with unique filename
+        filename = f"interviewer_{question_id}_{secure_filename(video.filename)}"
+        video_path = os.path.join(interviewer_videos_dir, filename)
+        video.save(video_path)
+
+        # Update question with video path
+        question.interviewer_video_path = os.path.join('interviewer_videos', filename)
+        db.session.commit()
+        video_renditions.queue_renditions(question.interviewer_video_path)
+
+        flash('Video uploaded successfully', 'success')
+    else:
+        flash('Invalid file format', 'error')
+
+    return redirect(url_for('questions.manage_questions'))
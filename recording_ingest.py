@@ -0,0 +1,377 @@
+"""Recording uploads with size, duration and quota limits enforced while streaming.
+
+Uploads are written chunk by chunk to a ``.part`` file next to their final
+location by a ``RecordingWriter``. Every chunk is checked before it reaches
+the disk:
+
+* the first bytes must be a WebM/Matroska (EBML) or MP4 header, so a
+  wrong file is rejected after a few bytes, not after the whole upload;
+* the byte count may not pass the smallest of the per-file limit and the
+  user's and interview's remaining quota (stored recordings plus uploads
+  still in flight in this process);
+* for WebM, cluster and block timecodes are followed as they stream past,
+  and the upload stops once it runs longer than the duration limit.
+
+Under Flask the writer is the file stream of the multipart parser (see
+``IngestRequest``), so rejected uploads never reach ``request.files``;
+the ASGI layer drives the same writer from its own multipart reader.
+"""
+import os
+import struct
+import threading
+import uuid
+from typing import Dict, Optional
+
+from flask import Request, current_app, session
+from sqlalchemy import func, select
+from werkzeug.exceptions import HTTPException
+
+from models import db, Interview, InterviewResponse
+
+MB = 1024 * 1024
+# Flask endpoints whose file uploads go through a RecordingWriter
+INGEST_ENDPOINTS = {'web.save_recording', 'web.upload_video_endpoint'}
+
+EBML_MAGIC = b'\x1a\x45\xdf\xa3'
+EBML_DOC_TYPE = 0x4282
+SEGMENT = 0x18538067
+INFO = 0x1549A966
+TIMECODE_SCALE = 0x2AD7B1
+DURATION = 0x4489
+CLUSTER = 0x1F43B675
+CLUSTER_TIMECODE = 0xE7
+BLOCK_GROUP = 0xA0
+BLOCK = 0xA1
+SIMPLE_BLOCK = 0xA3
+# Elements parsed into rather than skipped
+MASTER_ELEMENTS = {0x1A45DFA3, SEGMENT, INFO, CLUSTER, BLOCK_GROUP}
+VALUE_ELEMENTS = {EBML_DOC_TYPE, TIMECODE_SCALE, DURATION, CLUSTER_TIMECODE}
+UNKNOWN_SIZE = -1
+
+
+class RecordingRejected(HTTPException):
+    """An upload stopped by a limit (413) or because it isn't a recording (415)."""
+    code = 413
+
+    def __init__(self, description: str, code: int = 413):
+        super().__init__(description)
+        self.code = code
+
+
+def read_vint(data, pos: int, keep_marker: bool):
+    """An EBML variable-length integer at ``pos``: (value, length), or None if incomplete."""
+    if pos >= len(data):
+        return None
+    first = data[pos]
+    length = 1
+    while length <= 8 and not first & (0x80 >> (length - 1)):
+        length += 1
+    if length > 8:
+        raise ValueError('Invalid EBML data')
+    if pos + length > len(data):
+        return None
+    value = first if keep_marker else first & (0xFF >> length)
+    for byte in data[pos + 1:pos + length]:
+        value = (value << 8) | byte
+    if not keep_marker and value == (1 << (7 * length)) - 1:
+        value = UNKNOWN_SIZE
+    return value, length
+
+
+class WebmScanner:
+    """Incremental WebM parser that tracks the doc type and the running duration.
+
+    Only element headers and a few small values are held in memory; block
+    payloads are skipped as they stream past.
+    """
+
+    def __init__(self):
+        self.pending = bytearray()
+        self.skip = 0
+        self.doc_type = None
+        self.timecode_scale = 1000000  # ns per timecode unit
+        self.info_duration = 0.0
+        self.cluster_timecode = 0
+        self.max_timecode = 0
+
+    @property
+    def duration(self) -> float:
+        """Seconds covered so far."""
+        return max(self.info_duration, self.max_timecode) * self.timecode_scale / 1e9
+
+    def feed(self, data: bytes):
+        pos = 0
+        if self.skip:
+            pos = min(self.skip, len(data))
+            self.skip -= pos
+            if self.skip:
+                return
+        self.pending += data[pos:]
+        while self._next_element():
+            pass
+
+    def _next_element(self) -> bool:
+        buf = self.pending
+        element = read_vint(buf, 0, keep_marker=True)
+        if element is None:
+            return False
+        element_id, id_length = element
+        size = read_vint(buf, id_length, keep_marker=False)
+        if size is None:
+            return False
+        size, size_length = size
+        header = id_length + size_length
+
+        if element_id in MASTER_ELEMENTS:
+            # Step into the element; its children follow
+            del buf[:header]
+            return True
+        if size == UNKNOWN_SIZE:
+            raise ValueError('Unsupported unknown-size element')
+
+        if element_id in VALUE_ELEMENTS:
+            if len(buf) < header + size:
+                return False
+            self._value(element_id, bytes(buf[header:header + size]))
+        elif element_id in (SIMPLE_BLOCK, BLOCK):
+            # Track number, then the block's timecode relative to its cluster
+            track = read_vint(buf, header, keep_marker=False)
+            if track is None or len(buf) < header + track[1] + 2:
+                return False
+            relative = struct.unpack('>h', bytes(buf[header + track[1]:header + track[1] + 2]))[0]
+            self.max_timecode = max(self.max_timecode, self.cluster_timecode + relative)
+
+        available = len(buf) - header
+        if available >= size:
+            del buf[:header + size]
+            return True
+        self.skip = size - available
+        buf.clear()
+        return False
+
+    def _value(self, element_id: int, payload: bytes):
+        if element_id == EBML_DOC_TYPE:
+            self.doc_type = payload.rstrip(b'\x00').decode('ascii', 'replace')
+            if self.doc_type not in ('webm', 'matroska'):
+                raise ValueError(f'Unsupported document type: {self.doc_type}')
+        elif element_id == DURATION:
+            self.info_duration = struct.unpack('>f' if len(payload) == 4 else '>d', payload)[0]
+        else:
+            value = int.from_bytes(payload, 'big')
+            if element_id == TIMECODE_SCALE:
+                self.timecode_scale = value or 1000000
+            else:
+                self.cluster_timecode = value
+                self.max_timecode = max(self.max_timecode, value)
+
+
+def sniff_container(head: bytes) -> Optional[str]:
+    if head.startswith(EBML_MAGIC):
+        return 'webm'
+    if head[4:8] == b'ftyp':
+        return 'mp4'
+    return None
+
+
+# Bytes being uploaded right now, per ('user', id) and ('interview', id)
+_in_flight: Dict[tuple, int] = {}
+_in_flight_lock = threading.Lock()
+
+
+def _reserve(keys, amount: int):
+    with _in_flight_lock:
+        for key in keys:
+            total = _in_flight.get(key, 0) + amount
+            if total > 0:
+                _in_flight[key] = total
+            else:
+                _in_flight.pop(key, None)
+
+
+def stored_bytes(user_id: int, interview_id: Optional[int] = None) -> dict:
+    """Recording bytes stored for a user and, optionally, one of their interviews."""
+    user_total = db.session.scalar(
+        select(func.coalesce(func.sum(InterviewResponse.video_bytes), 0))
+        .join(Interview, Interview.id == InterviewResponse.interview_id)
+        .where(Interview.user_id == user_id)
+    )
+    interview_total = 0
+    if interview_id:
+        interview_total = db.session.scalar(
+            select(func.coalesce(func.sum(InterviewResponse.video_bytes), 0))
+            .where(InterviewResponse.interview_id == interview_id)
+        )
+    return {'user': user_total, 'interview': interview_total}
+
+
+def quota_report(user_id: int, interview_id: Optional[int] = None) -> dict:
+    """Quota use for the quota API. Needs an app context."""
+    config = current_app.config
+    stored = stored_bytes(user_id, interview_id)
+    with _in_flight_lock:
+        user_in_flight = _in_flight.get(('user', user_id), 0)
+        interview_in_flight = _in_flight.get(('interview', interview_id), 0) if interview_id else 0
+    report = {
+        'user': {
+            'used_bytes': stored['user'],
+            'in_flight_bytes': user_in_flight,
+            'limit_bytes': config['RECORDING_USER_QUOTA_MB'] * MB
+        },
+        'max_file_bytes': config['RECORDING_MAX_MB'] * MB,
+        'max_duration_seconds': config['RECORDING_MAX_SECONDS']
+    }
+    if interview_id:
+        report['interview'] = {
+            'id': interview_id,
+            'used_bytes': stored['interview'],
+            'in_flight_bytes': interview_in_flight,
+            'limit_bytes': config['RECORDING_INTERVIEW_QUOTA_MB'] * MB
+        }
+    return report
+
+
+class RecordingWriter:
+    """File-like sink for one upload; raises RecordingRejected as soon as a limit is hit.
+
+    Data goes to ``<directory>/.incoming-<id>.part``; ``commit(path)`` moves
+    it into place, and closing an uncommitted writer deletes it.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, max_seconds: float, quota_keys=()):
+        os.makedirs(directory, exist_ok=True)
+        self.part_path = os.path.join(directory, f'.incoming-{uuid.uuid4().hex}.part')
+        self.file = open(self.part_path, 'w+b')
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.quota_keys = tuple(quota_keys)
+        self.head = b''
+        self.container = None
+        self.scanner = None
+        self.bytes = 0
+        self.committed = False
+        self.name = self.part_path
+
+    def _reject(self, message: str, code: int = 413):
+        self.close()
+        raise RecordingRejected(message, code)
+
+    def _check_head(self, final: bool = False):
+        if self.container is not None or (len(self.head) < 12 and not final):
+            return
+        self.container = sniff_container(self.head)
+        if self.container is None:
+            self._reject('Not a WebM or MP4 recording', 415)
+        if self.container == 'webm':
+            self.scanner = WebmScanner()
+        data, self.head = self.head, b''
+        self._write_checked(data)
+
+    def _write_checked(self, data: bytes):
+        if self.bytes + len(data) > self.max_bytes:
+            self._reject(f'Recording exceeds the {self.max_bytes / MB:.1f} MB available for it')
+        if self.scanner is not None:
+            try:
+                self.scanner.feed(data)
+            except ValueError as e:
+                self._reject(f'Invalid WebM recording: {str(e)}', 415)
+            if self.scanner.duration > self.max_seconds:
+                self._reject(f'Recording is longer than {self.max_seconds:g} seconds')
+        self.file.write(data)
+        self.bytes += len(data)
+        _reserve(self.quota_keys, len(data))
+
+    def write(self, data: bytes) -> int:
+        if self.container is None:
+            self.head += bytes(data)
+            self._check_head()
+        else:
+            self._write_checked(bytes(data))
+        return len(data)
+
+    def finish(self):
+        """Flush a header too short to have been checked yet."""
+        if self.container is None:
+            self._check_head(final=True)
+        self.file.flush()
+
+    # The multipart parser rewinds the stream once the part is complete
+    def seek(self, offset: int, whence: int = 0) -> int:
+        self.finish()
+        return self.file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self.file.tell()
+
+    def read(self, size: int = -1) -> bytes:
+        return self.file.read(size)
+
+    def flush(self):
+        self.file.flush()
+
+    @property
+    def duration(self) -> Optional[float]:
+        return self.scanner.duration if self.scanner is not None else None
+
+    def commit(self, path: str) -> dict:
+        """Move the finished upload to ``path``; returns its size, duration and container."""
+        self.finish()
+        self.file.close()
+        os.replace(self.part_path, path)
+        self.committed = True
+        _reserve(self.quota_keys, -self.bytes)
+        return {'bytes': self.bytes, 'duration': self.duration, 'container': self.container}
+
+    def close(self):
+        if self.committed or self.file is None:
+            return
+        self.file.close()
+        self.file = None
+        if os.path.exists(self.part_path):
+            os.remove(self.part_path)
+        _reserve(self.quota_keys, -self.bytes)
+
+
+def open_writer(user_id: int, interview_id: Optional[int] = None,
+                content_length: Optional[int] = None) -> RecordingWriter:
+    """A writer limited by the per-file cap and what is left of the quotas. Needs an app context."""
+    config = current_app.config
+    report = quota_report(user_id, interview_id)
+    remaining = [config['RECORDING_MAX_MB'] * MB]
+    keys = [('user', user_id)]
+    scopes = [report['user']]
+    if interview_id:
+        keys.append(('interview', interview_id))
+        scopes.append(report['interview'])
+    for scope in scopes:
+        remaining.append(scope['limit_bytes'] - scope['used_bytes'] - scope['in_flight_bytes'])
+    max_bytes = min(remaining)
+    if max_bytes <= 0:
+        raise RecordingRejected('Recording quota exhausted')
+    # The body includes multipart framing, so allow a little over
+    if content_length and content_length > max_bytes + 64 * 1024:
+        raise RecordingRejected(f'Recording exceeds the {max_bytes / MB:.1f} MB available for it')
+    directory = os.path.join(config['UPLOAD_FOLDER'], str(user_id))
+    return RecordingWriter(directory, max_bytes, config['RECORDING_MAX_SECONDS'], keys)
+
+
+class IngestRequest(Request):
+    """Streams file parts of recording uploads through a RecordingWriter."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if self.endpoint in INGEST_ENDPOINTS and 'user_id' in session:
+            interview_id = session.get('interview_id') if self.endpoint == 'web.save_recording' else None
+            return open_writer(session['user_id'], interview_id, total_content_length)
+        return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
+
+def commit_upload(storage, path: str) -> dict:
+    """Move an uploaded FileStorage to ``path``; returns size/duration when known."""
+    if isinstance(storage.stream, RecordingWriter):
+        return storage.stream.commit(path)
+    storage.save(path)
+    return {'bytes': os.path.getsize(path), 'duration': None, 'container': None}
+
+
+def configure_ingest(app):
+    app.request_class = IngestRequest
+
@@ -0,0 +1,315 @@
+"""Recording storage lifecycle: retention, compaction and garbage collection.
+
+One sweep over ``UPLOAD_FOLDER`` does three things, in this order:
+
+* retention: recordings of interviews that ended more than
+  ``RECORDING_RETENTION_DAYS`` ago, or were abandoned (never ended) more
+  than ``RECORDING_ABANDONED_DAYS`` ago, are deleted. The response rows
+  and their scores are kept; only ``video_path`` is cleared.
+* compaction: recordings of interviews that ended more than
+  ``RECORDING_COMPACT_AFTER_DAYS`` ago are re-encoded once at
+  ``RECORDING_COMPACT_KBPS`` (VP9/Opus, at most 360p) and replaced when
+  the result is smaller. This needs ffmpeg; OpenCV cannot carry the
+  audio, so without ffmpeg compaction is skipped.
+* garbage collection: files no InterviewResponse, Question or
+  InterviewVideo refers to (failed saves, abandoned ``.part`` uploads,
+  previews of recordings that are gone) are
+  deleted once they are older than ``RECORDING_GC_GRACE_MINUTES``, so an
+  upload between writing its file and committing its row is never lost.
+
+File operations are paced to ``RECORDING_SWEEP_MAX_FILES_PER_SECOND``, and
+a lock file keeps two processes from sweeping at the same time.
+"""
+import atexit
+import fcntl
+import os
+import queue
+import shutil
+import subprocess
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional, Set
+
+from sqlalchemy import and_, or_, select, update
+
+import recording_previews
+from models import db, Interview, InterviewResponse, InterviewVideo, Question
+
+LOCK_FILE = '.lifecycle.lock'
+BATCH_SIZE = 500
+
+
+class RecordingLifecycle:
+    def __init__(self, app):
+        self.app = app
+        config = app.config
+        self.root = config['UPLOAD_FOLDER']
+        self.retention_days = config['RECORDING_RETENTION_DAYS']
+        self.abandoned_days = config['RECORDING_ABANDONED_DAYS']
+        self.compact_after_days = config['RECORDING_COMPACT_AFTER_DAYS']
+        self.compact_kbps = config['RECORDING_COMPACT_KBPS']
+        self.max_compactions = config['RECORDING_MAX_COMPACTIONS_PER_SWEEP']
+        self.grace = config['RECORDING_GC_GRACE_MINUTES'] * 60
+        self.max_files_per_second = config['RECORDING_SWEEP_MAX_FILES_PER_SECOND']
+        self.interval = config['RECORDING_SWEEP_INTERVAL_MINUTES'] * 60
+        self.deletions = queue.Queue()
+        self.stopped = threading.Event()
+        self.thread = None
+        self.last_sweep = None
+        self._next_op = 0.0
+
+    # Pacing ----------------------------------------------------------------
+
+    def _throttle(self):
+        if self.max_files_per_second <= 0:
+            return
+        now = time.monotonic()
+        if self._next_op > now:
+            time.sleep(self._next_op - now)
+        self._next_op = max(now, self._next_op) + 1.0 / self.max_files_per_second
+
+    def _remove(self, path: str, dry_run: bool) -> int:
+        """Delete a file (paced); returns the bytes freed."""
+        self._throttle()
+        try:
+            size = os.path.getsize(path)
+            if not dry_run:
+                os.remove(path)
+            return size
+        except FileNotFoundError:
+            return 0
+
+    # Retention ---------------------------------------------------------------
+
+    def expired_condition(self, now: datetime):
+        conditions = []
+        if self.retention_days > 0:
+            conditions.append(Interview.end_time < now - timedelta(days=self.retention_days))
+        if self.abandoned_days > 0:
+            conditions.append(and_(Interview.end_time.is_(None),
+                                   Interview.start_time < now - timedelta(days=self.abandoned_days)))
+        return or_(*conditions) if conditions else None
+
+    def apply_retention(self, dry_run: bool = False) -> dict:
+        stats = {'files': 0, 'bytes': 0}
+        condition = self.expired_condition(datetime.utcnow())
+        if condition is None:
+            return stats
+        last_id = 0
+        while True:
+            rows = db.session.execute(
+                select(InterviewResponse.id, InterviewResponse.video_path)
+                .join(Interview, Interview.id == InterviewResponse.interview_id)
+                .where(InterviewResponse.video_path.isnot(None), InterviewResponse.id > last_id, condition)
+                .order_by(InterviewResponse.id).limit(BATCH_SIZE)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            for response_id, video_path in rows:
+                stats['bytes'] += self._remove(os.path.join(self.root, video_path), dry_run)
+                stats['files'] += 1
+                for preview in recording_previews.preview_files(video_path).values():
+                    stats['bytes'] += self._remove(os.path.join(self.root, preview), dry_run)
+            if not dry_run:
+                # Keep the responses and their scores, drop the file reference
+                db.session.execute(update(InterviewResponse), [
+                    {'id': response_id, 'video_path': None, 'video_bytes': None} for response_id, _ in rows
+                ])
+                db.session.commit()
+        return stats
+
+    # Compaction ------------------------------------------------------------
+
+    def compact_file(self, path: str) -> Optional[int]:
+        """Re-encode ``path`` in place if that makes it smaller; returns the new size."""
+        target = path + '.compact.webm'
+        try:
+            subprocess.run([
+                'ffmpeg', '-y', '-v', 'error', '-threads', '1', '-i', path,
+                '-vf', "scale=-2:'min(360,ih)'",
+                '-c:v', 'libvpx-vp9', '-b:v', f'{self.compact_kbps}k', '-deadline', 'good', '-cpu-used', '4',
+                '-c:a', 'libopus', '-b:a', '32k',
+                target
+            ], check=True, capture_output=True)
+            size = os.path.getsize(target)
+            if size >= os.path.getsize(path):
+                return None
+            os.replace(target, path)
+            return size
+        finally:
+            if os.path.exists(target):
+                os.remove(target)
+
+    def compact(self, dry_run: bool = False) -> dict:
+        stats = {'files': 0, 'bytes_saved': 0, 'skipped': None}
+        if self.compact_after_days <= 0 or self.max_compactions <= 0:
+            return stats
+        if shutil.which('ffmpeg') is None:
+            stats['skipped'] = 'ffmpeg not installed'
+            return stats
+        cutoff = datetime.utcnow() - timedelta(days=self.compact_after_days)
+        rows = db.session.execute(
+            select(InterviewResponse.id, InterviewResponse.video_path)
+            .join(Interview, Interview.id == InterviewResponse.interview_id)
+            .where(InterviewResponse.video_path.isnot(None), InterviewResponse.compacted_at.is_(None),
+                   Interview.end_time < cutoff)
+            .order_by(InterviewResponse.id).limit(self.max_compactions)
+        ).all()
+        for response_id, video_path in rows:
+            path = os.path.join(self.root, video_path)
+            if not os.path.exists(path):
+                continue
+            before = os.path.getsize(path)
+            self._throttle()
+            size = None
+            if not dry_run:
+                try:
+                    size = self.compact_file(path)
+                except (OSError, subprocess.CalledProcessError) as e:
+                    print(f"Error compacting {video_path}: {str(e)}")
+                    continue
+                # Marked either way, so a recording that didn't shrink isn't retried
+                values = {'compacted_at': datetime.utcnow()}
+                if size is not None:
+                    values['video_bytes'] = size
+                db.session.execute(update(InterviewResponse).where(InterviewResponse.id == response_id).values(**values))
+                db.session.commit()
+            stats['files'] += 1
+            stats['bytes_saved'] += before - size if size is not None else 0
+        return stats
+
+    # Garbage collection ----------------------------------------------------
+
+    def referenced_paths(self) -> Set[str]:
+        """Every file under the upload folder something in the database points at."""
+        referenced = set()
+        for (path,) in db.session.execute(
+            select(InterviewResponse.video_path).where(InterviewResponse.video_path.isnot(None))
+        ).yield_per(5000):
+            referenced.add(os.path.normpath(path))
+            # Previews live next to the recording they belong to
+            referenced.update(os.path.normpath(p) for p in recording_previews.preview_files(path).values())
+        for (path,) in db.session.execute(select(Question.video_path).where(Question.video_path.isnot(None))):
+            referenced.add(os.path.normpath(path))
+        # upload_video stores a URL; the file sits at the top of the upload folder
+        for (url,) in db.session.execute(select(InterviewVideo.video_url).where(InterviewVideo.video_url.isnot(None))):
+            referenced.add(os.path.basename(url))
+        return referenced
+
+    def collect_garbage(self, dry_run: bool = False) -> dict:
+        stats = {'files': 0, 'bytes': 0, 'scanned': 0, 'total_bytes': 0, 'users': {}}
+        if not os.path.isdir(self.root):
+            return stats
+        referenced = self.referenced_paths()
+        cutoff = time.time() - self.grace
+        for directory, dirs, files in os.walk(self.root):
+            for name in files:
+                if name == LOCK_FILE:
+                    continue
+                path = os.path.join(directory, name)
+                rel = os.path.relpath(path, self.root)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                stats['scanned'] += 1
+                if rel not in referenced and st.st_mtime < cutoff:
+                    stats['bytes'] += self._remove(path, dry_run)
+                    stats['files'] += 1
+                    continue
+                stats['total_bytes'] += st.st_size
+                owner = rel.split(os.sep, 1)[0] if os.sep in rel else '.'
+                stats['users'][owner] = stats['users'].get(owner, 0) + st.st_size
+        return stats
+
+    # Sweeps --------------------------------------------------------------
+
+    def sweep(self, dry_run: bool = False) -> Optional[dict]:
+        """Run retention, compaction and GC. Returns None if another process is sweeping."""
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, LOCK_FILE), 'w') as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return None
+            started = time.perf_counter()
+            with self.app.app_context():
+                try:
+                    result = {
+                        'retention': self.apply_retention(dry_run),
+                        'compaction': self.compact(dry_run),
+                        'gc': self.collect_garbage(dry_run),
+                    }
+                finally:
+                    db.session.remove()
+            result['seconds'] = round(time.perf_counter() - started, 2)
+            result['finished_at'] = datetime.utcnow().isoformat()
+            result['dry_run'] = dry_run
+            if not dry_run:
+                self.last_sweep = result
+            return result
+
+    def usage(self) -> dict:
+        """Disk usage of the upload folder, as of the last sweep, plus free space now."""
+        disk = shutil.disk_usage(self.root) if os.path.isdir(self.root) else None
+        gc = (self.last_sweep or {}).get('gc', {})
+        return {
+            'recordings_bytes': gc.get('total_bytes'),
+            'recordings_files': gc.get('scanned', 0) - gc.get('files', 0) if gc else None,
+            'largest_users': sorted(gc.get('users', {}).items(), key=lambda item: -item[1])[:10],
+            'disk_free_bytes': disk.free if disk else None,
+            'disk_total_bytes': disk.total if disk else None,
+            'last_sweep': {k: v for k, v in (self.last_sweep or {}).items() if k != 'gc'} or None,
+            'pending_deletions': self.deletions.qsize(),
+        }
+
+    def user_usage(self, user_id) -> dict:
+        """One user's share of ``usage``: their recordings folder as of the last sweep."""
+        sweep = self.last_sweep or {}
+        return {
+            'recordings_bytes': sweep.get('gc', {}).get('users', {}).get(str(user_id), 0) if sweep else None,
+            'last_sweep_at': sweep.get('finished_at'),
+        }
+
+    # Background work -------------------------------------------------------
+
+    def schedule_delete(self, relative_path: str):
+        """Delete a file off the request path; the next GC sweep retries failures."""
+        self.deletions.put(relative_path)
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name='recording-lifecycle', daemon=True)
+            self.thread.start()
+            atexit.register(self.stopped.set)
+
+    def _run(self):
+        next_sweep = time.monotonic() + self.interval if self.interval > 0 else None
+        while not self.stopped.is_set():
+            try:
+                path = self.deletions.get(timeout=1.0)
+                self._remove(os.path.join(self.root, path), dry_run=False)
+            except queue.Empty:
+                pass
+            except Exception as e:
+                print(f"Error deleting recording: {str(e)}")
+            if next_sweep is not None and time.monotonic() >= next_sweep:
+                try:
+                    self.sweep()
+                except Exception as e:
+                    print(f"Error in recording sweep: {str(e)}")
+                next_sweep = time.monotonic() + self.interval
+
+
+# Set up by the app factory for the web role
+lifecycle: Optional[RecordingLifecycle] = None
+
+
+def init_lifecycle(app, start: bool = True):
+    global lifecycle
+    lifecycle = RecordingLifecycle(app)
+    if start:
+        lifecycle.start()
+    return lifecycle
@@ -0,0 +1,219 @@
+"""Poster thumbnails and keyframe sprite sheets for response recordings.
+
+After a recording is saved, a background job samples ``PREVIEW_FRAMES``
+evenly spaced frames with ``cv2.VideoCapture``. It seeks straight to each one
+when the container has an index. MediaRecorder WebM usually has none, so
+then it makes one pass that only decodes the frames it keeps. The job writes
+three files next to the recording:
+
+* ``<recording>.sprite.jpg``: the frames as a grid of ``TILE_WIDTH`` tiles
+* ``<recording>.poster.jpg``: the sharpest sampled frame at ``POSTER_WIDTH``
+* ``<recording>.preview.json``: tile geometry, frame times and a content
+  version. It is written last, so its presence means the previews are complete.
+
+Preview URLs carry that version (``?v=``) and are served as immutable, so a
+history page costs a few KB per response and is fetched once.
+"""
+import hashlib
+import json
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from flask import url_for
+
+TILE_WIDTH = 160
+POSTER_WIDTH = 480
+SPRITE_COLUMNS = 4
+JPEG_QUALITY = 70
+PREVIEW_SUFFIXES = {'poster': '.poster.jpg', 'sprite': '.sprite.jpg', 'index': '.preview.json'}
+
+
+def preview_files(video_path: str) -> Dict[str, str]:
+    """Paths of the preview files of a recording, relative like ``video_path``."""
+    return {kind: video_path + suffix for kind, suffix in PREVIEW_SUFFIXES.items()}
+
+
+def _resize(frame, width: int):
+    import cv2
+    height, w = frame.shape[:2]
+    size = (width, max(2, int(round(height * width / w / 2)) * 2))
+    return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+
+def _sharpness(frame) -> float:
+    import cv2
+    return float(cv2.Laplacian(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), cv2.CV_64F).var())
+
+
+def _position(capture) -> float:
+    import cv2
+    return round(capture.get(cv2.CAP_PROP_POS_MSEC) / 1000.0, 2)
+
+
+def _seek_frames(capture, targets: List[int]) -> Optional[list]:
+    """(seconds, frame) at each of ``targets`` by seeking; None if the container can't seek."""
+    import cv2
+    frames = []
+    for index in targets:
+        if not capture.set(cv2.CAP_PROP_POS_FRAMES, index):
+            return None
+        ok, frame = capture.read()
+        if not ok:
+            return None
+        frames.append((_position(capture), _resize(frame, POSTER_WIDTH)))
+    return frames
+
+
+def _scan_frames(capture, count: int, total: int = 0) -> list:
+    """(seconds, frame) samples from one sequential pass, decoding only the ones kept.
+
+    With ``total`` unknown (0) every ``stride``-th frame is kept and the
+    stride doubles whenever twice ``count`` frames have piled up, so the
+    samples stay evenly spread over a recording of any length.
+    """
+    targets = set(_even_targets(count, total)) if total else None
+    frames, stride, index = [], 1, 0
+    while capture.grab():
+        if (index in targets) if targets is not None else index % stride == 0:
+            ok, frame = capture.retrieve()
+            if ok:
+                frames.append((_position(capture), _resize(frame, POSTER_WIDTH)))
+            if targets is None and len(frames) >= 2 * count:
+                frames = frames[::2]
+                stride *= 2
+        index += 1
+    if targets is None and len(frames) > count:
+        frames = [frames[round(i * (len(frames) - 1) / (count - 1))] for i in range(count)] if count > 1 else frames[:1]
+    return frames
+
+
+def _even_targets(count: int, total: int) -> List[int]:
+    # Centre of each of ``count`` equal slices, skipping the often black first frame
+    return sorted({min(total - 1, int((i + 0.5) * total / count)) for i in range(count)})
+
+
+def generate(video_path: str, root: str, frames: int = 12) -> dict:
+    """Write the poster, sprite and index for ``video_path`` (relative to ``root``)."""
+    import cv2
+    source = os.path.join(root, video_path)
+    capture = cv2.VideoCapture(source)
+    try:
+        if not capture.isOpened():
+            raise ValueError(f'Could not open video: {video_path}')
+        total = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        samples = _seek_frames(capture, _even_targets(frames, total)) if total > 0 else None
+        if samples is None:
+            capture.release()
+            capture = cv2.VideoCapture(source)
+            samples = _scan_frames(capture, frames, max(total, 0))
+    finally:
+        capture.release()
+    if not samples:
+        raise ValueError(f'No frames decoded: {video_path}')
+
+    import numpy as np
+    tiles = [_resize(frame, TILE_WIDTH) for _, frame in samples]
+    tile_h, tile_w = tiles[0].shape[:2]
+    columns = min(SPRITE_COLUMNS, len(tiles))
+    rows = math.ceil(len(tiles) / columns)
+    sprite = np.zeros((rows * tile_h, columns * tile_w, 3), dtype=np.uint8)
+    for i, tile in enumerate(tiles):
+        y, x = (i // columns) * tile_h, (i % columns) * tile_w
+        sprite[y:y + tile_h, x:x + tile_w] = tile[:tile_h, :tile_w]
+    poster_t, poster = max(samples, key=lambda sample: _sharpness(sample[1]))
+
+    params = [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY]
+    encoded = {'sprite': cv2.imencode('.jpg', sprite, params)[1].tobytes(),
+               'poster': cv2.imencode('.jpg', poster, params)[1].tobytes()}
+    digest = hashlib.sha256(encoded['sprite'] + encoded['poster']).hexdigest()
+    files = preview_files(video_path)
+    index = {
+        'version': digest[:16],
+        'tile': [tile_w, tile_h],
+        'columns': columns,
+        'frames': [{'t': t, 'x': (n % columns) * tile_w, 'y': (n // columns) * tile_h}
+                   for n, (t, _) in enumerate(samples)],
+        'poster_t': poster_t,
+        'bytes': {kind: len(data) for kind, data in encoded.items()}
+    }
+    # Images first, the index last: readers treat the index as "previews are ready"
+    for kind, data in encoded.items():
+        _write(os.path.join(root, files[kind]), data)
+    _write(os.path.join(root, files['index']), json.dumps(index).encode())
+    return index
+
+
+def _write(path: str, data: bytes):
+    tmp = f'{path}.tmp-{threading.get_ident()}'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def load_index(video_path: Optional[str], root: str) -> Optional[dict]:
+    if not video_path:
+        return None
+    try:
+        with open(os.path.join(root, preview_files(video_path)['index'])) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def preview_urls(response, root: str) -> Optional[dict]:
+    """Poster/sprite URLs and frame layout for an InterviewResponse. Needs a request context."""
+    index = load_index(response.video_path, root)
+    if index is None:
+        return None
+    return dict(index,
+                poster_url=url_for('web.recording_preview', response_id=response.id, kind='poster', v=index['version']),
+                sprite_url=url_for('web.recording_preview', response_id=response.id, kind='sprite', v=index['version']))
+
+
+class PreviewQueue:
+    """Background preview jobs, bounded like the transcode queue.
+
+    Jobs that don't fit are dropped; ``build-previews`` fills the gaps.
+    """
+
+    def __init__(self, root: str, workers: int = 1, max_pending: int = 64, frames: int = 12):
+        self.root = root
+        self.frames = frames
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='previews')
+        self.slots = threading.BoundedSemaphore(workers + max_pending)
+
+    def submit(self, video_path: str) -> bool:
+        if not self.slots.acquire(blocking=False):
+            return False
+        self.pool.submit(self._run, video_path)
+        return True
+
+    def _run(self, video_path: str):
+        try:
+            generate(video_path, self.root, self.frames)
+        except Exception as e:
+            print(f"Error building previews for {video_path}: {str(e)}")
+        finally:
+            self.slots.release()
+
+
+# Set up by the app factory for the web role (PREVIEW_WORKERS > 0)
+preview_queue: Optional[PreviewQueue] = None
+
+
+def init_preview_queue(app):
+    global preview_queue
+    workers = app.config['PREVIEW_WORKERS']
+    preview_queue = PreviewQueue(app.config['UPLOAD_FOLDER'], workers, frames=app.config['PREVIEW_FRAMES']) \
+        if workers > 0 else None
+    return preview_queue
+
+
+def queue_previews(video_path: Optional[str]) -> bool:
+    """Queue preview generation for a saved recording, if a queue is running."""
+    if not video_path or preview_queue is None:
+        return False
+    return preview_queue.submit(video_path)
@@ -0,0 +1,133 @@
+"""Per-topic/difficulty score distributions for percentile ranks.
+
+Completed interviews are counted into fixed-width bins over [0, 1] for each
+score (``ScoreBin`` rows). Ending an interview adds one count per score in
+the same transaction, so a percentile rank reads at most ``BINS`` rows per
+score through the unique index instead of scanning Interview. ``rebuild``
+recomputes every bin from scratch with one GROUP BY per score.
+"""
+from typing import Dict, List, Optional
+
+from sqlalchemy import Integer, case, cast, delete, func, insert, select, update
+
+from models import db, Interview, ScoreBin
+
+METRICS = ('confidence_score', 'technical_score', 'communication_score')
+# Scores are in [0, 1]; ranks are interpolated inside a bin
+BINS = 100
+
+
+def bin_index(score: float) -> int:
+    return min(BINS - 1, max(0, int(score * BINS)))
+
+
+def bin_expression(column):
+    """bin_index() in SQL, for the rebuild."""
+    return case((column >= 1, BINS - 1), (column <= 0, 0), else_=cast(column * BINS, Integer))
+
+
+def completed_interviews():
+    return (Interview.end_time.isnot(None), Interview.topic.isnot(None), Interview.difficulty.isnot(None))
+
+
+def _increment(topic: str, difficulty: str, metric: str, index: int):
+    result = db.session.execute(
+        update(ScoreBin).where(
+            ScoreBin.topic == topic, ScoreBin.difficulty == difficulty,
+            ScoreBin.metric == metric, ScoreBin.bin == index
+        ).values(count=ScoreBin.count + 1)
+    )
+    if result.rowcount == 0:
+        db.session.add(ScoreBin(topic=topic, difficulty=difficulty, metric=metric, bin=index, count=1))
+
+
+def record_interview(interview_id: int) -> bool:
+    """Count a just-completed interview's scores; call in the transaction that ends it.
+
+    Returns False when the interview has no topic/difficulty to be ranked in.
+    """
+    row = db.session.execute(
+        select(Interview.topic, Interview.difficulty, *[getattr(Interview, m) for m in METRICS])
+        .where(Interview.id == interview_id)
+    ).first()
+    if row is None or row.topic is None or row.difficulty is None:
+        return False
+    for metric in METRICS:
+        score = getattr(row, metric)
+        if score is not None:
+            _increment(row.topic, row.difficulty, metric, bin_index(score))
+    return True
+
+
+def histograms(topic: str, difficulty: str) -> Dict[str, List[int]]:
+    """Bin counts per score for one topic/difficulty."""
+    counts = {metric: [0] * BINS for metric in METRICS}
+    rows = db.session.execute(
+        select(ScoreBin.metric, ScoreBin.bin, ScoreBin.count)
+        .where(ScoreBin.topic == topic, ScoreBin.difficulty == difficulty)
+    )
+    for metric, index, count in rows:
+        if metric in counts:
+            counts[metric][index] = count
+    return counts
+
+
+def percentile_rank(counts: List[int], score: float) -> Optional[float]:
+    """Percent of the cohort scoring below ``score``; None for an empty cohort."""
+    total = sum(counts)
+    if total == 0:
+        return None
+    index = bin_index(score)
+    within = min(1.0, max(0.0, score * BINS - index))
+    return 100.0 * (sum(counts[:index]) + counts[index] * within) / total
+
+
+def quantile(counts: List[int], q: float) -> Optional[float]:
+    """Score below which a fraction ``q`` of the cohort falls."""
+    total = sum(counts)
+    if total == 0:
+        return None
+    target, seen = q * total, 0
+    for index, count in enumerate(counts):
+        if count and seen + count >= target:
+            return (index + (target - seen) / count) / BINS
+        seen += count
+    return 1.0
+
+
+def interview_percentiles(interview) -> dict:
+    """Percentile rank of each score against interviews on the same topic/difficulty."""
+    cohort = histograms(interview.topic, interview.difficulty)
+    result = {}
+    for metric in METRICS:
+        counts = cohort[metric]
+        score = getattr(interview, metric)
+        result[metric] = {
+            'score': score,
+            'percentile': percentile_rank(counts, score) if score is not None else None,
+            'cohort_size': sum(counts),
+            'median': quantile(counts, 0.5),
+            'p90': quantile(counts, 0.9)
+        }
+    return result
+
+
+def rebuild() -> int:
+    """Recompute all bins from Interview in one transaction. Returns the interviews counted."""
+    db.session.execute(delete(ScoreBin))
+    for metric in METRICS:
+        column = getattr(Interview, metric)
+        index = bin_expression(column).label('bin')
+        rows = db.session.execute(
+            select(Interview.topic, Interview.difficulty, index, func.count())
+            .where(*completed_interviews(), column.isnot(None))
+            .group_by(Interview.topic, Interview.difficulty, index)
+        ).all()
+        if rows:
+            db.session.execute(insert(ScoreBin), [
+                dict(topic=topic, difficulty=difficulty, metric=metric, bin=b, count=count)
+                for topic, difficulty, b, count in rows
+            ])
+    counted = db.session.scalar(select(func.count()).select_from(Interview).where(*completed_interviews()))
+    db.session.commit()
+    return counted
@@ -0,0 +1,107 @@
+"""Interview metrics from expression scores, as a versioned weight matrix.
+
+Every metric is a clipped affine function of the expression channels:
+
+    metrics = clip(expressions @ weights.T + bias, 0, 1)
+
+so a scoring model is a ``(metrics x channels)`` weight matrix plus a bias
+vector, tagged with a version. ``score`` handles the single dict the live
+analysis produces. ``score_batch`` scores an ``(N x channels)`` array in one
+matrix product, which is what reprocessing stored timelines needs. Only
+NumPy is imported, so batch jobs don't load OpenCV.
+"""
+from typing import Dict, Iterable, Optional, Sequence
+
+import numpy as np
+
+from scoring_names import DEFAULT_VERSION, EXPRESSION_CHANNELS, METRIC_NAMES
+
+
+class ScoringModel:
+    def __init__(self, version: str, weights, bias, channels: Sequence[str] = EXPRESSION_CHANNELS,
+                 metrics: Sequence[str] = METRIC_NAMES):
+        self.version = version
+        self.channels = tuple(channels)
+        self.metrics = tuple(metrics)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.bias = np.asarray(bias, dtype=np.float64)
+        if self.weights.shape != (len(self.metrics), len(self.channels)):
+            raise ValueError(f'weights must be {len(self.metrics)}x{len(self.channels)}, got {self.weights.shape}')
+        if self.bias.shape != (len(self.metrics),):
+            raise ValueError(f'bias must have {len(self.metrics)} values, got {self.bias.shape}')
+        # (channels x metrics), so a batch is one (N x channels) @ (channels x metrics) product
+        self.weights_t = np.ascontiguousarray(self.weights.T)
+        # Nonzero terms per metric for the scalar path
+        self.terms = [
+            (metric, float(b), [(channel, float(w)) for channel, w in zip(self.channels, row) if w])
+            for metric, row, b in zip(self.metrics, self.weights, self.bias)
+        ]
+
+    def score(self, expressions: Dict[str, float]) -> Dict[str, float]:
+        """Metrics for one expression dict.
+
+        Runs once per analyzed frame, so it stays plain float arithmetic: the
+        clip is a comparison chain rather than min()/max() calls, which cost
+        more than the weighted sum itself. NaN clips to 0, as it always has.
+        """
+        result = {}
+        for metric, value, terms in self.terms:
+            for channel, weight in terms:
+                value += weight * expressions[channel]
+            result[metric] = value if 0.0 <= value <= 1.0 else (1.0 if value > 1.0 else 0.0)
+        return result
+
+    def score_batch(self, scores: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """``(N x metrics)`` for an ``(N x channels)`` array, in its float dtype.
+
+        float32 input stays float32, which halves memory traffic on big timelines.
+        """
+        scores = np.asarray(scores)
+        if scores.ndim != 2 or scores.shape[1] != len(self.channels):
+            raise ValueError(f'scores must be N x {len(self.channels)} ({", ".join(self.channels)})')
+        dtype = scores.dtype if scores.dtype in (np.float32, np.float64) else np.float64
+        result = np.matmul(scores.astype(dtype, copy=False), self.weights_t.astype(dtype, copy=False), out=out)
+        result += self.bias.astype(dtype, copy=False)
+        return np.clip(result, 0.0, 1.0, out=result)
+
+    def score_columns(self, scores: np.ndarray) -> Dict[str, np.ndarray]:
+        """``score_batch`` as one array per metric name."""
+        result = self.score_batch(scores)
+        return {metric: result[:, i] for i, metric in enumerate(self.metrics)}
+
+    def to_dict(self) -> dict:
+        return {'version': self.version, 'channels': list(self.channels), 'metrics': list(self.metrics),
+                'weights': self.weights.tolist(), 'bias': self.bias.tolist()}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'ScoringModel':
+        return cls(data['version'], data['weights'], data['bias'],
+                   data.get('channels', EXPRESSION_CHANNELS), data.get('metrics', METRIC_NAMES))
+
+
+# The weights get_interview_metrics has always used:
+#   confidence   = 0.6 confident + 0.2 happy + 0.2 (1 - stressed)
+#   stress_level = 0.7 stressed + 0.3 confused
+#   engagement   = 0.5 (1 - neutral) + 0.3 confident + 0.2 happy
+DEFAULT_MODEL = ScoringModel(
+    DEFAULT_VERSION,
+    weights=[
+        # happy surprised confused neutral stressed confident
+        [0.2, 0.0, 0.0, 0.0, -0.2, 0.6],
+        [0.0, 0.0, 0.3, 0.0, 0.7, 0.0],
+        [0.2, 0.0, 0.0, -0.5, 0.0, 0.3],
+    ],
+    bias=[0.2, 0.0, 0.5],
+)
+
+
+def expressions_to_array(rows: Iterable[Dict[str, float]], channels: Sequence[str] = EXPRESSION_CHANNELS,
+                         dtype=np.float64) -> np.ndarray:
+    """Stack expression dicts into the ``(N x channels)`` array ``score_batch`` takes."""
+    scores = np.array([[row.get(channel, 0.0) for channel in channels] for row in rows], dtype=dtype)
+    return scores.reshape(-1, len(channels))
+
+
+def batch_interview_metrics(scores: np.ndarray, model: Optional[ScoringModel] = None) -> Dict[str, np.ndarray]:
+    """Confidence, stress and engagement arrays for ``(N x channels)`` expression scores."""
+    return (model or DEFAULT_MODEL).score_columns(scores)
@@ -0,0 +1,13 @@
+"""Names shared by the scoring model, the stored timeline and the views.
+
+Kept apart from scoring.py so that web processes, which only tag and store
+scores, can use them without importing NumPy.
+"""
+
+# Expression channels, in the column order of ScoringModel weights and of
+# the raw expression columns on MetricSample
+EXPRESSION_CHANNELS = ('happy', 'surprised', 'confused', 'neutral', 'stressed', 'confident')
+METRIC_NAMES = ('confidence', 'stress_level', 'engagement')
+
+# Version of the built-in scoring model, used while no version is active
+DEFAULT_VERSION = 'v1'
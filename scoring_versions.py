@@ -0,0 +1,260 @@
+"""Versioned scoring models and re-scoring of stored interviews.
+
+Scoring models (``scoring.ScoringModel`` plus optional expression threshold
+overrides) are stored as ``ScoringConfig`` rows. New analyzers use the active
+one, and every score written is tagged with its version:
+``Interview.score_version``, ``InterviewResponse.score_version`` and
+``MetricSample.score_version``.
+
+``rescore`` applies a version to the raw expression timeline stored in
+``MetricSample``. Worker threads each read a chunk of interviews on their own
+connection and score all its samples in one ``score_batch`` call. They
+average the samples per interview and per response window with cumulative
+sums. The main thread stages the results in ``ScoreStaging``. The swap then
+runs as one transaction:
+
+* Interview and InterviewResponse scores are updated and tagged.
+* The version is made active.
+* The score percentile bins are rebuilt.
+
+Readers see all old scores or all new ones, never a mix. Thresholds only
+change detection, so they take effect for new analysis; re-scoring applies
+the weights.
+
+Web processes only need ``active_version`` to tag what they store, so NumPy
+and the scoring model are imported on use.
+"""
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+from sqlalchemy import Float, delete, func, insert, select, update
+
+from models import db, Interview, InterviewResponse, MetricSample, ScoreStaging, ScoringConfig
+from scoring_names import DEFAULT_VERSION, EXPRESSION_CHANNELS
+
+# How long a process keeps using the active version before checking again
+ACTIVE_TTL_SECONDS = 30
+# Staged metric columns, in ScoringModel.metrics order
+STAGED_COLUMNS = ('confidence_score', 'stress_level', 'engagement_score')
+
+_active = {'loaded_at': 0.0, 'value': None}
+_active_version = {'loaded_at': 0.0, 'value': None}
+_active_lock = threading.Lock()
+
+
+def model_from_config(config: ScoringConfig):
+    """The ScoringModel stored in a ScoringConfig row."""
+    from scoring import ScoringModel
+    return ScoringModel.from_dict(json.loads(config.model))
+
+
+def _cached(cache: dict, load):
+    with _active_lock:
+        if cache['value'] is not None and time.monotonic() - cache['loaded_at'] < ACTIVE_TTL_SECONDS:
+            return cache['value']
+    value = load()
+    with _active_lock:
+        cache.update(loaded_at=time.monotonic(), value=value)
+    return value
+
+
+def _load_active_config():
+    from scoring import DEFAULT_MODEL
+    config = db.session.scalar(select(ScoringConfig).where(ScoringConfig.active.is_(True)))
+    return (DEFAULT_MODEL, None) if config is None else (
+        model_from_config(config), json.loads(config.expression_params) if config.expression_params else None)
+
+
+def active_config() -> tuple:
+    """(ScoringModel, expression_params overrides) of the active version. Needs an app context.
+
+    Falls back to the built-in model while no version has been activated.
+    """
+    return _cached(_active, _load_active_config)
+
+
+def active_version() -> str:
+    """Name of the active version, without loading the model. Needs an app context."""
+    return _cached(_active_version, lambda: db.session.scalar(
+        select(ScoringConfig.version).where(ScoringConfig.active.is_(True))) or DEFAULT_VERSION)
+
+
+def forget_active():
+    with _active_lock:
+        for cache in (_active, _active_version):
+            cache.update(loaded_at=0.0, value=None)
+
+
+def add_version(data: dict, activate: bool = False) -> ScoringConfig:
+    """Store a scoring model given as ScoringModel.to_dict() (plus optional
+    ``expression_params``). Raises ValueError for a bad matrix or a taken version."""
+    from scoring import ScoringModel
+    model = ScoringModel.from_dict(data)
+    if db.session.scalar(select(ScoringConfig.id).where(ScoringConfig.version == model.version)):
+        raise ValueError(f"Scoring version '{model.version}' already exists")
+    params = data.get('expression_params')
+    config = ScoringConfig(version=model.version, model=json.dumps(model.to_dict()),
+                           expression_params=json.dumps(params) if params else None)
+    db.session.add(config)
+    if activate:
+        db.session.flush()
+        _activate(config.version)
+    db.session.commit()
+    forget_active()
+    return config
+
+
+def _activate(version: str):
+    db.session.execute(update(ScoringConfig).values(active=ScoringConfig.version == version)
+                       .execution_options(synchronize_session=False))
+
+
+def epoch_seconds(column):
+    # SQLite stores DateTime as text; julianday() turns it into a number in SQL.
+    # Its day fraction is good to ~40us, so callers round to milliseconds
+    return (func.julianday(column, type_=Float) - 2440587.5) * 86400.0
+
+
+def _score_chunk(engine, model, interview_ids: List[int]) -> Tuple[list, list, int]:
+    """Re-scored interview and response rows for a chunk of interviews, plus the sample count."""
+    import numpy as np
+
+    channels = [getattr(MetricSample, c) for c in EXPRESSION_CHANNELS]
+    with engine.connect() as conn:
+        # All-numeric rows (times as epoch seconds, computed by SQLite) convert
+        # to one float array without parsing a datetime per sample
+        samples = conn.execute(
+            select(MetricSample.interview_id, epoch_seconds(MetricSample.timestamp), *channels)
+            .where(MetricSample.interview_id.in_(interview_ids), channels[0].isnot(None))
+            .order_by(MetricSample.interview_id, MetricSample.timestamp, MetricSample.id)
+        ).all()
+        responses = conn.execute(
+            select(InterviewResponse.id, InterviewResponse.interview_id, epoch_seconds(InterviewResponse.timestamp),
+                   InterviewResponse.response_time)
+            .where(InterviewResponse.interview_id.in_(interview_ids), InterviewResponse.timestamp.isnot(None))
+        ).all()
+    if not samples:
+        return [], [], 0
+
+    # Plain tuples: NumPy probes Row objects key by key otherwise
+    data = np.array(list(map(tuple, samples)), dtype=np.float64)
+    interview = data[:, 0].astype(np.int64)
+    seconds = np.round(data[:, 1], 3)
+    # None (a channel the client didn't send) becomes NaN, then 0
+    scores = np.nan_to_num(data[:, 2:])
+    metrics = model.score_batch(scores)
+
+    # Per interview: mean of every sample
+    ids, group = np.unique(interview, return_inverse=True)
+    counts = np.bincount(group)
+    interview_rows = [
+        dict(zip(STAGED_COLUMNS, values), target='interview', row_id=int(row_id))
+        for row_id, values in zip(ids, (np.stack([np.bincount(group, weights=metrics[:, k]) for k in range(3)], axis=1)
+                                        / counts[:, None]).tolist())
+    ]
+
+    # Per response: mean over its recording window [timestamp - response_time, timestamp].
+    # Samples are sorted by (interview, time), so one key orders them all and
+    # each window is a contiguous slice found by binary search.
+    response_rows = []
+    if responses:
+        t0 = seconds.min()
+        span = seconds.max() - t0 + 1.0
+        keys = group * span + (seconds - t0)
+        windows = np.nan_to_num(np.array(list(map(tuple, responses)), dtype=np.float64))
+        r_interview = windows[:, 1].astype(np.int64)
+        position = np.minimum(np.searchsorted(ids, r_interview), len(ids) - 1)
+        known = ids[position] == r_interview
+        end = np.round(windows[:, 2], 3) - t0
+        start = end - windows[:, 3]
+        lo = np.searchsorted(keys, position * span + np.clip(start, 0, span - 1), side='left')
+        hi = np.searchsorted(keys, position * span + np.clip(end, 0, span - 1), side='right')
+        sums = np.vstack([np.zeros((1, 3)), np.cumsum(metrics, axis=0)])
+        keep = known & (hi > lo)
+        means = (sums[hi[keep]] - sums[lo[keep]]) / (hi[keep] - lo[keep])[:, None]
+        response_rows = [
+            dict(zip(STAGED_COLUMNS, values), target='response', row_id=int(row_id))
+            for row_id, values in zip(windows[keep, 0], means.tolist())
+        ]
+    return interview_rows, response_rows, len(samples)
+
+
+def _staged(target: str, version: str, column: str):
+    return (select(getattr(ScoreStaging, column))
+            .where(ScoreStaging.version == version, ScoreStaging.target == target)
+            .where(ScoreStaging.row_id == (Interview.id if target == 'interview' else InterviewResponse.id))
+            .limit(1).scalar_subquery())
+
+
+def swap(version: str):
+    """Move staged scores into place, activate ``version`` and rebuild the
+    percentile bins, all in one transaction."""
+    import score_stats
+
+    staged_ids = {target: select(ScoreStaging.row_id).where(ScoreStaging.version == version,
+                                                            ScoreStaging.target == target)
+                  for target in ('interview', 'response')}
+    try:
+        db.session.execute(
+            update(Interview).where(Interview.id.in_(staged_ids['interview']))
+            .values(score_version=version,
+                    **{column: _staged('interview', version, column) for column in STAGED_COLUMNS})
+            .execution_options(synchronize_session=False))
+        # Responses only carry an expression-derived confidence; technical and
+        # communication scores are not from the timeline
+        db.session.execute(
+            update(InterviewResponse).where(InterviewResponse.id.in_(staged_ids['response']))
+            .values(score_version=version, confidence_score=_staged('response', version, 'confidence_score'))
+            .execution_options(synchronize_session=False))
+        _activate(version)
+        db.session.execute(delete(ScoreStaging).where(ScoreStaging.version == version))
+        # Commits the whole swap
+        score_stats.rebuild()
+    except Exception:
+        db.session.rollback()
+        raise
+    forget_active()
+
+
+def rescore(version: str, workers: int = 4, chunk_size: int = 500, dry_run: bool = False) -> dict:
+    """Apply scoring ``version`` to every interview with a stored expression timeline.
+
+    Needs an app context. With ``dry_run`` the results are computed and
+    counted but nothing is swapped in.
+    """
+    config = db.session.scalar(select(ScoringConfig).where(ScoringConfig.version == version))
+    if config is None:
+        raise ValueError(f"Unknown scoring version '{version}'")
+    model = model_from_config(config)
+    started = time.perf_counter()
+    stats = {'version': version, 'interviews': 0, 'responses': 0, 'samples': 0}
+
+    ids = db.session.scalars(
+        select(MetricSample.interview_id).where(MetricSample.happy.isnot(None))
+        .distinct().order_by(MetricSample.interview_id)
+    ).all()
+    chunks = [ids[i:i + chunk_size] for i in range(0, len(ids), chunk_size)]
+
+    # A previous run that died before its swap leaves rows behind
+    db.session.execute(delete(ScoreStaging).where(ScoreStaging.version == version))
+    db.session.commit()
+    engine = db.engine
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='rescore') as pool:
+        # Workers read and score ahead; this thread is the only writer
+        for interview_rows, response_rows, samples in pool.map(lambda chunk: _score_chunk(engine, model, chunk), chunks):
+            rows = interview_rows + response_rows
+            if rows and not dry_run:
+                db.session.execute(insert(ScoreStaging), [dict(row, version=version) for row in rows])
+                db.session.commit()
+            stats['interviews'] += len(interview_rows)
+            stats['responses'] += len(response_rows)
+            stats['samples'] += samples
+    stats['score_seconds'] = round(time.perf_counter() - started, 2)
+
+    if not dry_run:
+        swap(version)
+    stats['seconds'] = round(time.perf_counter() - started, 2)
+    return stats
@@ -0,0 +1,166 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, List, Optional
+
+
+class InterviewState:
+    """Everything the hot interview APIs need about one active interview.
+
+    The persisted fields round-trip through the optional SQLite backing; the
+    analyzer handle only lives in process memory.
+    """
+    PERSISTED = ('interview_id', 'user_id', 'user', 'topic', 'difficulty', 'current_question', 'questions')
+
+    def __init__(self, interview_id: Hashable, user_id: Optional[int] = None, topic: Optional[str] = None,
+                 difficulty: Optional[str] = None, current_question: int = 0,
+                 user: Optional[dict] = None, questions: Optional[List[dict]] = None):
+        self.interview_id = interview_id
+        self.user_id = user_id
+        self.user = user  # {'id', 'username', 'full_name'} for templates
+        self.topic = topic
+        self.difficulty = difficulty
+        self.current_question = current_question
+        self.questions = questions or []  # [{'id', 'content', 'video_path', 'order'}] by order
+        self.analyzer = None
+        self.lock = threading.Lock()
+
+    def question_at(self, order: int) -> Optional[dict]:
+        for question in self.questions:
+            if question['order'] == order:
+                return question
+        return None
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.PERSISTED}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'InterviewState':
+        return cls(**{name: data.get(name) for name in cls.PERSISTED if name in data})
+
+
+class SQLiteStateBacking:
+    """Local SQLite file shared by the worker processes on one host."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.local = threading.local()
+        with self.connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS interview_state ('
+                'interview_id INTEGER PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)'
+            )
+
+    def connect(self) -> sqlite3.Connection:
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = self.local.conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def load(self, interview_id: int) -> Optional[dict]:
+        row = self.connect().execute(
+            'SELECT data FROM interview_state WHERE interview_id = ?', (interview_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, interview_id: int, data: dict):
+        with self.connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO interview_state (interview_id, data, updated_at) VALUES (?, ?, ?)',
+                (interview_id, json.dumps(data), time.time())
+            )
+
+    def delete(self, interview_id: int):
+        with self.connect() as conn:
+            conn.execute('DELETE FROM interview_state WHERE interview_id = ?', (interview_id,))
+
+    def prune(self, max_age_seconds: float):
+        with self.connect() as conn:
+            conn.execute('DELETE FROM interview_state WHERE updated_at < ?', (time.time() - max_age_seconds,))
+
+
+class InterviewSessionStore:
+    """Server-side cache of active interviews: an in-process LRU, optionally
+    backed by a local SQLite file.
+
+    Lookups go memory -> backing -> ``loader`` (normally the ORM), so once an
+    interview is warm the hot API calls only hit the database to write.
+    Integer keys are interview ids and are persisted; other keys (such as a
+    per-user scratch analyzer) stay in memory only.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 4 * 3600,
+                 backing_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self.lock = threading.Lock()
+        self.backing = SQLiteStateBacking(backing_path) if backing_path else None
+        if self.backing is not None:
+            self.backing.prune(ttl_seconds)
+        self.hits = 0
+        self.misses = 0
+
+    def _persistable(self, key: Hashable) -> bool:
+        return self.backing is not None and isinstance(key, int)
+
+    def get(self, key: Hashable, loader: Optional[Callable[[Hashable], Optional[InterviewState]]] = None
+            ) -> Optional[InterviewState]:
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and now - entry[1] <= self.ttl_seconds:
+                self.entries[key] = (entry[0], now)
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        state = None
+        if self._persistable(key):
+            data = self.backing.load(key)
+            if data is not None:
+                state = InterviewState.from_dict(data)
+        if state is None and loader is not None:
+            state = loader(key)
+            if state is not None and self._persistable(key):
+                self.backing.save(key, state.to_dict())
+        if state is not None:
+            self._remember(key, state)
+        return state
+
+    def put(self, state: InterviewState) -> InterviewState:
+        self._remember(state.interview_id, state)
+        self.save(state)
+        return state
+
+    def save(self, state: InterviewState):
+        """Write the persisted fields through to the backing after a change."""
+        if self._persistable(state.interview_id):
+            self.backing.save(state.interview_id, state.to_dict())
+
+    def discard(self, key: Hashable):
+        with self.lock:
+            self.entries.pop(key, None)
+        if self._persistable(key):
+            self.backing.delete(key)
+
+    def _remember(self, key: Hashable, state: InterviewState):
+        with self.lock:
+            previous = self.entries.get(key)
+            if previous is not None and previous[0] is not state and state.analyzer is None:
+                # Keep the live analyzer when the same interview is reloaded
+                state.analyzer = previous[0].analyzer
+            self.entries[key] = (state, time.time())
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self.lock:
+            size = len(self.entries)
+        return {'entries': size, 'hits': self.hits, 'misses': self.misses}
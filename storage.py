@@ -0,0 +1,228 @@
+import atexit
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import bindparam, event, insert, select, update
+from sqlalchemy.engine import Engine
+
+# SQLite tuning for many concurrent interview rooms. WAL lets readers proceed
+# while a single writer commits, and NORMAL synchronous is durable under WAL
+# except for a power loss right at checkpoint time.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,  # ms to wait on the write lock before "database is locked"
+    'temp_store': 'MEMORY',
+    'cache_size': -16000,  # negative means KiB, so ~16MB page cache per connection
+}
+
+
+def sqlite_engine_options(pool_size: int = 10, max_overflow: int = 20, timeout: float = 30.0) -> dict:
+    """Engine options for a file-backed SQLite database used from threaded servers."""
+    return {
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_pre_ping': True,
+        'pool_recycle': 3600,
+        'connect_args': {
+            # Connections are handed between worker threads by the pool
+            'check_same_thread': False,
+            'timeout': timeout,
+        },
+    }
+
+
+_pragmas_installed = False
+
+
+def enable_sqlite_pragmas(pragmas: Optional[Dict[str, object]] = None):
+    """Apply SQLITE_PRAGMAS on every new SQLite DBAPI connection."""
+    global _pragmas_installed
+    if _pragmas_installed:
+        return
+    _pragmas_installed = True
+    pragmas = pragmas or SQLITE_PRAGMAS
+
+    @event.listens_for(Engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        if not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+
+def configure_storage(app):
+    """Set engine options on the app config; must run before SQLAlchemy(app)."""
+    if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', sqlite_engine_options(
+            pool_size=app.config.get('DB_POOL_SIZE', 10),
+            max_overflow=app.config.get('DB_MAX_OVERFLOW', 20),
+        ))
+        enable_sqlite_pragmas()
+
+
+class MetricsWriteBuffer:
+    """Coalesces high-frequency interview metric updates into batched transactions.
+
+    Clients post confidence/stress/engagement several times a second. Instead of
+    one commit per request, updates are merged per interview in memory and a
+    background thread writes them all in a single UPDATE batch every
+    ``interval_ms``. An interval of 0 writes synchronously (the old behaviour).
+
+    With a ``sample_model``, every update is also kept as a timestamped row
+    (the per-frame timeline) and bulk-inserted in the same transaction.
+    """
+
+    def __init__(self, app, db, model, interval_ms: int = 250, sample_model=None,
+                 max_pending_samples: int = 100000):
+        self.app = app
+        self.db = db
+        self.model = model
+        self.sample_model = sample_model
+        self.max_pending_samples = max_pending_samples
+        self.interval = interval_ms / 1000.0
+        self.pending: Dict[int, dict] = {}
+        # Bounded: when the database falls behind, the oldest samples are dropped
+        self.samples: deque = deque(maxlen=max_pending_samples)
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+        self.flush_count = 0
+        self.rows_written = 0
+        self.updates_received = 0
+        self.samples_written = 0
+        self.samples_dropped = 0
+
+        if self.interval > 0:
+            self.thread = threading.Thread(target=self._run, name='metrics-writer', daemon=True)
+            self.thread.start()
+            atexit.register(self.close)
+
+    def submit(self, interview_id: int, values: dict, sample: bool = True, sample_values: Optional[dict] = None):
+        """Queue metric values for an interview; later values overwrite earlier ones.
+
+        ``sample_values`` go on the timeline sample only (e.g. raw expression scores).
+        """
+        with self.lock:
+            self.pending.setdefault(interview_id, {}).update(values)
+            self.updates_received += 1
+            if sample and self.sample_model is not None:
+                if len(self.samples) == self.samples.maxlen:
+                    # The database is not keeping up; the deque drops the oldest sample
+                    self.samples_dropped += 1
+                self.samples.append(dict(values, **(sample_values or {}), interview_id=interview_id,
+                                         timestamp=datetime.utcnow()))
+        if self.thread is None:
+            self.flush()
+
+    def discard(self, interview_id: int):
+        with self.lock:
+            self.pending.pop(interview_id, None)
+
+    def flush(self) -> int:
+        """Write all pending updates in one transaction. Returns the number of rows."""
+        with self.flush_lock:
+            with self.lock:
+                batch, self.pending = self.pending, {}
+                samples, self.samples = list(self.samples), deque(maxlen=self.max_pending_samples)
+            if not batch and not samples:
+                return 0
+
+            with self.app.app_context():
+                try:
+                    # Interviews deleted since their updates were queued would
+                    # fail every flush; their updates and samples are dropped
+                    known = self._existing_ids(set(batch) | {sample['interview_id'] for sample in samples})
+                    rows = [dict(values, id=interview_id) for interview_id, values in batch.items()
+                            if interview_id in known]
+                    samples = [sample for sample in samples if sample['interview_id'] in known]
+                    self._update_rows(rows)
+                    if samples:
+                        self.db.session.execute(insert(self.sample_model), samples)
+                    self.db.session.commit()
+                except Exception:
+                    self.db.session.rollback()
+                    # Put the batch back unless newer values arrived meanwhile
+                    with self.lock:
+                        for interview_id, values in batch.items():
+                            merged = dict(values)
+                            merged.update(self.pending.get(interview_id, {}))
+                            self.pending[interview_id] = merged
+                        # Put the failed samples back in front; if that overflows, the oldest are dropped
+                        requeued = deque(samples + list(self.samples), maxlen=self.max_pending_samples)
+                        self.samples_dropped += len(samples) + len(self.samples) - len(requeued)
+                        self.samples = requeued
+                    raise
+                finally:
+                    self.db.session.remove()
+
+            self.flush_count += 1
+            self.rows_written += len(rows)
+            self.samples_written += len(samples)
+            return len(rows)
+
+    def _existing_ids(self, ids: set) -> set:
+        id_column = self.model.__table__.c.id
+        known = set()
+        ids = list(ids)
+        # Stay well under SQLite's bound parameter limit
+        for start in range(0, len(ids), 500):
+            known.update(self.db.session.scalars(select(id_column).where(id_column.in_(ids[start:start + 500]))))
+        return known
+
+    def _update_rows(self, rows: List[dict]):
+        """UPDATE by primary key, one executemany per set of columns.
+
+        Core statements don't check matched row counts, so a row deleted
+        between the id check and the write is skipped rather than failing
+        the whole batch.
+        """
+        table = self.model.__table__
+        groups: Dict[tuple, List[dict]] = {}
+        for row in rows:
+            columns = tuple(sorted(key for key in row if key != 'id'))
+            groups.setdefault(columns, []).append({'row_id': row['id'], **{f'new_{c}': row[c] for c in columns}})
+        for columns, params in groups.items():
+            if columns:
+                self.db.session.execute(
+                    update(table).where(table.c.id == bindparam('row_id'))
+                    .values({c: bindparam(f'new_{c}') for c in columns}), params)
+
+    def stats(self) -> dict:
+        with self.lock:
+            pending = len(self.pending)
+        return {
+            'interval_ms': self.interval * 1000,
+            'updates_received': self.updates_received,
+            'flushes': self.flush_count,
+            'rows_written': self.rows_written,
+            'samples_written': self.samples_written,
+            'samples_dropped': self.samples_dropped,
+            'pending': pending,
+        }
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            started = time.perf_counter()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error flushing metrics: {str(e)}")
+            # Don't let a slow flush turn into back-to-back flushes
+            elapsed = time.perf_counter() - started
+            if elapsed > self.interval:
+                self.stopped.wait(min(elapsed, 5.0))
+
+    def close(self):
+        self.stopped.set()
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"Error flushing metrics on shutdown: {str(e)}")
@@ -0,0 +1,120 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+class FragmentCache:
+    """Rendered template fragments, keyed by name, key parts and a version.
+
+    Each fragment name has a version counter; bumping it (e.g. when the
+    question bank changes) invalidates every fragment under that name
+    without touching the others. Entries also expire after ``ttl_seconds``
+    so processes that did not see a bump catch up eventually.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 300):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries: 'OrderedDict[tuple, tuple]' = OrderedDict()
+        self.versions: Dict[str, int] = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def version(self, name: str) -> int:
+        return self.versions.get(name, 0)
+
+    def bump(self, name: str):
+        with self.lock:
+            self.versions[name] = self.versions.get(name, 0) + 1
+
+    def get_or_render(self, name: str, parts: tuple, render: Callable[[], str]) -> str:
+        key = (name, self.version(name)) + tuple(parts)
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and now - entry[1] <= self.ttl_seconds:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # Rendered outside the lock; two threads may render the same fragment once
+        value = render()
+        with self.lock:
+            self.entries[key] = (value, now)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> dict:
+        with self.lock:
+            size = len(self.entries)
+        return {'entries': size, 'hits': self.hits, 'misses': self.misses, 'versions': dict(self.versions)}
+
+
+class FragmentCacheExtension(Extension):
+    """``{% cache 'avatar', interviewer.id %}...{% endcache %}`` for Jinja.
+
+    The first argument is the fragment name (its version namespace), the
+    rest make up the key. Only cache markup that is the same for every
+    user: no CSRF tokens, flashes or per-user data inside the block.
+    """
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render', [nodes.List(args)]), [], [], body).set_lineno(lineno)
+
+    def _render(self, args, caller):
+        cache: Optional[FragmentCache] = self.environment.fragment_cache
+        if cache is None:
+            return caller()
+        # caller() is already escaped, so hand it back as Markup
+        return Markup(cache.get_or_render(str(args[0]), tuple(args[1:]), lambda: str(caller())))
+
+
+def invalidate_on_change(cache: FragmentCache, name: str, model):
+    """Bump ``name`` whenever a flush adds, changes or deletes a ``model`` row."""
+    @event.listens_for(Session, 'after_flush')
+    def bump_fragments(session, flush_context):
+        for obj in (*session.new, *session.dirty, *session.deleted):
+            if isinstance(obj, model):
+                cache.bump(name)
+                return
+
+
+def configure_templates(app, fragment_cache: Optional[FragmentCache] = None, bytecode_cache_dir: Optional[str] = None):
+    """Enable the ``{% cache %}`` tag and, optionally, on-disk Jinja bytecode.
+
+    Compiled templates are written to ``bytecode_cache_dir`` so cold workers
+    load bytecode instead of parsing and compiling every template again.
+    """
+    env = app.jinja_env
+    env.add_extension(FragmentCacheExtension)
+    env.fragment_cache = fragment_cache
+    if bytecode_cache_dir:
+        os.makedirs(bytecode_cache_dir, exist_ok=True)
+        env.bytecode_cache = FileSystemBytecodeCache(bytecode_cache_dir)
+    return env
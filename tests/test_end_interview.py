@@ -0,0 +1,49 @@
+import glob
+import os
+
+import numpy as np
+
+import analytics_export
+from factory import create_app
+from models import db, Interview, User
+
+
+def test_ending_twice_exports_the_interview_once(tmp_path):
+    app = create_app('web', {
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "interview.db"}',
+        'UPLOAD_FOLDER': str(tmp_path / 'recordings'),
+        'JINJA_BYTECODE_CACHE_DIR': '',
+        'WTF_CSRF_ENABLED': False,
+    })
+    with app.app_context():
+        user = User(username='candidate', email='candidate@example.com')
+        db.session.add(user)
+        db.session.flush()
+        interview = Interview(user_id=user.id, topic='data_structures_algorithms', difficulty='easy')
+        db.session.add(interview)
+        db.session.commit()
+        user_id, interview_id = user.id, interview.id
+
+    client = app.test_client()
+    out_dir = str(tmp_path / 'export')
+
+    def end():
+        # A second tab still has the interview in its session
+        with client.session_transaction() as sess:
+            sess['user_id'] = user_id
+            sess['interview_id'] = interview_id
+        assert client.post('/api/end-interview', json={}).status_code == 200
+        with app.app_context():
+            return db.session.get(Interview, interview_id).end_time
+
+    def export():
+        with app.app_context():
+            return analytics_export.export_all(out_dir, tables=['interviews'], fmt='npz', settle_seconds=0)
+
+    first_end = end()
+    assert export()['interviews'] == 1
+    assert end() == first_end
+    assert export()['interviews'] == 0
+
+    ids = [i for part in glob.glob(os.path.join(out_dir, 'interviews', '*.npz')) for i in np.load(part)['id']]
+    assert ids == [interview_id]
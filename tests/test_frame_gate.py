@@ -0,0 +1,56 @@
+import threading
+
+import numpy as np
+
+from face_detectors import FaceDetector
+from facial_analysis import FacialExpressionAnalyzer
+from frame_gate import MotionGate
+
+DARK = np.zeros((120, 160), dtype=np.uint8)
+BRIGHT = np.full((120, 160), 200, dtype=np.uint8)
+
+
+class MeetingDetector(FaceDetector):
+    """Holds every caller until ``parties`` analyses are inside ``detect`` together."""
+
+    def __init__(self, parties):
+        self.barrier = threading.Barrier(parties, timeout=5)
+
+    def detect(self, frame):
+        self.barrier.wait()
+        return []
+
+
+def test_interleaved_tickets_keep_newest_reference():
+    gate = MotionGate(threshold=4.0)
+    first = gate.should_analyze(DARK)
+    second = gate.should_analyze(BRIGHT)
+    assert first is not None and second is not None
+
+    # The later frame finishes first; the stale ticket must not replace it
+    gate.mark_analyzed(second)
+    gate.mark_analyzed(first)
+
+    assert gate.should_analyze(BRIGHT) is None
+    assert gate.should_analyze(DARK) is not None
+
+
+def test_overlapping_analyses_on_one_analyzer():
+    analyzer = FacialExpressionAnalyzer(detector=MeetingDetector(2), use_landmarks=False,
+                                        frame_gate=MotionGate(threshold=4.0))
+    errors = []
+
+    def analyze(frame):
+        try:
+            analyzer.detect_expression(frame)
+        except Exception as e:  # surfaced in the main thread below
+            errors.append(e)
+
+    threads = [threading.Thread(target=analyze, args=(frame,)) for frame in (DARK, BRIGHT)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert analyzer.frame_gate.frames_seen == 2
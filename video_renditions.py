@@ -0,0 +1,262 @@
+"""Smaller renditions of interviewer videos for candidates on slow links.
+
+Each interviewer video is transcoded in the background into a ladder of
+renditions (``RENDITION_LADDER``, never larger than the source), described by
+a ``manifest.json`` next to them. With ffmpeg on the PATH every rendition is
+H.264/AAC HLS in ``SEGMENT_SECONDS`` segments and a ``master.m3u8`` lists
+them by bandwidth. Without it, OpenCV decodes the source once and writes
+one VP8 WebM per rendition (video only, progressive download). The
+original upload is always kept as the top rendition.
+
+Renditions live under ``static/interviewer_videos/renditions/<video name>/``
+and are published by renaming a finished temporary directory, so players
+never see a half-written ladder.
+"""
+import json
+import os
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+STATIC_DIR = 'static'
+RENDITIONS_DIR = os.path.join('interviewer_videos', 'renditions')
+MANIFEST = 'manifest.json'
+SEGMENT_SECONDS = 4
+
+# name, height, video kbps, audio kbps
+RENDITION_LADDER = [
+    ('720p', 720, 2500, 128),
+    ('480p', 480, 1000, 96),
+    ('360p', 360, 600, 64),
+    ('240p', 240, 300, 48),
+]
+
+
+def rendition_root(video_path: str) -> str:
+    """Static-relative directory holding the renditions of ``video_path``."""
+    return os.path.join(RENDITIONS_DIR, os.path.splitext(os.path.basename(video_path))[0])
+
+
+def probe(path: str) -> dict:
+    import cv2
+    capture = cv2.VideoCapture(path)
+    try:
+        if not capture.isOpened():
+            raise ValueError(f'Could not open video: {path}')
+        fps = capture.get(cv2.CAP_PROP_FPS) or 25.0
+        frames = capture.get(cv2.CAP_PROP_FRAME_COUNT)
+        return {
+            'width': int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            'height': int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            'fps': fps,
+            'duration': frames / fps if frames > 0 else 0.0
+        }
+    finally:
+        capture.release()
+
+
+def plan_ladder(width: int, height: int) -> List[dict]:
+    """Renditions below the source height (at least the smallest), even-sized."""
+    ladder = [step for step in RENDITION_LADDER if step[1] < height] or [RENDITION_LADDER[-1]]
+    return [{
+        'name': name,
+        'width': max(2, int(round(width * h / height / 2)) * 2),
+        'height': h,
+        'bandwidth': (video_kbps + audio_kbps) * 1000,
+        'video_kbps': video_kbps,
+        'audio_kbps': audio_kbps
+    } for name, h, video_kbps, audio_kbps in ladder]
+
+
+def _transcode_hls(source: str, out_dir: str, ladder: List[dict], fps: float):
+    # Keyframes on segment boundaries so every rendition switches cleanly
+    gop = max(1, int(round(fps * SEGMENT_SECONDS)))
+    for step in ladder:
+        step_dir = os.path.join(out_dir, step['name'])
+        os.makedirs(step_dir)
+        subprocess.run([
+            'ffmpeg', '-y', '-v', 'error', '-i', source,
+            '-vf', f"scale={step['width']}:{step['height']}",
+            '-c:v', 'libx264', '-preset', 'veryfast', '-profile:v', 'main',
+            '-b:v', f"{step['video_kbps']}k", '-maxrate', f"{int(step['video_kbps'] * 1.1)}k",
+            '-bufsize', f"{step['video_kbps'] * 2}k",
+            '-g', str(gop), '-keyint_min', str(gop), '-sc_threshold', '0',
+            '-c:a', 'aac', '-b:a', f"{step['audio_kbps']}k", '-ac', '2',
+            '-f', 'hls', '-hls_time', str(SEGMENT_SECONDS), '-hls_playlist_type', 'vod',
+            '-hls_segment_filename', os.path.join(step_dir, 'seg_%03d.ts'),
+            os.path.join(step_dir, 'index.m3u8')
+        ], check=True, capture_output=True)
+        step['file'] = f"{step['name']}/index.m3u8"
+
+    with open(os.path.join(out_dir, 'master.m3u8'), 'w') as f:
+        f.write('#EXTM3U\n#EXT-X-VERSION:3\n')
+        for step in ladder:
+            f.write(f"#EXT-X-STREAM-INF:BANDWIDTH={step['bandwidth']},RESOLUTION={step['width']}x{step['height']}\n")
+            f.write(f"{step['file']}\n")
+
+
+def _transcode_opencv(source: str, out_dir: str, ladder: List[dict], fps: float):
+    import cv2
+    fourcc = cv2.VideoWriter_fourcc(*'VP80')
+    writers = []
+    for step in ladder:
+        step['file'] = f"{step['name']}.webm"
+        writer = cv2.VideoWriter(os.path.join(out_dir, step['file']), fourcc, fps, (step['width'], step['height']))
+        if not writer.isOpened():
+            raise RuntimeError('OpenCV cannot write VP8 WebM; install ffmpeg for renditions')
+        writers.append((writer, (step['width'], step['height'])))
+
+    # One decode pass feeds every rendition
+    capture = cv2.VideoCapture(source)
+    try:
+        while True:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            for writer, size in writers:
+                writer.write(cv2.resize(frame, size, interpolation=cv2.INTER_AREA))
+    finally:
+        capture.release()
+        for writer, size in writers:
+            writer.release()
+
+
+def transcode(video_path: str, static_dir: str = STATIC_DIR, use_ffmpeg: Optional[bool] = None) -> dict:
+    """Build the rendition ladder for a static-relative ``video_path``; returns the manifest."""
+    source = os.path.join(static_dir, video_path)
+    info = probe(source)
+    ladder = plan_ladder(info['width'], info['height'])
+    if use_ffmpeg is None:
+        use_ffmpeg = shutil.which('ffmpeg') is not None
+
+    root = rendition_root(video_path)
+    target = os.path.join(static_dir, root)
+    work = f'{target}.tmp-{os.getpid()}-{threading.get_ident()}'
+    shutil.rmtree(work, ignore_errors=True)
+    os.makedirs(work)
+    try:
+        if use_ffmpeg:
+            _transcode_hls(source, work, ladder, info['fps'])
+        else:
+            _transcode_opencv(source, work, ladder, info['fps'])
+
+        duration = info['duration']
+        if not use_ffmpeg and duration:
+            # OpenCV can't target a bitrate, so report what the encoder produced
+            for step in ladder:
+                step['bandwidth'] = int(os.path.getsize(os.path.join(work, step['file'])) * 8 / duration)
+        renditions = [{
+            'name': 'source',
+            'width': info['width'],
+            'height': info['height'],
+            'bandwidth': int(os.path.getsize(source) * 8 / duration) if duration else None,
+            'path': video_path
+        }] + [{
+            'name': step['name'],
+            'width': step['width'],
+            'height': step['height'],
+            'bandwidth': step['bandwidth'],
+            'path': os.path.join(root, step['file'])
+        } for step in ladder]
+        manifest = {
+            'source': video_path,
+            'kind': 'hls' if use_ffmpeg else 'progressive',
+            'master': os.path.join(root, 'master.m3u8') if use_ffmpeg else None,
+            'segment_seconds': SEGMENT_SECONDS if use_ffmpeg else None,
+            'duration': duration,
+            'renditions': renditions,
+            'created_at': time.time()
+        }
+        with open(os.path.join(work, MANIFEST), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        # Publish the finished ladder in one rename
+        shutil.rmtree(target, ignore_errors=True)
+        os.replace(work, target)
+        return manifest
+    except Exception:
+        shutil.rmtree(work, ignore_errors=True)
+        raise
+
+
+def load_manifest(video_path: str, static_dir: str = STATIC_DIR) -> Optional[dict]:
+    path = os.path.join(static_dir, rendition_root(video_path), MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def choose_rendition(manifest: dict, bandwidth_kbps: Optional[float], headroom: float = 0.8) -> dict:
+    """The largest rendition whose bitrate fits ``headroom`` of the measured bandwidth.
+
+    Without a measurement the smallest rendition is used, so playback starts
+    quickly and the player can step up.
+    """
+    renditions = [r for r in manifest['renditions'] if r['bandwidth']]
+    smallest = min(renditions, key=lambda r: r['bandwidth'])
+    if not bandwidth_kbps:
+        return smallest
+    fitting = [r for r in renditions if r['bandwidth'] <= bandwidth_kbps * 1000 * headroom]
+    return max(fitting, key=lambda r: r['bandwidth']) if fitting else smallest
+
+
+class TranscodeQueue:
+    """Bounded background pool for rendition jobs.
+
+    At most ``workers`` videos transcode at once and at most ``max_pending``
+    wait; ``submit`` returns False when the queue is full, and the
+    ``transcode-videos`` command picks those videos up later.
+    """
+
+    def __init__(self, workers: int = 1, max_pending: int = 16, static_dir: str = STATIC_DIR):
+        self.static_dir = static_dir
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='transcode')
+        self.slots = threading.BoundedSemaphore(workers + max_pending)
+        self.lock = threading.Lock()
+        self.status: Dict[str, str] = {}
+
+    def submit(self, video_path: str) -> bool:
+        with self.lock:
+            if self.status.get(video_path) in ('queued', 'running'):
+                return True
+            if not self.slots.acquire(blocking=False):
+                return False
+            self.status[video_path] = 'queued'
+        self.pool.submit(self._run, video_path)
+        return True
+
+    def _run(self, video_path: str):
+        self.status[video_path] = 'running'
+        try:
+            transcode(video_path, self.static_dir)
+            self.status[video_path] = 'done'
+        except Exception as e:
+            print(f"Error transcoding {video_path}: {str(e)}")
+            self.status[video_path] = 'failed'
+        finally:
+            self.slots.release()
+
+    def state(self, video_path: str) -> Optional[str]:
+        return self.status.get(video_path)
+
+
+# Set up by the app factory for the web role (TRANSCODE_WORKERS > 0)
+transcode_queue: Optional[TranscodeQueue] = None
+
+
+def init_transcode_queue(app):
+    global transcode_queue
+    workers = app.config['TRANSCODE_WORKERS']
+    transcode_queue = TranscodeQueue(workers, app.config['TRANSCODE_MAX_PENDING']) if workers > 0 else None
+    return transcode_queue
+
+
+def queue_renditions(video_path: Optional[str]) -> bool:
+    """Queue an uploaded interviewer video for transcoding, if a queue is running."""
+    if not video_path or transcode_queue is None:
+        return False
+    return transcode_queue.submit(video_path)
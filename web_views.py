@@ -0,0 +1,745 @@
+"""Pages and interview APIs for the web role."""
+import os
+from datetime import datetime
+
+from flask import Blueprint, abort, current_app, flash, jsonify, redirect, render_template, request, send_file, session, url_for
+from flask_wtf import FlaskForm
+from sqlalchemy import update
+from werkzeug.security import check_password_hash, generate_password_hash
+from werkzeug.utils import secure_filename
+from wtforms import SelectField, SubmitField
+from wtforms.validators import DataRequired
+
+import interview_services as services
+import media_prefetch
+import overlay_render
+import recording_ingest
+import recording_lifecycle
+import recording_previews
+import score_stats
+import video_renditions
+from auth import is_operator, login_required
+from models import db, User, Interview, Question, InterviewerAvatar, InterviewVideo, InterviewResponse
+
+bp = Blueprint('web', __name__)
+
+
+# Context processors
+@bp.app_context_processor
+def inject_session():
+    return dict(session=session)
+
+@bp.app_context_processor
+def inject_user():
+    if 'user_id' in session:
+        # Reuse the cached user of the active interview instead of a query per render
+        if session.get('interview_id'):
+            state = services.session_store.get(session['interview_id'])
+            if state is not None and state.user is not None and state.user_id == session['user_id']:
+                return dict(user=state.user)
+        user = User.query.get(session['user_id'])
+        return dict(user=user)
+    return dict(user=None)
+
+@bp.app_context_processor
+def inject_current_year():
+    return {'current_year': datetime.now().year}
+
+@bp.app_errorhandler(recording_ingest.RecordingRejected)
+def recording_rejected(error):
+    return jsonify({'error': error.description}), error.code
+
+@bp.after_app_request
+def cache_versioned_static(response):
+    # Prefetched media URLs carry a content hash (?v=...), so browsers may keep them
+    if request.endpoint == 'static' and request.args.get('v') and response.status_code == 200:
+        response.cache_control.public = True
+        response.cache_control.max_age = 31536000
+        response.cache_control.immutable = True
+    return response
+
+@bp.app_template_filter('avg')
+def avg_filter(lst, attribute=None):
+    if not lst:
+        return 0
+    if attribute:
+        values = [getattr(x, attribute) for x in lst if getattr(x, attribute) is not None]
+    else:
+        values = [x for x in lst if x is not None]
+    return sum(values) / len(values) if values else 0
+
+class InterviewForm(FlaskForm):
+    topic = SelectField('Select Topic', validators=[DataRequired()])
+    difficulty = SelectField('Select Difficulty', validators=[DataRequired()], choices=[
+        ('easy', 'Easy'),
+        ('medium', 'Medium'),
+        ('hard', 'Hard')
+    ])
+    num_interviewers = SelectField('Number of Interviewers', validators=[DataRequired()], choices=[
+        ('1', '1 Interviewer'),
+        ('2', '2 Interviewers'),
+        ('3', '3 Interviewers')
+    ])
+    submit = SubmitField('Start Interview')
+
+@bp.route('/')
+def index():
+    return render_template('index.html')
+
+@bp.route('/about')
+def about():
+    return render_template('about.html')
+
+@bp.route('/contact', methods=['GET', 'POST'])
+def contact():
+    if request.method == 'POST':
+        name = request.form.get('name')
+        email = request.form.get('email')
+        subject = request.form.get('subject')
+        message = request.form.get('message')
+        
+        # Here you would typically save the contact form data or send an email
+        # For now, we'll just show a success message
+        flash('Thank you for your message! We will get back to you soon.', 'success')
+        return redirect(url_for('web.contact'))
+    
+    return render_template('contact.html')
+
+@bp.route('/upload-video', methods=['GET', 'POST'])
+def upload_video():
+    if not session.get('user_id'):
+        return redirect(url_for('web.login'))
+    
+    if request.method == 'POST':
+        if 'video' not in request.files:
+            flash('No video file uploaded', 'error')
+            return redirect(request.url)
+            
+        video = request.files['video']
+        question_id = request.form.get('question_id')
+        
+        if video.filename == '':
+            flash('No video selected', 'error')
+            return redirect(request.url)
+            
+        if not question_id:
+            flash('Please select a question', 'error')
+            return redirect(request.url)
+            
+        if video and services.allowed_video_file(video.filename):
+            filename = secure_filename(video.filename)
+            video_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
+            video.save(video_path)
+            
+            # Save video details to database
+            video_url = url_for('static', filename=f'uploads/{filename}')
+            new_video = InterviewVideo(
+                user_id=session['user_id'],
+                question_id=question_id,
+                video_url=video_url
+            )
+            db.session.add(new_video)
+            db.session.commit()
+            
+            flash('Video uploaded successfully!', 'success')
+            return redirect(url_for('web.dashboard'))
+        else:
+            flash('Invalid video format. Supported formats: MP4, WebM, MOV', 'error')
+            return redirect(request.url)
+    
+    # GET request - show upload form
+    questions = Question.query.all()
+    return render_template('upload_video.html', questions=questions)
+
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    if request.method == 'POST':
+        email = request.form['email']
+        password = request.form['password']
+        user = User.query.filter_by(email=email).first()
+        if user and check_password_hash(user.password_hash, password):
+            session['user_id'] = user.id
+            flash('Logged in successfully!', 'success')
+            return redirect(url_for('web.dashboard'))
+        else:
+            flash('Invalid email or password', 'error')
+    return render_template('login.html')
+
+@bp.route('/signup', methods=['GET', 'POST'])
+def signup():
+    if request.method == 'POST':
+        username = request.form.get('username')
+        email = request.form.get('email')
+        password = request.form.get('password')
+        full_name = request.form.get('full_name')
+        phone = request.form.get('phone')
+        education = request.form.get('education')
+        
+        if User.query.filter_by(username=username).first():
+            flash('Username already exists', 'error')
+            return redirect(url_for('web.signup'))
+        
+        if User.query.filter_by(email=email).first():
+            flash('Email already registered', 'error')
+            return redirect(url_for('web.signup'))
+        
+        user = User(
+            username=username,
+            email=email,
+            password_hash=generate_password_hash(password),
+            full_name=full_name,
+            phone=phone,
+            education=education
+        )
+        
+        db.session.add(user)
+        db.session.commit()
+        
+        session['user_id'] = user.id
+        flash('Account created successfully!', 'success')
+        return redirect(url_for('web.dashboard'))
+    
+    return render_template('signup.html')
+
+@bp.route('/logout')
+def logout():
+    session.pop('user_id', None)
+    session.pop('interview_id', None)
+    flash('Logged out successfully!', 'success')
+    return redirect(url_for('web.index'))
+
+@bp.route('/dashboard')
+@login_required
+def dashboard():
+    user = User.query.get(session['user_id'])
+    interviews = Interview.query.filter_by(user_id=session['user_id']).order_by(Interview.start_time.desc()).all()
+    return render_template('dashboard.html', interviews=interviews, user=user)
+
+@bp.route('/start-interview', methods=['GET', 'POST'])
+@login_required
+def start_interview():
+    form = InterviewForm()
+    
+    # Get available topics for dropdown
+    topics = db.session.query(Question.topic).distinct().all()
+    form.topic.choices = [(topic[0], topic[0].replace('_', ' ').title()) for topic in topics]
+    
+    if request.method == 'POST':
+        topic = request.form.get('topic')
+        difficulty = request.form.get('difficulty')
+        num_interviewers = int(request.form.get('num_interviewers', 1))
+        
+        if not all([topic, difficulty]):
+            flash('Please fill in all required fields', 'error')
+            return redirect(url_for('web.start_interview'))
+        
+        # Create new interview
+        interview = Interview(
+            user_id=session['user_id'],
+            topic=topic,
+            difficulty=difficulty,
+            num_interviewers=num_interviewers,
+            start_time=datetime.now(),
+            current_question=0  # Start with the first question
+        )
+        
+        # Get questions for this topic and difficulty
+        questions = Question.query.filter_by(
+            topic=topic,
+            difficulty=difficulty
+        ).all()
+        
+        if not questions:
+            flash('No questions available for this topic and difficulty', 'error')
+            return redirect(url_for('web.start_interview'))
+        
+        # Assign questions to interview
+        for i, question in enumerate(questions, 1):
+            question.question_order = i
+            interview.questions.append(question)
+        
+        db.session.add(interview)
+        db.session.commit()
+        
+        return redirect(url_for('web.interview_room', interview_id=interview.id))
+    
+    return render_template('start_interview.html', form=form)
+
+@bp.route('/interview-room/<int:interview_id>')
+@login_required
+def interview_room(interview_id):
+    interview = Interview.query.get_or_404(interview_id)
+    
+    # Ensure the interview belongs to the current user
+    if interview.user_id != session['user_id']:
+        flash('Access denied', 'error')
+        return redirect(url_for('web.dashboard'))
+    
+    # Get an interviewer avatar specialized in the interview topic
+    interviewer = InterviewerAvatar.query.filter_by(specialization=interview.topic).first()
+    if not interviewer:
+        # Fallback to any available interviewer if no specialist is found
+        interviewer = InterviewerAvatar.query.first()
+    
+    # Get the current question
+    current_question = None
+    if interview.questions:
+        # Get question by order number
+        current_question = Question.query.filter_by(
+            topic=interview.topic,
+            difficulty=interview.difficulty
+        ).filter(Question.question_order == (interview.current_question + 1)).first()
+    
+    if not current_question and interview.questions:
+        # Fallback: get the first question if no current question
+        current_question = interview.questions[0]
+
+    # The metrics/recording APIs look up the active interview from the session
+    session['interview_id'] = interview.id
+    state = services.session_store.put(services.build_interview_state(interview))
+
+    # Start reading the first questions' media while the room loads
+    upcoming = [state.question_at(state.current_question + n) for n in (1, 2)]
+    media_prefetch.warm_questions(upcoming)
+
+    # Plain dicts from the session store, so a cached question list fragment
+    # never touches the ORM
+    return render_template('interview_room.html',
+                           interview=interview,
+                           interviewer=interviewer,
+                           current_question=current_question,
+                           questions=state.questions,
+                           prefetch=media_prefetch.prefetch_manifest(upcoming[1]))
+
+@bp.route('/upload-video/<int:question_id>', methods=['POST'])
+@login_required
+def upload_video_endpoint(question_id):
+    question = Question.query.get_or_404(question_id)
+    
+    if 'video' not in request.files:
+        return jsonify({'error': 'No video file'}), 400
+    
+    video = request.files['video']
+    if video.filename == '':
+        return jsonify({'error': 'No selected file'}), 400
+    
+    if video:
+        # Create upload directory if it doesn't exist
+        os.makedirs(current_app.config['UPLOAD_FOLDER'], exist_ok=True)
+        
+        # Save video with unique filename
+        filename = f"{session['user_id']}_{question_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.webm"
+        video_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
+        recording_ingest.commit_upload(video, video_path)
+        
+        # Update question with video path
+        question.video_path = filename
+        db.session.commit()
+        
+        return jsonify({'success': True, 'video_path': filename})
+    
+    return jsonify({'error': 'Invalid file format'}), 400
+
+@bp.route('/delete-video/<int:question_id>', methods=['POST'])
+@login_required
+def delete_video_endpoint(question_id):
+    question = Question.query.get_or_404(question_id)
+    
+    if question.video_path:
+        video_path = question.video_path
+
+        # Clear video path in database
+        question.video_path = None
+        db.session.commit()
+
+        # The file goes in the background; a missed delete is picked up by the GC sweep
+        recording_lifecycle.lifecycle.schedule_delete(video_path)
+
+        return jsonify({'success': True})
+    
+    return jsonify({'error': 'No video found'}), 404
+
+@bp.route('/test-interview-room')
+def test_interview_room():
+    try:
+        print("Creating test interview...")  # Debug print
+        
+        # Create a test user if needed
+        test_user = User.query.filter_by(username='test_user').first()
+        if not test_user:
+            test_user = User(
+                username='test_user',
+                email='test@example.com',
+                full_name='Test User',
+                password_hash=generate_password_hash('test123')  # Hash the password
+            )
+            db.session.add(test_user)
+            db.session.commit()
+            print(f"Created test user with ID: {test_user.id}")  # Debug print
+        
+        # Create a test interview
+        interview = Interview(
+            user_id=test_user.id,
+            topic='technology',
+            difficulty='beginner',
+            num_interviewers=1,
+            confidence_score=0.0,
+            stress_level=0.0,
+            engagement_score=0.0,
+            status='in_progress',
+            start_time=datetime.utcnow()
+        )
+        
+        db.session.add(interview)
+        db.session.commit()
+        print(f"Created interview with ID: {interview.id}")  # Debug print
+        
+        # Get or create a test interviewer
+        interviewer = InterviewerAvatar.query.filter_by(specialization='technology').first()
+        if not interviewer:
+            interviewer = InterviewerAvatar(
+                name='Technical Expert',
+                avatar_type='technical',
+                specialization='technology',
+                personality='professional',
+                model_path='interviewer1.jpg',
+                voice_id='en-US-Neural2-D',
+                description='General Technical Interviewer'
+            )
+            db.session.add(interviewer)
+            db.session.commit()
+            print(f"Created interviewer with ID: {interviewer.id}")  # Debug print
+        
+        # Get first question
+        first_question = Question.query.filter_by(topic='technology', difficulty='beginner').filter_by(question_order=1).first()
+        if not first_question:
+            print("No questions found in database!")  # Debug print
+            first_question = Question(
+                topic='technology',
+                difficulty='beginner',
+                content='Tell me about your experience with Python programming.',
+                category='technical',
+                keywords='python, programming, experience',
+                video_path='static/videos/tech_beginner_1.mp4',
+                question_order=1
+            )
+            db.session.add(first_question)
+            db.session.commit()
+            print(f"Created default question with ID: {first_question.id}")  # Debug print
+        else:
+            print(f"Found first question: {first_question.content}")  # Debug print
+        
+        # Store interview ID in session
+        session['interview_id'] = interview.id
+        state = services.session_store.put(services.build_interview_state(interview))
+        print(f"Stored interview_id in session: {session['interview_id']}")  # Debug print
+        
+        print("Rendering interview room template...")  # Debug print
+        return render_template('interview_room.html',
+                            interview=interview,
+                            interviewer=interviewer,
+                            topic='technology',
+                            difficulty='beginner',
+                            current_question=first_question,  # Pass first question to template
+                            questions=state.questions)
+
+    except Exception as e:
+        print(f"Error in test_interview_room: {str(e)}")  # Debug print
+        import traceback
+        traceback.print_exc()  # Print full traceback
+        return f"Error: {str(e)}", 500
+
+# API endpoint for getting next question
+@bp.route('/api/next-question/<int:interview_id>')
+@login_required
+def next_question(interview_id):
+    try:
+        state = services.interview_state(interview_id)
+        if state is None:
+            return jsonify({'error': 'Interview not found'}), 404
+        
+        # Check if user owns this interview
+        if state.user_id != session['user_id']:
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        # Get the current question number from the interview
+        next_question_num = state.current_question + 1
+        
+        # Get next question based on topic, difficulty, and order
+        question = state.question_at(next_question_num)
+        
+        if not question:
+            # If no more questions, return completion message
+            return jsonify({
+                'completed': True,
+                'message': 'Interview completed!'
+            })
+        
+        # Update interview's current question (write only, no read back)
+        db.session.execute(
+            update(Interview).where(Interview.id == interview_id).values(current_question=next_question_num)
+        )
+        db.session.commit()
+        state.current_question = next_question_num
+        services.session_store.save(state)
+
+        # Tell the client what question N+1 needs while N is answered, and read
+        # N+1 and N+2 ahead so their hashes are known by the next call
+        bandwidth = request.args.get('bandwidth', type=float)
+        upcoming = state.question_at(next_question_num + 1)
+        media_prefetch.warm_questions([upcoming, state.question_at(next_question_num + 2)], bandwidth)
+        
+        return jsonify(dict(question, prefetch=media_prefetch.prefetch_manifest(upcoming, bandwidth)))
+        
+    except Exception as e:
+        print(f"Error in next_question: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+# API endpoint for updating metrics
+@bp.route('/api/update-metrics', methods=['POST'])
+def update_metrics():
+    try:
+        data = request.get_json()
+        interview_id = session.get('interview_id')
+        
+        if not interview_id:
+            return jsonify({'error': 'No active interview'}), 400
+        # Queued updates are written later, so check the interview now
+        if services.owned_interview_state(interview_id, session.get('user_id')) is None:
+            return jsonify({'error': 'Interview not found'}), 404
+
+        services.queue_metrics(interview_id, data)
+        return jsonify({'status': 'success'})
+        
+    except Exception as e:
+        print(f"Error updating metrics: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/synthesize-speech', methods=['POST'])
+@login_required
+def synthesize_speech():
+    if not request.json or 'text' not in request.json:
+        return jsonify({'error': 'No text provided'}), 400
+    
+    text = request.json['text']
+    voice_id = request.json.get('voice_id', 'en-US-Standard-F')
+    
+    try:
+        # Here we would use a text-to-speech service
+        # For now, return a mock audio URL
+        return jsonify({
+            'audio_url': url_for('static', filename='audio/question.mp3')
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/save-interview-metrics', methods=['POST'])
+@login_required
+def save_interview_metrics():
+    data = request.get_json()
+    interview_id = session.get('interview_id')
+    
+    if not interview_id:
+        return jsonify({'error': 'No active interview'}), 400
+    if services.owned_interview_state(interview_id, session['user_id']) is None:
+        return jsonify({'error': 'Interview not found'}), 404
+    
+    services.metrics_buffer.submit(interview_id, {
+        'confidence_score': data.get('confidence'),
+        'stress_level': data.get('stress_level'),
+        'engagement_score': data.get('engagement')
+    })
+    return jsonify({'status': 'success'})
+
+@bp.route('/api/end-interview', methods=['POST'])
+@login_required
+def end_interview():
+    interview_id = session.get('interview_id')
+    if not interview_id:
+        return jsonify({'error': 'No active interview'}), 400
+    
+    # Persist any buffered metrics before closing the interview
+    services.metrics_buffer.flush()
+
+    # Only the first end sets end_time and counts the scores into the
+    # topic/difficulty percentiles; the analytics export keys interviews on
+    # end_time, so a repeated end must not move it
+    ended_at = datetime.utcnow()
+    result = db.session.execute(
+        update(Interview).where(Interview.id == interview_id, Interview.end_time.is_(None)).values(end_time=ended_at)
+    )
+    if result.rowcount:
+        score_stats.record_interview(interview_id)
+    elif db.session.get(Interview, interview_id) is None:
+        abort(404)
+    
+    db.session.commit()
+    session.pop('interview_id', None)
+    services.release_interview_analyzer(interview_id)
+    
+    return jsonify({
+        'status': 'success',
+        'redirect': url_for('web.dashboard')
+    })
+
+# API endpoint for picking the interviewer video rendition that fits the connection
+@bp.route('/api/question-video/<int:question_id>')
+@login_required
+def question_video(question_id):
+    question = Question.query.get_or_404(question_id)
+    if not question.interviewer_video_path:
+        return jsonify({'error': 'No interviewer video'}), 404
+
+    manifest = video_renditions.load_manifest(question.interviewer_video_path)
+    if manifest is None:
+        # Not transcoded (yet): serve the original upload
+        queue = video_renditions.transcode_queue
+        return jsonify({
+            'url': url_for('static', filename=question.interviewer_video_path),
+            'rendition': 'source',
+            'renditions': [],
+            'status': queue.state(question.interviewer_video_path) if queue else None
+        })
+
+    # Measured throughput from the client, else the Downlink client hint (Mbps)
+    bandwidth = request.args.get('bandwidth', type=float)
+    if bandwidth is None and request.headers.get('Downlink'):
+        try:
+            bandwidth = float(request.headers['Downlink']) * 1000
+        except ValueError:
+            pass
+    rendition = video_renditions.choose_rendition(manifest, bandwidth)
+    return jsonify({
+        'url': url_for('static', filename=rendition['path']),
+        'rendition': rendition['name'],
+        'master': url_for('static', filename=manifest['master']) if manifest['master'] else None,
+        'renditions': [{
+            'name': r['name'],
+            'width': r['width'],
+            'height': r['height'],
+            'bandwidth': r['bandwidth'],
+            'url': url_for('static', filename=r['path'])
+        } for r in manifest['renditions']]
+    })
+
+# API endpoint for comparing an interview with others on the same topic/difficulty
+@bp.route('/api/interview-percentiles/<int:interview_id>')
+@login_required
+def interview_percentiles(interview_id):
+    interview = Interview.query.get(interview_id)
+    if interview is None:
+        return jsonify({'error': 'Interview not found'}), 404
+    if interview.user_id != session['user_id']:
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    return jsonify({
+        'topic': interview.topic,
+        'difficulty': interview.difficulty,
+        'metrics': score_stats.interview_percentiles(interview)
+    })
+
+# API endpoint for recording storage used and left
+@bp.route('/api/recording-quota')
+@login_required
+def recording_quota():
+    return jsonify(recording_ingest.quota_report(session['user_id'], session.get('interview_id')))
+
+# API endpoint for disk usage of the recordings folder; other users' figures
+# and disk totals are for operators only
+@bp.route('/api/recording-storage')
+@login_required
+def recording_storage():
+    if is_operator():
+        return jsonify(recording_lifecycle.lifecycle.usage())
+    return jsonify(recording_lifecycle.lifecycle.user_usage(session['user_id']))
+
+# Poster or sprite of a saved recording; versioned URLs are cached for good
+@bp.route('/recording-preview/<int:response_id>/<kind>')
+@login_required
+def recording_preview(response_id, kind):
+    response = InterviewResponse.query.get_or_404(response_id)
+    if kind not in ('poster', 'sprite') or response.interview.user_id != session['user_id'] or not response.video_path:
+        abort(404)
+    path = os.path.join(current_app.config['UPLOAD_FOLDER'], recording_previews.preview_files(response.video_path)[kind])
+    if not os.path.exists(path):
+        abort(404)
+    preview = send_file(os.path.abspath(path), mimetype='image/jpeg', conditional=True)
+    if request.args.get('v'):
+        preview.cache_control.no_cache = None
+        preview.cache_control.private = True
+        preview.cache_control.max_age = 31536000
+        preview.cache_control.immutable = True
+    return preview
+
+def owned_recording(response_id):
+    response = InterviewResponse.query.get_or_404(response_id)
+    if response.interview.user_id != session['user_id'] or not response.video_path \
+            or not os.path.exists(os.path.join(current_app.config['UPLOAD_FOLDER'], response.video_path)):
+        abort(404)
+    return response
+
+# API endpoint to start (POST) or follow (GET) rendering a recording with the metrics overlay
+@bp.route('/api/recording-overlay/<int:response_id>', methods=['GET', 'POST'])
+@login_required
+def recording_overlay_job(response_id):
+    renderer = overlay_render.overlay_renderer
+    if renderer is None:
+        return jsonify({'error': 'Overlay rendering is disabled'}), 503
+    prepared = renderer.prepare(owned_recording(response_id))
+    job = renderer.submit(prepared) if request.method == 'POST' else renderer.status(prepared['key'])
+    if job['status'] == 'done':
+        job['url'] = url_for('web.recording_overlay', response_id=response_id, v=job['key'])
+    return jsonify(job), 202 if job['status'] in ('queued', 'running') else 200
+
+# The rendered overlay video; the URL carries the artifact key, so it never changes
+@bp.route('/recording-overlay/<int:response_id>')
+@login_required
+def recording_overlay(response_id):
+    renderer = overlay_render.overlay_renderer
+    if renderer is None:
+        abort(404)
+    key = renderer.prepare(owned_recording(response_id))['key']
+    path = renderer.artifact(key)
+    if not os.path.exists(path):
+        abort(404)
+    video = send_file(os.path.abspath(path), mimetype='video/webm', conditional=True)
+    if request.args.get('v') == key:
+        video.cache_control.no_cache = None
+        video.cache_control.private = True
+        video.cache_control.max_age = 31536000
+        video.cache_control.immutable = True
+    return video
+
+# API endpoint for the previews of an interview's recordings
+@bp.route('/api/interview-previews/<int:interview_id>')
+@login_required
+def interview_previews(interview_id):
+    interview = Interview.query.get_or_404(interview_id)
+    if interview.user_id != session['user_id']:
+        return jsonify({'error': 'Unauthorized'}), 403
+    root = current_app.config['UPLOAD_FOLDER']
+    return jsonify({'interview_id': interview.id, 'responses': [{
+        'response_id': response.id,
+        'question_id': response.question_id,
+        'preview': recording_previews.preview_urls(response, root)
+    } for response in sorted(interview.responses, key=lambda r: r.id)]})
+
+@bp.route('/save_recording', methods=['POST'])
+@login_required
+def save_recording():
+    if 'video' not in request.files:
+        return jsonify({'error': 'No video file'}), 400
+    
+    video = request.files['video']
+    question_id = request.form.get('question_id', '0')
+    interview_id = session.get('interview_id')
+    
+    if not interview_id:
+        return jsonify({'error': 'No active interview'}), 400
+    
+    # Already streamed to disk and checked against the limits; move it into place
+    filename, filepath = services.new_recording_path(session['user_id'])
+    upload = recording_ingest.commit_upload(video, filepath)
+
+    result, status = services.record_response(session['user_id'], interview_id, question_id, filename, upload)
+    return jsonify(result), status